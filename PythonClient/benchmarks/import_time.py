@@ -0,0 +1,93 @@
+# Measures the import time and memory of the cosysairsim package in fresh interpreters, checks that the
+# lightweight entry points do not load the RPC stack and that the lazy package surface lists every public name
+# of its submodules. Exits with an error when a check fails or a limit given on the command line is exceeded.
+#
+#   python benchmarks/import_time.py --repeat 20 --max-ms 200
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PYTHON_CLIENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# scenario -> (statement timed in a fresh interpreter, modules it must not load)
+SCENARIOS = {
+    'package': ("import cosysairsim", ('msgpackrpc', 'tornado', 'numpy')),
+    'types': ("from cosysairsim.types import Pose, Vector3r", ('msgpackrpc', 'tornado')),
+    'utils': ("from cosysairsim.utils import poses_to_arrays", ('msgpackrpc', 'tornado')),
+    'client': ("import cosysairsim as airsim; airsim.MultirotorClient", ()),
+    'everything': ("from cosysairsim import *", ()),
+}
+
+_MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kb = rss // 1024 if sys.platform == 'darwin' else rss
+except ImportError:
+    rss_kb = 0
+print(json.dumps({{'time': elapsed, 'rss_kb': rss_kb, 'modules': sorted(sys.modules)}}))
+"""
+
+_CHECK_SURFACE = """
+import importlib, inspect, json
+import cosysairsim
+errors = []
+for module_name, names in cosysairsim._LAZY_MODULES.items():
+    module = importlib.import_module('cosysairsim.' + module_name)
+    for name in names:
+        if not hasattr(module, name):
+            errors.append('{}.{} does not exist'.format(module_name, name))
+    if module_name not in cosysairsim._STAR_MODULES:
+        continue
+    for name, value in vars(module).items():
+        if name.startswith('_') or name in cosysairsim._LAZY_ATTRIBUTES:
+            continue
+        if (inspect.isclass(value) or inspect.isfunction(value)) and value.__module__ == module.__name__:
+            errors.append('{}.{} is not listed in _LAZY_MODULES'.format(module_name, name))
+print(json.dumps(errors))
+"""
+
+
+def run_python(code):
+    env = dict(os.environ, PYTHONPATH=PYTHON_CLIENT_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark of the cosysairsim package")
+    parser.add_argument('--repeat', type=int, default=10, help="fresh interpreters per scenario")
+    parser.add_argument('--max-ms', type=float, default=None, help="fail when the median 'package' or 'types' "
+                                                                    "import takes longer, in milliseconds")
+    args = parser.parse_args()
+
+    failures = run_python(_CHECK_SURFACE)
+    baseline = run_python(_MEASURE.format(statement="pass"))
+    print("{:<12} {:>10} {:>10} {:>12}".format('scenario', 'median ms', 'min ms', 'extra RSS MB'))
+    for scenario, (statement, forbidden) in SCENARIOS.items():
+        runs = [run_python(_MEASURE.format(statement=statement)) for _ in range(args.repeat)]
+        times = [run['time'] * 1000 for run in runs]
+        median = statistics.median(times)
+        extra_rss = (statistics.median(run['rss_kb'] for run in runs) - baseline['rss_kb']) / 1024
+        print("{:<12} {:>10.1f} {:>10.1f} {:>12.1f}".format(scenario, median, min(times), extra_rss))
+        loaded = [module for module in forbidden if module in runs[0]['modules']]
+        if loaded:
+            failures.append("'{}' loads {}".format(statement, ', '.join(loaded)))
+        if args.max_ms is not None and scenario in ('package', 'types') and median > args.max_ms:
+            failures.append("'{}' takes {:.1f} ms, more than {} ms".format(statement, median, args.max_ms))
+
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,102 @@
-from .client import *
-from .utils import *
-from .types import *
+import importlib
+from types import ModuleType
 
 __version__ = "3.2.0"
+
+# public names of the package -> submodule defining them, imported on first access so that e.g. using only the
+# types does not load the RPC stack. Keep in sync with the submodules, see benchmarks/import_time.py
+_LAZY_MODULES = {
+    'types': (
+        'AngleLevelControllerGains', 'AngleRateControllerGains', 'AnnotationType', 'BarometerData', 'Box2D', 'Box3D',
+        'CameraInfo', 'CarControls', 'CarState', 'CollisionInfo', 'ComputerVisionState', 'DetectionInfo',
+        'DistanceSensorData', 'DrivetrainType', 'EchoData', 'EnvironmentState', 'GPULidarData', 'GeoPoint',
+        'GnssFixType', 'GnssReport', 'GpsData', 'ImageRequest', 'ImageResponse', 'ImageType', 'ImuData',
+        'KinematicsState', 'LandedState', 'LidarData', 'MagnetometerData', 'MeshPositionVertexBuffersResponse',
+        'MsgpackMixin', 'MultirotorState', 'PIDGains', 'Pose', 'PositionControllerGains', 'ProjectionMatrix',
+        'Quaternionr', 'RCData', 'RotorStates', 'Twist', 'UwbData', 'UwbSensorData', 'Vector2r', 'Vector3r',
+        'VelocityControllerGains', 'WeatherParameter', 'WifiData', 'WifiSensorData', 'YawMode'),
+    'utils': (
+        'POSE_LIST_DTYPE', 'apply_rotation_offset', 'compose_poses', 'euler_angles_to_quaternions',
+        'euler_to_quaternion', 'euler_to_rotation_matrix', 'gammaCorrectionTable', 'generate_colormap',
+        'get_camera_type', 'get_colormap_channel_values', 'get_colormap_colors', 'get_colormap_id_lookup',
+        'get_image_bytes', 'get_pfm_array', 'get_public_fields', 'inverse_poses', 'is_pixels_as_float',
+        'list_to_2d_float_array', 'load_colormap', 'load_read_csv', 'pose_list_to_array', 'poses_to_arrays',
+        'quaternion_to_euler_angles', 'quaternions_inverse', 'quaternions_multiply', 'quaternions_to_array',
+        'quaternions_to_euler_angles', 'quaternions_to_rotation_matrices', 'read_pfm', 'rotate_vectors',
+        'segmentation_image_to_ids', 'string_to_float_array', 'string_to_uint8_array', 'to_dict', 'to_str',
+        'transform_points', 'vectors_to_array', 'wait_key', 'write_file', 'write_pfm', 'write_png',
+        'write_pose_list_csv'),
+    'transport': ('RpcFuture', 'TYPED_FLOAT_FIELDS', 'ThreadedConnection', 'TransportBuilder', 'connection_transport'),
+    'deferred': ('DeferredCall',),
+    'batch': ('Batch', 'BatchResult', 'SENSOR_GETTERS', 'SensorSnapshot'),
+    'streaming': ('SensorSubscription',),
+    'instrumentation': ('InstrumentedConnection', 'RpcStats', 'STATS_FIELDS'),
+    'cache': ('CACHE_INVALIDATIONS', 'CachingConnection', 'DEFAULT_CACHE_POLICIES'),
+    'client': ('CarClient', 'ComputerVisionClient', 'MultirotorClient', 'VehicleClient'),
+    'async_client': ('AsyncCarClient', 'AsyncComputerVisionClient', 'AsyncMultirotorClient', 'AsyncVehicleClient'),
+    'pool': ('ClientPool',),
+    'broker': ('Frame', 'FrameBroker', 'FrameReader', 'list_frame_streams'),
+    'fleet': ('FleetClient', 'FleetResults'),
+    'futures': ('TaskFuture', 'add_done_callback', 'is_done', 'wait_all', 'wait_any'),
+    'decode': ('ImageDecoder', 'decode_images', 'decode_surface_normals'),
+    'resilience': ('DeadlineExceeded', 'ResilientConnection', 'SimulatorUnavailable', 'TASK_METHODS'),
+    'stepping': ('LockstepCapture', 'wait_for_pause'),
+    'projection': ('DepthProjector', 'box3d_corners', 'camera_intrinsics', 'camera_transforms', 'cameras_intrinsics',
+                   'depth_to_points', 'project_boxes', 'project_points'),
+    'distortion': ('DistortionRemapper', 'distortion_coefficients'),
+    'annotation': ('AnnotationDecoder', 'AnnotationLabels'),
+}
+
+# submodules star-imported by earlier versions, in order, for names not listed above
+_STAR_MODULES = ('client', 'utils', 'types', 'batch', 'streaming', 'instrumentation', 'cache', 'async_client', 'pool')
+# submodules that were attributes of the package, and so exported by `from cosysairsim import *`, in earlier versions
+_STAR_SUBMODULES = ('client', 'utils', 'types')
+
+_SUBMODULES = set(_LAZY_MODULES) | {'pfm', 'standin'}
+
+_LAZY_ATTRIBUTES = {name: module for module, names in _LAZY_MODULES.items() for name in names}
+
+
+def _load_all():
+    namespace = globals()
+    for module_name in _STAR_MODULES:
+        module = importlib.import_module('.' + module_name, __name__)
+        for name, value in vars(module).items():
+            if not name.startswith('_'):
+                namespace.setdefault(name, value)
+
+
+def _star_names():
+    # everything the earlier star imports exported, including the modules they imported like np and msgpackrpc,
+    # along with the names listed above
+    names = set(_LAZY_ATTRIBUTES) | set(_STAR_SUBMODULES)
+    for module_name in _STAR_MODULES:
+        module = importlib.import_module('.' + module_name, __name__)
+        names.update(name for name, value in vars(module).items() if not name.startswith('_')
+                     and (module_name in _STAR_SUBMODULES or not isinstance(value, ModuleType)))
+    return sorted(names)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module('.' + module_name, __name__), name)
+    elif name == '__all__':
+        # computed on `from cosysairsim import *` only, as it loads the star-imported submodules
+        value = _star_names()
+    elif name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+    elif name.startswith('__'):
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    else:
+        # a module imported by a submodule, e.g. np, as exposed by the earlier eager star imports
+        _load_all()
+        if name not in globals():
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        value = globals()[name]
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,245 @@
+import json
+import threading
+import numpy as np
+from .cache import CachingConnection
+from .decode import _response_channels
+from .types import AnnotationType
+from .utils import load_colormap
+
+
+class AnnotationLabels:
+    """
+    Objects found in an annotation image by `AnnotationDecoder.decode`.
+
+    Attributes:
+        labels (np.ndarray): (height, width) int32 index of the object of every pixel in `AnnotationDecoder.names`,
+            -1 for the background and colors of no object
+        indices (np.ndarray): (objects,) int32 index of every object in the image, in increasing order
+        names (list[str]): Name of every object in the image
+        areas (np.ndarray): (objects,) int64 pixel count of every object
+        boxes (np.ndarray): (objects, 4) int32 bounding box (x_min, y_min, x_max, y_max) of every object, in
+            pixels and inclusive like the `box2D` of `simGetDetections`
+        centroids (np.ndarray): (objects, 2) float64 mean pixel (x, y) of every object
+    """
+    def __init__(self, labels, indices, names, areas, boxes, centroids):
+        self.labels = labels
+        self.indices = indices
+        self.names = names
+        self.areas = areas
+        self.boxes = boxes
+        self.centroids = centroids
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, name):
+        """
+        Args:
+            name (str): Name of an object in the image
+
+        Returns:
+            np.ndarray: (height, width) bool mask of the pixels of the object
+        """
+        return self.labels == self.indices[self.names.index(name)]
+
+
+class AnnotationDecoder:
+    """
+    Maps the pixels of an annotation layer back to its objects and measures them in a single pass over the image.
+
+    The color or greyscale value of every object of the layer is fetched once, in a single batch of
+    `simGetAnnotationObjectColor` (RGB layers in direct mode), `simGetAnnotationObjectID` (RGB layers in index mode,
+    looked up in the colormap) or `simGetAnnotationObjectValue` (greyscale layers) calls, and turned into a lookup
+    table from pixel colors to objects. A frame then costs one table lookup and a few bin counts over its pixels:
+
+        decoder = AnnotationDecoder(client, "RGBTestIndex")
+        response = client.simGetImages([airsim.ImageRequest("front", airsim.ImageType.Annotation, False, False,
+                                                            annotation_name="RGBTestIndex")])[0]
+        objects = decoder.decode(response)
+        for name, box, area in zip(objects.names, objects.boxes, objects.areas):
+            ...
+
+    With the query cache of the client enabled (`enable_cache`), the table is rebuilt after
+    `simSetAnnotationObjectColor`, `simSetAnnotationObjectID` or `simSetAnnotationObjectValue` calls made through
+    the client, or after `invalidate_cache()`. Without it, or for changes made by other clients, call `refresh()`.
+    Black is the color of the background, objects of that color and objects sharing the color of an earlier listed
+    one, e.g. with the same greyscale value, cannot be told apart and are not found.
+
+    Args:
+        client (VehicleClient): Client to fetch the objects of the layer with
+        annotation_name (str): Name of the annotation layer
+        layer_type (int, optional): `AnnotationType.RGB` or `AnnotationType.Greyscale`, read from the settings
+            when None
+        direct (bool, optional): Whether an RGB layer is in direct mode, read from the settings when None
+        max_table_size (int, optional): Entries of the dense color table, colors of objects whose channels take
+            more distinct values are looked up by binary search instead
+    """
+    def __init__(self, client, annotation_name, layer_type=None, direct=None, max_table_size=1 << 22):
+        self.client = client
+        self.annotation_name = annotation_name
+        self.layer_type = layer_type
+        self.direct = direct
+        self.max_table_size = max_table_size
+        self.names = []
+        self._lock = threading.Lock()
+        self._table = None
+        self._generation = None
+        self._coordinates = None
+
+    def _read_settings(self):
+        settings = json.loads(self.client.getSettingsString() or '{}')
+        for layer in settings.get('Annotation', []):
+            if layer.get('Name') == self.annotation_name:
+                return layer.get('Type', AnnotationType.RGB), layer.get('SetDirect', False)
+        raise ValueError("Annotation layer '{}' is not defined in the settings".format(self.annotation_name))
+
+    def refresh(self):
+        """
+        Fetch the objects of the layer and their colors again
+        """
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        cache = self.client._connection_layer(CachingConnection)
+        generation = None if cache is None else cache.generation
+        layer_type, direct = self.layer_type, self.direct
+        if layer_type is None or (layer_type == AnnotationType.RGB and direct is None):
+            settings_type, settings_direct = self._read_settings()
+            layer_type = settings_type if layer_type is None else layer_type
+            direct = settings_direct if direct is None else direct
+        if layer_type == AnnotationType.Texture:
+            raise ValueError("Texture annotation layers have no color per object to decode")
+        names = self.client.simListAnnotationObjects(self.annotation_name)
+        with self.client.batch() as batch:
+            if layer_type == AnnotationType.Greyscale:
+                results = [batch.simGetAnnotationObjectValue(self.annotation_name, name) for name in names]
+            elif direct:
+                results = [batch.simGetAnnotationObjectColor(self.annotation_name, name) for name in names]
+            else:
+                results = [batch.simGetAnnotationObjectID(self.annotation_name, name) for name in names]
+        values = [result.result() for result in results]
+        if layer_type == AnnotationType.Greyscale:
+            # rendered with 8 bit precision in all three channels
+            grey = np.rint(np.asarray(values, dtype=np.float64).reshape(-1) * 255)
+            valid = (grey > 0) & (grey <= 255)
+            colors = np.repeat(grey.astype(np.int32)[:, np.newaxis], 3, axis=1)
+        elif direct:
+            # "R,G,B" of the rendered color, empty for objects without one
+            parsed = [value.split(',') if value else [] for value in values]
+            valid = np.array([len(color) == 3 for color in parsed], dtype=bool)
+            colors = np.array([[int(float(channel)) for channel in color] if len(color) == 3 else [0, 0, 0]
+                               for color in parsed], dtype=np.int32).reshape(-1, 3)
+        else:
+            colormap = load_colormap()
+            ids = np.asarray(values, dtype=np.int64).reshape(-1)
+            valid = (ids >= 0) & (ids < len(colormap))
+            colors = colormap[np.where(valid, ids, 0)].astype(np.int32)
+        packed = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+        valid &= packed > 0
+        # sorted colors and the first listed object of each
+        keys, first = np.unique(packed[valid], return_index=True)
+        first = np.flatnonzero(valid)[first]
+        objects = first.astype(np.int32)
+        # the values every channel takes are few, so the colors fit a dense table indexed by their ranks, with
+        # rank 0 for the values of no object
+        ranks = []
+        for channel in range(3):
+            channel_values = np.unique(colors[first, channel])
+            rank = np.zeros(256, dtype=np.int32)
+            rank[channel_values] = np.arange(1, len(channel_values) + 1, dtype=np.int32)
+            ranks.append((rank, len(channel_values) + 1))
+        size = ranks[0][1] * ranks[1][1] * ranks[2][1]
+        # per channel offsets into the table, summed into the index of a color
+        offsets = [ranks[0][0] * (ranks[1][1] * ranks[2][1]), ranks[1][0] * ranks[2][1], ranks[2][0]]
+        dense = None
+        if size <= self.max_table_size:
+            dense = np.full(size, -1, dtype=np.int32)
+            dense[sum(offset[colors[first, channel]] for channel, offset in enumerate(offsets))] = objects
+        self.names = list(names)
+        self._table = (keys, objects, self.names, offsets, dense)
+        self._generation = generation
+
+    def _lookup_table(self):
+        cache = self.client._connection_layer(CachingConnection)
+        with self._lock:
+            if self._table is None or (cache is not None and cache.generation != self._generation):
+                self._refresh()
+            return self._table
+
+    def _labels(self, image):
+        keys, objects, names, offsets, dense = self._lookup_table()
+        if not isinstance(image, np.ndarray):
+            image = _response_channels(image, 3, 'Annotation')
+        if dense is not None:
+            index = np.take(offsets[0], image[..., 0])
+            index += np.take(offsets[1], image[..., 1])
+            index += np.take(offsets[2], image[..., 2])
+            return np.take(dense, index), names
+        packed = image[..., 0].astype(np.int32)
+        packed <<= 8
+        packed |= image[..., 1]
+        packed <<= 8
+        packed |= image[..., 2]
+        positions = np.searchsorted(keys, packed)
+        np.minimum(positions, len(keys) - 1, out=positions)
+        labels = objects[positions]
+        labels[keys[positions] != packed] = -1
+        return labels, names
+
+    def labels(self, image):
+        """
+        Args:
+            image (ImageResponse | np.ndarray): Uncompressed or png compressed annotation response of
+                `simGetImages`, or its (height, width, 3) RGB image
+
+        Returns:
+            np.ndarray: (height, width) int32 index of the object of every pixel in `names`, -1 for the background
+            and colors of no object
+        """
+        return self._labels(image)[0]
+
+    def _pixel_coordinates(self, height, width):
+        coordinates = self._coordinates
+        if coordinates is None or coordinates[0].shape != (height * width,):
+            rows, columns = np.indices((height, width), dtype=np.int32)
+            coordinates = self._coordinates = (rows.reshape(-1), columns.reshape(-1))
+        return coordinates
+
+    def decode(self, image):
+        """
+        Find the objects of an annotation image with their pixel counts, bounding boxes and centroids
+
+        Args:
+            image (ImageResponse | np.ndarray): Annotation response or image, see `labels`
+
+        Returns:
+            AnnotationLabels: Label image and measures of the objects in the image
+        """
+        labels, names = self._labels(image)
+        height, width = labels.shape
+        rows, columns = self._pixel_coordinates(height, width)
+        shifted = labels.reshape(-1) + 1
+        indices = np.flatnonzero(np.bincount(shifted, minlength=len(names) + 1)[1:]).astype(np.int32)
+        count = len(indices)
+        # objects renumbered in the order of the image and the background last, so the bins only cover the
+        # objects it shows
+        ranks = np.full(len(names) + 1, count, dtype=np.int32)
+        ranks[indices + 1] = np.arange(count, dtype=np.int32)
+        objects = np.take(ranks, shifted)
+        # pixel counts of every object per row and column, which give its area, centroid and box
+        row_counts = np.bincount(objects * height + rows, minlength=(count + 1) * height)[:count * height]
+        row_counts = row_counts.reshape(count, height)
+        column_counts = np.bincount(objects * width + columns, minlength=(count + 1) * width)[:count * width]
+        column_counts = column_counts.reshape(count, width)
+        areas = row_counts.sum(axis=1)
+        centroids = np.empty((count, 2))
+        centroids[:, 0] = column_counts @ np.arange(width) / areas
+        centroids[:, 1] = row_counts @ np.arange(height) / areas
+        covered_rows, covered_columns = row_counts > 0, column_counts > 0
+        boxes = np.empty((count, 4), dtype=np.int32)
+        boxes[:, 0] = covered_columns.argmax(axis=1)
+        boxes[:, 1] = covered_rows.argmax(axis=1)
+        boxes[:, 2] = width - 1 - covered_columns[:, ::-1].argmax(axis=1)
+        boxes[:, 3] = height - 1 - covered_rows[:, ::-1].argmax(axis=1)
+        return AnnotationLabels(labels, indices, [names[index] for index in indices], areas, boxes, centroids)
@@ -0,0 +1,101 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+from .client import VehicleClient, MultirotorClient, CarClient, ComputerVisionClient
+from .deferred import DeferredCall
+
+
+# blocking helpers that have no coroutine counterpart, use asyncio.gather instead of batches and the
+# subscriptions, lock-stepped captures, RPC statistics, cache and resilience of the `sync` client
+_SYNC_ONLY = ('batch', 'task', 'lockstep', 'subscribe', 'enable_rpc_stats', 'disable_rpc_stats', 'get_rpc_stats',
+              'enable_cache', 'disable_cache', 'invalidate_cache', 'enable_resilience', 'disable_resilience')
+
+
+def _async_api(client_class):
+    """
+    Class decorator adding an `async def` counterpart of every public method of `client_class`
+    """
+    def decorate(cls):
+        cls._client_class = client_class
+        for name, method in inspect.getmembers(client_class, callable):
+            if name.startswith('_') or name in _SYNC_ONLY or name in cls.__dict__:
+                continue
+            setattr(cls, name, _make_async_method(name, method))
+        return cls
+    return decorate
+
+
+def _make_async_method(name, method):
+    @functools.wraps(method)
+    async def async_method(self, *args, **kwargs):
+        return await self._call(name, args, kwargs)
+    return async_method
+
+
+@_async_api(VehicleClient)
+class AsyncVehicleClient:
+    """
+    asyncio front end of `VehicleClient`.
+
+    Offers every `VehicleClient` method as a coroutine with the same arguments and return values. All calls share
+    a single connection driven by a background I/O thread and are sent without waiting for earlier ones, so calls
+    awaited together, e.g. with `asyncio.gather`, are in flight at the same time and take about as long as the
+    slowest of them instead of their sum.
+
+    The *Async task APIs of the vehicle clients complete when the task has finished, wrap them in
+    `asyncio.create_task` to keep working while the vehicle is moving.
+
+    Args:
+        ip (str, optional): IP address of the simulator, localhost when empty
+        port (int, optional): RPC port of the simulator
+        timeout_value (int, optional): Timeout of a single RPC call in seconds
+        typed_arrays (bool, optional): Decode large float arrays to `np.float32` arrays, see `VehicleClient`
+    """
+    def __init__(self, ip="", port=41451, timeout_value=3600, typed_arrays=False):
+        # blocking client sharing the connection, its method bodies are also used by the coroutines
+        self.sync = self._client_class(ip, port, timeout_value, typed_arrays, thread_safe=True)
+        self.connection = self.sync.client
+
+    async def _call(self, name, args, kwargs):
+        call = DeferredCall(self.sync, name, args, kwargs)
+        done, value = call.step()
+        while not done:
+            call.resolve(await asyncio.wrap_future(value))
+            done, value = call.step()
+        if isinstance(value, concurrent.futures.Future):
+            value = await asyncio.wrap_future(value)
+        return value
+
+    def close(self):
+        """
+        Close the connection to the simulator
+        """
+        self.connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@_async_api(MultirotorClient)
+class AsyncMultirotorClient(AsyncVehicleClient):
+    """
+    asyncio front end of `MultirotorClient`, see `AsyncVehicleClient`
+    """
+
+
+@_async_api(CarClient)
+class AsyncCarClient(AsyncVehicleClient):
+    """
+    asyncio front end of `CarClient`, see `AsyncVehicleClient`
+    """
+
+
+@_async_api(ComputerVisionClient)
+class AsyncComputerVisionClient(AsyncVehicleClient):
+    """
+    asyncio front end of `ComputerVisionClient`, see `AsyncVehicleClient`
+    """
@@ -0,0 +1,150 @@
+from .deferred import DeferredCall
+
+# sensor kind -> client getter, all taking (sensor_name, vehicle_name)
+SENSOR_GETTERS = {
+    'imu': 'getImuData',
+    'barometer': 'getBarometerData',
+    'magnetometer': 'getMagnetometerData',
+    'gps': 'getGpsData',
+    'distance': 'getDistanceSensorData',
+    'lidar': 'getLidarData',
+    'gpulidar': 'getGPULidarData',
+    'echo': 'getEchoData',
+    'uwb': 'getUWBSensorData',
+    'wifi': 'getWifiSensorData',
+}
+
+
+class BatchResult:
+    """
+    Result of a call queued on a `Batch`, available once the batch has been executed
+    """
+    def __init__(self):
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def done(self):
+        """
+        Returns:
+            bool: True once the call has completed
+        """
+        return self._done
+
+    def result(self):
+        """
+        Returns:
+            Return value of the queued call, the error of the call is raised if it failed
+        """
+        if not self._done:
+            raise RuntimeError("Batch has not been executed yet")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def _set(self, value=None, error=None):
+        self._value = value
+        self._error = error
+        self._done = True
+
+
+class Batch:
+    """
+    Collects client calls and dispatches them pipelined on the client's connection.
+
+    Any client method can be called on the batch with its usual arguments. The call is sent right away without
+    waiting for the calls queued before it, and a `BatchResult` is returned. Executing the batch, explicitly or
+    when leaving its `with` block, waits for all calls and makes their typed results available in call order:
+
+        with client.batch() as batch:
+            pose = batch.simGetVehiclePose("Drone1")
+            imu = batch.getImuData("Imu", "Drone1")
+        print(pose.result(), imu.result())
+
+    Args:
+        client (VehicleClient): Client whose calls are batched
+    """
+    def __init__(self, client):
+        self._client = client
+        self._queued = []
+        self.results = None
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(self._client, name)):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            call = DeferredCall(self._client, name, args, kwargs)
+            result = BatchResult()
+            self._queued.append((call, result, call.step()))
+            return result
+        return queue
+
+    def execute(self):
+        """
+        Wait for all queued calls to complete
+
+        Returns:
+            list: Return values of the queued calls, in call order. The first error is raised if any call failed.
+        """
+        queued, self._queued = self._queued, []
+        for call, result, (done, value) in queued:
+            try:
+                while not done:
+                    call.resolve(value.get())
+                    done, value = call.step()
+                result._set(value)
+            except Exception as error:
+                result._set(error=error)
+        self.results = [result for _, result, _ in queued]
+        return [result.result() for result in self.results]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+
+class SensorSnapshot:
+    """
+    Reusable declaration of the data fetched together for one vehicle, in as few round trips as possible.
+
+    Args:
+        vehicle_name (str, optional): Name of the vehicle
+        pose (bool, optional): Fetch the vehicle pose, `simGetVehiclePose`
+        kinematics (bool, optional): Fetch the ground truth kinematics, `simGetGroundTruthKinematics`
+        sensors (dict, optional): Sensor name -> sensor kind, one of the keys of `SENSOR_GETTERS`,
+            e.g. {"Imu": "imu", "LidarSensor1": "gpulidar"}
+        image_requests (list[ImageRequest], optional): Images to fetch with `simGetImages`
+        as_numpy (bool, optional): Fetch the images as NumPy arrays, see `simGetImages`
+    """
+    def __init__(self, vehicle_name='', pose=True, kinematics=False, sensors=None, image_requests=None,
+                 as_numpy=False):
+        self.vehicle_name = vehicle_name
+        self.calls = []
+        if pose:
+            self.calls.append(('pose', 'simGetVehiclePose', (vehicle_name,)))
+        if kinematics:
+            self.calls.append(('kinematics', 'simGetGroundTruthKinematics', (vehicle_name,)))
+        for sensor_name, sensor_kind in (sensors or {}).items():
+            if sensor_kind not in SENSOR_GETTERS:
+                raise ValueError("Unknown sensor kind '{}' for sensor '{}'".format(sensor_kind, sensor_name))
+            self.calls.append((sensor_name, SENSOR_GETTERS[sensor_kind], (sensor_name, vehicle_name)))
+        if image_requests:
+            self.calls.append(('images', 'simGetImages', (image_requests, vehicle_name, as_numpy)))
+
+    def fetch(self, client):
+        """
+        Fetch all declared data in a single batch
+
+        Args:
+            client (VehicleClient): Client to fetch the data with
+
+        Returns:
+            dict: 'pose', 'kinematics', 'images' and the sensor names mapped to their data
+        """
+        with client.batch() as batch:
+            results = [getattr(batch, method)(*args) for _, method, args in self.calls]
+        return {key: result.result() for (key, _, _), result in zip(self.calls, results)}
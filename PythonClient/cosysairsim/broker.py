@@ -0,0 +1,559 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from multiprocessing import shared_memory
+import msgpack
+import numpy as np
+from .types import *
+from . import types as airsim_types
+from .batch import SENSOR_GETTERS
+
+_MAGIC = 0x43535346524d4231     # "CSSFRMB1"
+_HEADER_SIZE = 128              # 16 uint64 per segment and per slot header
+_MANIFEST_SIZE = 65536
+_MANIFEST_HEADER_SIZE = 32      # 4 uint64 before the JSON of the manifest
+_STATE_OPEN = 1
+_STATE_CLOSED = 2
+# segment header fields
+_H_MAGIC, _H_STATE, _H_SLOTS, _H_CAPACITY, _H_LATEST = range(5)
+# manifest header fields
+_M_GENERATION, _M_LENGTH, _M_PID = range(3)
+# slot header fields
+_S_SEQ, _S_TIME_STAMP, _S_DATA_NBYTES, _S_META_NBYTES, _S_DTYPE, _S_NDIM, _S_SHAPE = range(7)
+_DTYPES = (np.dtype(np.uint8), np.dtype(np.float32))
+_STREAM_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')
+# segments created by a broker in this process, tracked by its resource tracker
+_created = set()
+
+
+def _pack_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value.to_msgpack()
+
+
+def _attach(name):
+    """
+    Attach to an existing shared memory segment without handing it to this process' resource tracker, which would
+    otherwise destroy the segment of the broker when this process exits
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Python < 3.13
+        segment = shared_memory.SharedMemory(name)
+        if os.name == 'posix' and name not in _created:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def _process_alive(pid):
+    if pid == 0:
+        return False
+    if pid == os.getpid() or os.name != 'posix':
+        # on Windows the segments of a process are destroyed with it, so an existing one has a live owner
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _broker_alive(manifest):
+    if manifest.size < _MANIFEST_HEADER_SIZE:
+        return False
+    header = np.ndarray(3, np.uint64, manifest.buf)
+    pid = int(header[_M_PID])
+    del header
+    return _process_alive(pid)
+
+
+def _create(name, size, manifest=False):
+    _created.add(name)
+    try:
+        return shared_memory.SharedMemory(name, create=True, size=size)
+    except FileExistsError:
+        stale = _attach(name)
+        if manifest and _broker_alive(stale):
+            stale.close()
+            raise FileExistsError("A frame broker is already running under the prefix '{}'".format(name))
+        # left behind by a broker that did not shut down cleanly, mark it closed for its readers
+        if stale.size >= _HEADER_SIZE:
+            np.ndarray(16, np.uint64, stale.buf)[_H_STATE] = _STATE_CLOSED
+        stale.close()
+        stale.unlink()
+        return shared_memory.SharedMemory(name, create=True, size=size)
+
+
+def _read_manifest(prefix, timeout=1.0):
+    segment = _attach(prefix)
+    if segment.size < _MANIFEST_HEADER_SIZE:
+        segment.close()
+        raise ValueError("Shared memory '{}' is not the manifest of a frame broker".format(prefix))
+    try:
+        header = np.ndarray(2, np.uint64, segment.buf)
+        deadline = time.monotonic() + timeout
+        while True:
+            # an odd generation is a write in progress, a length beyond the segment a torn or foreign header
+            generation = int(header[_M_GENERATION])
+            length = int(header[_M_LENGTH])
+            if generation % 2 == 0 and length <= segment.size - _MANIFEST_HEADER_SIZE:
+                manifest = bytes(segment.buf[_MANIFEST_HEADER_SIZE:_MANIFEST_HEADER_SIZE + length])
+                if int(header[_M_GENERATION]) == generation:
+                    return json.loads(manifest.decode('utf-8')) if length else {}
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Manifest of the frame broker '{}' stayed inconsistent for {} s, its broker "
+                                   "may have died while updating it".format(prefix, timeout))
+            time.sleep(0.0001)
+    finally:
+        del header
+        segment.close()
+
+
+def list_frame_streams(prefix='cosysairsim'):
+    """
+    Streams published by the frame broker running under `prefix`, see `FrameBroker`
+
+    Args:
+        prefix (str, optional): Name prefix of the broker's shared memory
+
+    Returns:
+        dict: Stream name -> dict of its 'kind' ('image' or a sensor kind), 'type' of its records and 'slots'.
+        Empty when no broker is running. `TimeoutError` is raised when the manifest of the broker stays
+        inconsistent, e.g. after its process died while updating it.
+    """
+    try:
+        return _read_manifest(prefix)
+    except FileNotFoundError:
+        return {}
+
+
+class _StreamWriter:
+    """
+    Ring buffer of frames in a shared memory segment, written by the broker
+    """
+    def __init__(self, name, slots, capacity, latest=0):
+        self.slots = slots
+        self.capacity = capacity
+        self.slot_size = _HEADER_SIZE + capacity
+        self.segment = _create(name, _HEADER_SIZE + slots * self.slot_size)
+        self.header = np.ndarray(16, np.uint64, self.segment.buf)
+        self.header[_H_MAGIC] = _MAGIC
+        self.header[_H_SLOTS] = slots
+        self.header[_H_CAPACITY] = capacity
+        # sequence numbers continue over re-allocations so readers do not see them restart
+        self.header[_H_LATEST] = latest
+        self.header[_H_STATE] = _STATE_OPEN
+
+    def write(self, data, meta, time_stamp):
+        seq = int(self.header[_H_LATEST]) + 1
+        offset = _HEADER_SIZE + (seq % self.slots) * self.slot_size
+        slot = np.ndarray(16, np.uint64, self.segment.buf, offset)
+        # invalidate the slot first, readers still holding a view of the frame it held can check it
+        slot[_S_SEQ] = 0
+        data_nbytes = 0
+        if data is not None:
+            data_nbytes = data.nbytes
+            target = np.ndarray(data.shape, data.dtype, self.segment.buf, offset + _HEADER_SIZE)
+            target[...] = data
+            del target
+            slot[_S_DTYPE] = _DTYPES.index(data.dtype)
+            slot[_S_NDIM] = data.ndim
+            slot[_S_SHAPE:_S_SHAPE + data.ndim] = data.shape
+        meta_offset = offset + _HEADER_SIZE + (data_nbytes + 7) // 8 * 8
+        self.segment.buf[meta_offset:meta_offset + len(meta)] = meta
+        slot[_S_TIME_STAMP] = time_stamp
+        slot[_S_DATA_NBYTES] = data_nbytes
+        slot[_S_META_NBYTES] = len(meta)
+        slot[_S_SEQ] = seq
+        self.header[_H_LATEST] = seq
+        return seq
+
+    def fits(self, data, meta):
+        data_nbytes = 0 if data is None else (data.nbytes + 7) // 8 * 8
+        return data_nbytes + len(meta) <= self.capacity
+
+    def close(self):
+        self.header[_H_STATE] = _STATE_CLOSED
+        latest = int(self.header[_H_LATEST])
+        del self.header
+        self.segment.close()
+        self.segment.unlink()
+        return latest
+
+
+class FrameBroker:
+    """
+    Fetches images and sensor data from the simulator once per tick and publishes them to any number of local
+    consumer processes through shared memory, instead of every consumer making its own RPC calls.
+
+    Every stream is a ring of `slots` frames in its own `multiprocessing.shared_memory` segment, numbered with
+    increasing sequence numbers. Consumers read them with `FrameReader`, which maps the array of a frame (the
+    pixels of an image, the point cloud of a lidar) as a NumPy view without copying it. Consumers can attach and
+    detach at any time, the broker does not track them. Sensor data is only published when its time stamp changed.
+
+        front = airsim.ImageRequest('front_center', airsim.ImageType.Scene, False, False)
+        broker = FrameBroker(client, images={'front_rgb': front}, sensors={'lidar': ('lidar', 'LidarSensor1')},
+                             vehicle_name='Drone1', rate_hz=10)
+        broker.run()
+
+    A segment is re-allocated, and its readers re-attach, when a frame does not fit it anymore. Images should be
+    requested uncompressed so the consumers get their pixels directly.
+
+    Args:
+        client (VehicleClient): Client the streams are fetched with, thread-safe when ticking with `start()`
+        images (dict, optional): Stream name -> `ImageRequest`, all fetched with one `simGetImages` call per tick
+        sensors (dict, optional): Stream name -> (sensor kind, sensor name), sensor kinds as in `SENSOR_GETTERS`
+        vehicle_name (str, optional): Name of the vehicle the cameras and sensors are attached to
+        rate_hz (float, optional): Ticks per second
+        slots (int, optional): Frames kept per stream, consumers falling further behind miss frames
+        prefix (str, optional): Name prefix of the shared memory segments, one broker per prefix. `FileExistsError`
+            is raised while another broker is running under it, the segments of one that died are replaced.
+        headroom (float, optional): Segment capacity relative to the first frame, for frames that vary in size
+    """
+    def __init__(self, client, images=None, sensors=None, vehicle_name='', rate_hz=10.0, slots=4,
+                 prefix='cosysairsim', headroom=1.5):
+        self._client = client
+        self._images = dict(images or {})
+        self._sensors = dict(sensors or {})
+        for name in list(self._images) + list(self._sensors):
+            if not _STREAM_NAME.match(name):
+                raise ValueError("Stream names may only contain letters, digits, '_', '.' and '-': '{}'".format(name))
+        for sensor_kind, _ in self._sensors.values():
+            if sensor_kind not in SENSOR_GETTERS:
+                raise ValueError("Unknown sensor kind '{}'".format(sensor_kind))
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self._vehicle_name = vehicle_name
+        self._period = 1.0 / rate_hz
+        self._slots = slots
+        self._prefix = prefix
+        self._headroom = headroom
+        self._writers = {}
+        self._time_stamps = {}
+        self._manifest = {}
+        self._manifest_segment = _create(prefix, _MANIFEST_SIZE, manifest=True)
+        header = np.ndarray(3, np.uint64, self._manifest_segment.buf)
+        header[_M_PID] = os.getpid()
+        del header
+        self._write_manifest()
+        self._stop = threading.Event()
+        self._thread = None
+        self.ticks = 0
+        self.published = {name: 0 for name in list(self._images) + list(self._sensors)}
+
+    def _write_manifest(self):
+        manifest = json.dumps(self._manifest).encode('utf-8')
+        if len(manifest) > _MANIFEST_SIZE - _MANIFEST_HEADER_SIZE:
+            raise ValueError("Too many streams")
+        header = np.ndarray(2, np.uint64, self._manifest_segment.buf)
+        header[_M_GENERATION] += 1
+        self._manifest_segment.buf[_MANIFEST_HEADER_SIZE:_MANIFEST_HEADER_SIZE + len(manifest)] = manifest
+        header[_M_LENGTH] = len(manifest)
+        header[_M_GENERATION] += 1
+        del header
+
+    def _publish(self, name, kind, data, record, time_stamp):
+        meta = msgpack.packb(record, default=_pack_default)
+        writer = self._writers.get(name)
+        if writer is None or not writer.fits(data, meta):
+            latest = 0 if writer is None else writer.close()
+            size = (0 if data is None else (data.nbytes + 7) // 8 * 8) + len(meta)
+            capacity = (int(size * max(self._headroom, 1.0)) + 4095) // 4096 * 4096
+            writer = self._writers[name] = _StreamWriter(self._segment_name(name), self._slots, capacity, latest)
+            self._manifest[name] = {'kind': kind, 'type': type(record).__name__, 'slots': self._slots}
+            self._write_manifest()
+        writer.write(data, meta, time_stamp)
+        self.published[name] += 1
+
+    def _segment_name(self, name):
+        return '{}_{}'.format(self._prefix, name)
+
+    def tick(self):
+        """
+        Fetch all streams once, pipelined on the client's connection, and publish them
+        """
+        with self._client.batch() as batch:
+            images = batch.simGetImages(list(self._images.values()), self._vehicle_name, as_numpy=True) \
+                if self._images else None
+            samples = {name: getattr(batch, SENSOR_GETTERS[sensor_kind])(sensor_name, self._vehicle_name)
+                       for name, (sensor_kind, sensor_name) in self._sensors.items()}
+        if images is not None:
+            for name, response in zip(self._images, images.result()):
+                data = response.image_data_float if response.pixels_as_float else response.image_data_uint8
+                response.image_data_uint8 = b''
+                response.image_data_float = []
+                self._publish(name, 'image', np.ascontiguousarray(data), response, response.time_stamp)
+        for name, sample in samples.items():
+            sample = sample.result()
+            if self._time_stamps.get(name) == sample.time_stamp:
+                continue
+            self._time_stamps[name] = sample.time_stamp
+            data = None
+            if hasattr(sample, 'point_cloud'):
+                data = np.asarray(sample.point_cloud, dtype=np.float32).ravel()
+                sample.point_cloud = []
+            self._publish(name, self._sensors[name][0], data, sample, sample.time_stamp)
+        self.ticks += 1
+
+    def run(self):
+        """
+        Tick at `rate_hz` until `stop()` is called
+        """
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.tick()
+            next_tick += self._period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # fetching is slower than the requested rate, do not try to catch up
+                next_tick -= delay
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self):
+        """
+        Tick in a background thread
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="cosysairsim-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop ticking, the published frames stay available until `close()`
+        """
+        self._stop.set()
+        if self._thread is not None and threading.current_thread() is not self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """
+        Stop ticking and remove the shared memory, attached readers wait for a new broker
+        """
+        self.stop()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        self._manifest_segment.close()
+        self._manifest_segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Frame:
+    """
+    Frame of a broker stream, see `FrameReader`
+
+    Attributes:
+        seq (int): Sequence number of the frame in its stream
+        time_stamp (int): Time stamp of the image or sensor data
+        data (np.ndarray): Pixels of an image, shaped (height, width, channels) or (height, width) for float
+            images, or the flat point cloud of a lidar or echo sensor. None for other sensors.
+        record: `ImageResponse` or sensor data of the frame, without its pixels or point cloud
+    """
+    __slots__ = ('seq', 'time_stamp', 'data', 'record', '_slot')
+
+    def __init__(self, seq, time_stamp, data, record, slot):
+        self.seq = seq
+        self.time_stamp = time_stamp
+        self.data = data
+        self.record = record
+        self._slot = slot
+
+    def is_valid(self):
+        """
+        Returns:
+            bool: Whether `data` still holds this frame. A view is overwritten once the broker has published
+            `slots` newer frames, or when the broker re-allocated or closed the stream.
+        """
+        return self._slot is None or int(self._slot[_S_SEQ]) == self.seq
+
+
+class FrameReader:
+    """
+    Consumer of one stream of a `FrameBroker`, possibly running in another process.
+
+    The reader attaches to the stream when its first frame is requested, waiting for the broker if it is not
+    publishing the stream yet, and re-attaches by itself when the broker re-allocates the stream or restarts.
+
+        with FrameReader('front_rgb') as reader:
+            for frame in reader:
+                process(frame.data)
+
+    Args:
+        stream (str): Name of the stream
+        prefix (str, optional): Name prefix of the broker's shared memory
+        poll_interval (float, optional): Time between checks for a new frame in seconds
+    """
+    def __init__(self, stream, prefix='cosysairsim', poll_interval=0.001):
+        self.stream = stream
+        self._prefix = prefix
+        self._poll_interval = poll_interval
+        self._segment = None
+        self._last_seq = 0
+        self._closed = False
+        self.missed = 0
+
+    def _attach(self):
+        try:
+            record_type = _read_manifest(self._prefix)[self.stream]['type']
+            segment = _attach('{}_{}'.format(self._prefix, self.stream))
+        except (FileNotFoundError, KeyError):
+            return False
+        header = np.ndarray(16, np.uint64, segment.buf)
+        if int(header[_H_MAGIC]) != _MAGIC or int(header[_H_STATE]) != _STATE_OPEN:
+            del header
+            segment.close()
+            return False
+        self._segment = segment
+        self._header = header
+        self._record_type = getattr(airsim_types, record_type)
+        self._slots = int(header[_H_SLOTS])
+        self._slot_size = _HEADER_SIZE + int(header[_H_CAPACITY])
+        if int(header[_H_LATEST]) < self._last_seq:
+            # the broker restarted
+            self._last_seq = 0
+        return True
+
+    def _detach(self):
+        if self._segment is not None:
+            del self._header
+            try:
+                self._segment.close()
+            except BufferError:
+                # frames still viewing the segment keep it mapped until they are released
+                pass
+            self._segment = None
+
+    def _frame(self, seq, copy):
+        offset = _HEADER_SIZE + (seq % self._slots) * self._slot_size
+        slot = np.ndarray(16, np.uint64, self._segment.buf, offset)
+        if int(slot[_S_SEQ]) != seq:
+            return None
+        data = None
+        data_nbytes = int(slot[_S_DATA_NBYTES])
+        if data_nbytes:
+            shape = tuple(int(size) for size in slot[_S_SHAPE:_S_SHAPE + int(slot[_S_NDIM])])
+            data = np.ndarray(shape, _DTYPES[int(slot[_S_DTYPE])], self._segment.buf, offset + _HEADER_SIZE)
+            data.flags.writeable = False
+            if copy:
+                data = data.copy()
+        meta_offset = offset + _HEADER_SIZE + (data_nbytes + 7) // 8 * 8
+        meta = bytes(self._segment.buf[meta_offset:meta_offset + int(slot[_S_META_NBYTES])])
+        time_stamp = int(slot[_S_TIME_STAMP])
+        if int(slot[_S_SEQ]) != seq:
+            # overwritten while reading
+            return None
+        record = self._record_type.from_msgpack(msgpack.unpackb(meta, raw=False))
+        return Frame(seq, time_stamp, data, record, None if copy else slot)
+
+    def get(self, timeout=None, latest=False, copy=False):
+        """
+        Wait for the next frame
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds, waits indefinitely when None
+            latest (bool, optional): Skip to the newest frame instead of returning the frames in order, the frames
+                skipped are counted in `missed` like the ones the broker overwrote before they were read
+            copy (bool, optional): Copy the data of the frame instead of viewing the shared memory
+
+        Returns:
+            Frame: Next frame. `queue.Empty` is raised when none arrived in time or the reader is closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._closed:
+            if self._segment is None:
+                self._attach()
+            elif int(self._header[_H_STATE]) != _STATE_OPEN:
+                self._detach()
+                continue
+            if self._segment is not None:
+                newest = int(self._header[_H_LATEST])
+                first = max(self._last_seq + 1, newest - self._slots + 1, 1)
+                if latest:
+                    first = max(first, newest)
+                for seq in range(first, newest + 1):
+                    frame = self._frame(seq, copy)
+                    if frame is not None:
+                        self.missed += seq - self._last_seq - 1 if self._last_seq else 0
+                        self._last_seq = seq
+                        return frame
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(self._poll_interval)
+        raise queue.Empty()
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except queue.Empty:
+                return
+
+    def close(self):
+        """
+        Detach from the broker, frames still referenced keep their views valid until they are released
+        """
+        self._closed = True
+        self._detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Fetch simulator streams once and share them with local processes")
+    parser.add_argument('--ip', default="", help="IP address of the simulator, localhost by default")
+    parser.add_argument('--port', type=int, default=41451)
+    parser.add_argument('--vehicle', default="", help="vehicle the cameras and sensors are attached to")
+    parser.add_argument('--image', action='append', default=[], metavar="NAME=CAMERA:IMAGE_TYPE[:float]",
+                        help="image stream, e.g. front=front_center:0")
+    parser.add_argument('--sensor', action='append', default=[], metavar="NAME=KIND:SENSOR",
+                        help="sensor stream, e.g. lidar=lidar:LidarSensor1")
+    parser.add_argument('--rate', type=float, default=10.0, help="ticks per second")
+    parser.add_argument('--slots', type=int, default=4, help="frames kept per stream")
+    parser.add_argument('--prefix', default='cosysairsim', help="name prefix of the shared memory")
+    args = parser.parse_args()
+
+    from .client import VehicleClient
+    images = {}
+    for stream in args.image:
+        name, _, spec = stream.partition('=')
+        camera_name, image_type, *pixels_as_float = spec.split(':')
+        images[name] = ImageRequest(camera_name, int(image_type), pixels_as_float == ['float'], False)
+    sensors = {}
+    for stream in args.sensor:
+        name, _, spec = stream.partition('=')
+        sensor_kind, _, sensor_name = spec.partition(':')
+        sensors[name] = (sensor_kind, sensor_name)
+    client = VehicleClient(args.ip, args.port)
+    with FrameBroker(client, images, sensors, args.vehicle, args.rate, args.slots, args.prefix) as broker:
+        logging.info("Publishing %s", ', '.join(list(images) + list(sensors)))
+        try:
+            broker.run()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,179 @@
+import collections
+import threading
+import time
+import msgpack
+from .transport import RpcFuture
+from .futures import add_done_callback
+
+# cached RPC method -> (time to live in seconds or None to keep until invalidated, maximum cached argument sets),
+# simGetCameraInfo is left out as its pose follows the vehicle
+DEFAULT_CACHE_POLICIES = {
+    'getServerVersion': (None, 1),
+    'getMinRequiredClientVersion': (None, 1),
+    'getSettingsString': (None, 1),
+    'listVehicles': (None, 1),
+    'simListAssets': (None, 1),
+    'simGetWorldExtents': (None, 1),
+    'simListSceneObjects': (None, 16),
+    'simGetDistortionParams': (None, 64),
+    'simGetPresetLensSettings': (None, 64),
+    'simGetLensSettings': (None, 64),
+    'simGetPresetFilmbackSettings': (None, 64),
+    'simGetFilmbackSettings': (None, 64),
+    'simGetFocalLength': (None, 64),
+    'simGetFocusDistance': (None, 64),
+    'simGetFocusAperture': (None, 64),
+    'simListAnnotationObjects': (None, 16),
+    'simGetAnnotationObjectID': (None, 4096),
+    'simGetAnnotationObjectColor': (None, 4096),
+    'simGetAnnotationObjectValue': (None, 4096),
+}
+
+_CAMERA_QUERIES = ('simGetCameraInfo', 'simGetDistortionParams', 'simGetLensSettings', 'simGetFilmbackSettings',
+                   'simGetFocalLength', 'simGetFocusDistance', 'simGetFocusAperture')
+_ANNOTATION_QUERIES = ('simGetAnnotationObjectID', 'simGetAnnotationObjectColor', 'simGetAnnotationObjectValue')
+
+# RPC method changing the simulator -> cached methods whose results it invalidates, None for all of them
+CACHE_INVALIDATIONS = {
+    'reset': None,
+    'simLoadLevel': None,
+    'simAddVehicle': ('listVehicles', 'simListSceneObjects', 'simGetWorldExtents'),
+    'simSpawnObject': ('simListSceneObjects', 'simGetWorldExtents', 'simListAnnotationObjects'),
+    'simDestroyObject': ('simListSceneObjects', 'simGetWorldExtents', 'simListAnnotationObjects'),
+    'simSetCameraPose': _CAMERA_QUERIES,
+    'simSetCameraFov': _CAMERA_QUERIES,
+    'simSetDistortionParam': _CAMERA_QUERIES,
+    'simSetPresetLensSettings': _CAMERA_QUERIES,
+    'simSetPresetFilmbackSettings': _CAMERA_QUERIES,
+    'simSetFilmbackSettings': _CAMERA_QUERIES,
+    'simSetFocalLength': _CAMERA_QUERIES,
+    'simEnableManualFocus': _CAMERA_QUERIES,
+    'simSetFocusDistance': _CAMERA_QUERIES,
+    'simSetFocusAperture': _CAMERA_QUERIES,
+    'simEnableFocusPlane': _CAMERA_QUERIES,
+    'simSetAnnotationObjectID': _ANNOTATION_QUERIES,
+    'simSetAnnotationObjectColor': _ANNOTATION_QUERIES,
+    'simSetAnnotationObjectValue': _ANNOTATION_QUERIES,
+    'simRunConsoleCommand': None,
+}
+
+
+class CachingConnection:
+    """
+    Connection proxy answering queries about static or rarely changing simulator state from a local cache.
+
+    The raw responses of the methods in `policies` are kept per argument set, for at most their time to live and
+    with the least recently used argument sets evicted beyond their size bound. Calls made through this connection
+    to the methods in `invalidations` drop the cached results they affect before they are sent, changes made by
+    other clients or in the simulator itself are not seen until the results expire or `invalidate()` is called,
+    unless the caches of those clients are among the `peers` of this one. See `VehicleClient.enable_cache`.
+
+    Args:
+        connection: Connection of a client, its `client` attribute
+        policies (dict, optional): Cached method -> (time to live in seconds or None, maximum cached argument
+            sets), `DEFAULT_CACHE_POLICIES` when None
+        invalidations (dict, optional): Method -> cached methods it invalidates or None for all,
+            `CACHE_INVALIDATIONS` when None
+    """
+    def __init__(self, connection, policies=None, invalidations=None):
+        self.connection = connection
+        self.policies = dict(DEFAULT_CACHE_POLICIES if policies is None else policies)
+        self.invalidations = dict(CACHE_INVALIDATIONS if invalidations is None else invalidations)
+        self._lock = threading.Lock()
+        self._entries = {method: collections.OrderedDict() for method in self.policies}
+        # bumped on every invalidation, so responses to calls sent before it are not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        # caches of other connections to the same simulator, invalidated along with this one by its calls
+        self.peers = ()
+
+    @property
+    def generation(self):
+        """
+        Number of invalidations so far, values derived from cached results are outdated once it changed
+        """
+        return self._generation
+
+    def _key(self, args):
+        return msgpack.packb(args, default=lambda x: x.to_msgpack())
+
+    def _lookup(self, method, key):
+        ttl, _ = self.policies[method]
+        with self._lock:
+            entries = self._entries[method]
+            entry = entries.get(key)
+            if entry is not None and (ttl is None or time.monotonic() - entry[0] < ttl):
+                entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1], self._generation
+            self.misses += 1
+            return False, None, self._generation
+
+    def _store(self, method, key, result, generation):
+        _, size = self.policies[method]
+        with self._lock:
+            if generation != self._generation:
+                return
+            entries = self._entries[method]
+            entries[key] = (time.monotonic(), result)
+            entries.move_to_end(key)
+            while len(entries) > size:
+                entries.popitem(last=False)
+
+    def invalidate(self, methods=None):
+        """
+        Drop cached results
+
+        Args:
+            methods (list[str], optional): Cached methods whose results are dropped, all when None
+        """
+        with self._lock:
+            self._generation += 1
+            for method in (self._entries if methods is None else methods):
+                if method in self._entries:
+                    self._entries[method].clear()
+
+    def _invalidate_for(self, method):
+        methods = self.invalidations[method]
+        self.invalidate(methods)
+        for peer in self.peers:
+            peer.invalidate(methods)
+
+    def call(self, method, *args):
+        if method in self.invalidations:
+            self._invalidate_for(method)
+        if method not in self.policies:
+            return self.connection.call(method, *args)
+        key = self._key(args)
+        found, result, generation = self._lookup(method, key)
+        if found:
+            return result
+        result = self.connection.call(method, *args)
+        self._store(method, key, result, generation)
+        return result
+
+    def call_async(self, method, *args):
+        if method in self.invalidations:
+            self._invalidate_for(method)
+        if method not in self.policies:
+            return self.connection.call_async(method, *args)
+        key = self._key(args)
+        found, result, generation = self._lookup(method, key)
+        if found:
+            future = RpcFuture()
+            future.set_result(result)
+            return future
+        future = self.connection.call_async(method, *args)
+
+        def done(future):
+            if hasattr(future, 'exception'):
+                if future.exception() is None:
+                    self._store(method, key, future.result(), generation)
+            elif future.error is None:
+                self._store(method, key, future.result, generation)
+        add_done_callback(future, done)
+        return future
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
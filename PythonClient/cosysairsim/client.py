@@ -1,16 +1,48 @@
 from .utils import *
 from .types import *
+from .transport import TransportBuilder, ThreadedConnection, TYPED_FLOAT_FIELDS, connection_transport
+from .batch import Batch
+from .streaming import SensorSubscription
+from .instrumentation import RpcStats, InstrumentedConnection
+from .cache import CachingConnection
+from .futures import TaskFuture
+from .stepping import LockstepCapture
+from .resilience import ResilientConnection
 import msgpackrpc  # install as admin: pip install rpc-msgpack
 import logging
 
+# connection proxies the clients can stack on their connection, see enable_rpc_stats, enable_cache and
+# enable_resilience
+_CONNECTION_LAYERS = (InstrumentedConnection, CachingConnection, ResilientConnection)
+
 
 class VehicleClient:
-    def __init__(self, ip="", port=41451, timeout_value=3600):
+    def __init__(self, ip="", port=41451, timeout_value=3600, typed_arrays=False, thread_safe=False):
+        """
+        Args:
+            ip (str, optional): IP address of the simulator, localhost when empty
+            port (int, optional): RPC port of the simulator
+            timeout_value (int, optional): Timeout of a single RPC call in seconds
+            typed_arrays (bool, optional): Decode the large float arrays of images, lidar, GPU lidar, echo and mesh
+                responses (`image_data_float`, `point_cloud`, `vertices`, ...) directly into `np.float32` arrays
+                instead of Python lists of floats
+            thread_safe (bool, optional): Drive the connection from a background I/O thread so the client can be
+                shared between threads, see `ThreadedConnection`. *Async methods then return an `RpcFuture`.
+        """
         if ip == "":
             ip = "127.0.0.1"
-        self.client = msgpackrpc.Client(
+        self._connection_args = (ip, port, timeout_value, typed_arrays, thread_safe)
+        self.client = self._connect()
+
+    def _connect(self):
+        ip, port, timeout_value, typed_arrays, thread_safe = self._connection_args
+        typed_fields = TYPED_FLOAT_FIELDS if typed_arrays else None
+        if thread_safe:
+            return ThreadedConnection(ip, port, timeout_value, typed_fields)
+        return msgpackrpc.Client(
             msgpackrpc.Address(ip, port),
             timeout=timeout_value,
+            builder=TransportBuilder(typed_fields),
             pack_encoding='utf-8',
             unpack_encoding='utf-8',
         )
@@ -313,18 +345,23 @@ class VehicleClient:
             return None
         return result
 
-    def simGetImages(self, requests, vehicle_name=''):
+    def simGetImages(self, requests, vehicle_name='', as_numpy=False):
         """
         Get multiple images
 
         Args:
             requests (list[ImageRequest]): Images required
             vehicle_name (str, optional): Name of vehicle associated with the camera
+            as_numpy (bool, optional): Return the pixel data as NumPy arrays, see `ImageResponse.from_msgpack_numpy`.
+                `image_data_uint8` is then a read-only view on the received bytes, shaped (height, width, channels)
+                for uncompressed images, and `image_data_float` a float32 array shaped (height, width)
 
         Returns:
             list[ImageResponse]: List of image responses
         """
         responses_raw = self.client.call('simGetImages', requests, vehicle_name)
+        if as_numpy:
+            return [ImageResponse.from_msgpack_numpy(response_raw) for response_raw in responses_raw]
         return [ImageResponse.from_msgpack(response_raw) for response_raw in responses_raw]
 
     def simGetPresetLensSettings(self, camera_name, vehicle_name=''):
@@ -782,17 +819,24 @@ class VehicleClient:
         """
         return self.client.call('simListInstanceSegmentationObjects')
 
-    def simListInstanceSegmentationPoses(self, ned=True, only_visible=False):
+    def simListInstanceSegmentationPoses(self, ned=True, only_visible=False, as_numpy=False):
         """
         Lists the poses of all instance segmentation objects in the environment.
 
         Args:
             ned (bool, optional): Whether the poses are in NED coordinates.
             only_visible (bool, optional): Whether to include only visible objects.
+            as_numpy (bool, optional): Return the names and poses as arrays instead of a list of `Pose`
 
         Returns:
-            list[Pose]: List of poses of instance segmentation objects.
+            list[Pose]: List of poses of instance segmentation objects, in the order of
+            `simListInstanceSegmentationObjects`. With `as_numpy`, a tuple of the array of object names and the
+            structured array of their poses with dtype `POSE_LIST_DTYPE`, which can be saved with
+            `write_pose_list_csv`.
         """
+        if as_numpy:
+            names = np.array(self.client.call('simListInstanceSegmentationObjects'), dtype=str)
+            return names, pose_list_to_array(self.client.call('simListInstanceSegmentationPoses', ned, only_visible))
         poses_raw = self.client.call('simListInstanceSegmentationPoses', ned, only_visible)
         return [Pose.from_msgpack(pose_raw) for pose_raw in poses_raw]
 
@@ -834,7 +878,7 @@ class VehicleClient:
         """
         return self.client.call('simListAnnotationObjects', annotation_name)
 
-    def simListAnnotationPoses(self, annotation_name, ned=True, only_visible=False):
+    def simListAnnotationPoses(self, annotation_name, ned=True, only_visible=False, as_numpy=False):
         """
         Lists the poses of all annotation objects with the specified name of the layer.
 
@@ -842,10 +886,17 @@ class VehicleClient:
             annotation_name (str): Name of the annotation layer.
             ned (bool, optional): Whether the poses are in NED coordinates.
             only_visible (bool, optional): Whether to include only visible objects.
+            as_numpy (bool, optional): Return the names and poses as arrays instead of a list of `Pose`
 
         Returns:
-            list[Pose]: List of poses of annotation objects with the specified name.
+            list[Pose]: List of poses of annotation objects with the specified name, in the order of
+            `simListAnnotationObjects`. With `as_numpy`, a tuple of the array of object names and the structured
+            array of their poses with dtype `POSE_LIST_DTYPE`, which can be saved with `write_pose_list_csv`.
         """
+        if as_numpy:
+            names = np.array(self.client.call('simListAnnotationObjects', annotation_name), dtype=str)
+            poses_raw = self.client.call('simListAnnotationPoses', annotation_name, ned, only_visible)
+            return names, pose_list_to_array(poses_raw)
         poses_raw = self.client.call('simListAnnotationPoses', annotation_name, ned, only_visible)
         return [Pose.from_msgpack(pose_raw) for pose_raw in poses_raw]
 
@@ -996,7 +1047,8 @@ class VehicleClient:
         Gets the segmentation color map.
 
         Returns:
-            dict: Dictionary mapping object IDs to colors.
+            np.ndarray: Read-only (N, 3) array of the RGB color of every object ID, see `segmentation_image_to_ids`
+            for the reverse mapping.
         """
         return load_colormap()
 
@@ -1013,7 +1065,7 @@ class VehicleClient:
         Returns:
             bool: True if the color is valid, otherwise False.
         """
-        return np.array([r, g, b]) in load_colormap()
+        return bool((load_colormap() == [r, g, b]).all(axis=1).any())
 
     def simAddDetectionFilterMeshName(self, camera_name, image_type, mesh_name, vehicle_name='', annotation_name=""):
         """
@@ -1604,11 +1656,236 @@ class VehicleClient:
         """
         self.client.call('simSetExtForce', ext_force)
 
+    def batch(self):
+        """
+        Collect calls and dispatch them pipelined, so they take a single round trip together.
+        Calls made on the batch return a `BatchResult` that holds the typed result once the batch was executed.
+        See `Batch` for an example.
+
+        Returns:
+            Batch: Batch of calls on this client, executed when leaving its `with` block
+        """
+        return Batch(self)
+
+    def task(self, future, vehicle_name=''):
+        """
+        Wrap the future of an *Async task to poll it, wait for it with a timeout or cancel it, see `TaskFuture`
+
+        Args:
+            future: Future returned by an *Async method
+            vehicle_name (str, optional): Name of the vehicle running the task
+
+        Returns:
+            TaskFuture: Task future, `wait_all` and `wait_any` wait on several of them
+        """
+        return TaskFuture(future, self, vehicle_name)
+
+    def lockstep(self, snapshots, dt=None, frames=None, timeout=30.0):
+        """
+        Pause the simulation and capture it after every fixed step, see `LockstepCapture`
+
+        Args:
+            snapshots (SensorSnapshot | list[SensorSnapshot]): Data captured at every step
+            dt (float, optional): Simulation time of a step in seconds
+            frames (int, optional): Frames of a step, instead of `dt`
+            timeout (float, optional): Maximum time for the simulation to pause after a step in seconds
+
+        Returns:
+            LockstepCapture: Iterable of the captured steps, to use in a `with` block
+        """
+        return LockstepCapture(self, snapshots, dt, frames, timeout=timeout)
+
+    def subscribe(self, sensor_kind, sensor_name='', vehicle_name='', rate_hz=10.0, buffer_size=16,
+                  typed_arrays=False):
+        """
+        Poll a sensor in the background and stream only its new samples, see `SensorSubscription`
+
+        A thread-safe client shares its connection with the subscription, other clients open a dedicated
+        connection to the same simulator that is closed with the subscription.
+
+        Args:
+            sensor_kind (str): Kind of the sensor, one of the keys of `SENSOR_GETTERS`, e.g. 'lidar' or 'imu'
+            sensor_name (str, optional): Name of the sensor
+            vehicle_name (str, optional): Name of the vehicle the sensor is attached to
+            rate_hz (float, optional): Polling rate in Hz
+            buffer_size (int, optional): Maximum number of unread samples, the oldest one is dropped when full
+            typed_arrays (bool, optional): Decode point clouds to `np.float32` arrays on a dedicated connection,
+                see `VehicleClient`
+
+        Returns:
+            SensorSubscription: Iterable stream of the new samples, stopped with `close()`
+        """
+        if isinstance(self._base_connection(), ThreadedConnection):
+            return SensorSubscription(self, sensor_kind, sensor_name, vehicle_name, rate_hz, buffer_size)
+        ip, port, timeout_value, _, _ = self._connection_args
+        client = VehicleClient(ip, port, timeout_value, typed_arrays, thread_safe=True)
+        return SensorSubscription(client, sensor_kind, sensor_name, vehicle_name, rate_hz, buffer_size,
+                                  owns_client=True)
+
+    def _base_connection(self):
+        connection = self.client
+        while isinstance(connection, _CONNECTION_LAYERS):
+            connection = connection.connection
+        return connection
+
+    def _connection_layer(self, layer_type):
+        connection = self.client
+        while isinstance(connection, _CONNECTION_LAYERS):
+            if isinstance(connection, layer_type):
+                return connection
+            connection = connection.connection
+        return None
+
+    def _remove_connection_layer(self, layer):
+        if self.client is layer:
+            self.client = layer.connection
+            return
+        connection = self.client
+        while connection.connection is not layer:
+            connection = connection.connection
+        connection.connection = layer.connection
+
+    def enable_rpc_stats(self, dump_path=None, dump_interval=60.0, stats=None):
+        """
+        Record per RPC method call counts, latency percentiles, payload sizes and decode time of the calls made by
+        this client, see `RpcStats`. Clients without recording enabled do not spend anything on it.
+
+        Args:
+            dump_path (str, optional): File the statistics are written to every `dump_interval` seconds, as CSV
+                when it ends with .csv and as JSON otherwise
+            dump_interval (float, optional): Time between dumps in seconds
+            stats (RpcStats, optional): Statistics to record in, e.g. shared with other clients, the ones already
+                being recorded or new ones when None
+
+        Returns:
+            RpcStats: Statistics being recorded
+        """
+        instrumented = self._connection_layer(InstrumentedConnection)
+        if instrumented is not None and stats is not None and instrumented.stats is not stats:
+            self.disable_rpc_stats()
+            instrumented = None
+        if instrumented is None:
+            transport = connection_transport(self._base_connection())
+            instrumented = self.client = InstrumentedConnection(self.client, RpcStats() if stats is None else stats,
+                                                                transport)
+        if dump_path is not None:
+            instrumented.stats.start_periodic_dump(dump_path, dump_interval)
+        return instrumented.stats
+
+    def disable_rpc_stats(self):
+        """
+        Stop recording RPC statistics, see `enable_rpc_stats`
+        """
+        instrumented = self._connection_layer(InstrumentedConnection)
+        if instrumented is not None:
+            instrumented.detach()
+            self._remove_connection_layer(instrumented)
+
+    def get_rpc_stats(self):
+        """
+        Returns:
+            dict: Snapshot of the RPC statistics per method, see `RpcStats.snapshot`. Empty when not enabled.
+        """
+        instrumented = self._connection_layer(InstrumentedConnection)
+        if instrumented is not None:
+            return instrumented.stats.snapshot()
+        return {}
+
+    def enable_cache(self, policies=None, invalidations=None):
+        """
+        Answer queries about static or rarely changing simulator state, such as lens, filmback and distortion
+        settings, asset and scene object listings or the settings string, from a client-side cache, see
+        `CachingConnection`. Changes made through this client invalidate the affected results, changes made by
+        other clients or by the simulator itself require `invalidate_cache()`.
+
+        Args:
+            policies (dict, optional): RPC method -> (time to live in seconds or None, maximum cached argument
+                sets), `DEFAULT_CACHE_POLICIES` when None
+            invalidations (dict, optional): RPC method -> cached RPC methods it invalidates or None for all,
+                `CACHE_INVALIDATIONS` when None
+
+        Returns:
+            CachingConnection: Cache in use, with its `hits` and `misses` counts
+        """
+        cache = self._connection_layer(CachingConnection)
+        if cache is not None:
+            self._remove_connection_layer(cache)
+        # below the statistics, so they count the calls answered from the cache too
+        instrumented = self._connection_layer(InstrumentedConnection)
+        if instrumented is None:
+            cache = self.client = CachingConnection(self.client, policies, invalidations)
+        else:
+            cache = instrumented.connection = CachingConnection(instrumented.connection, policies, invalidations)
+        return cache
+
+    def disable_cache(self):
+        """
+        Stop caching query results, see `enable_cache`
+        """
+        cache = self._connection_layer(CachingConnection)
+        if cache is not None:
+            self._remove_connection_layer(cache)
+
+    def invalidate_cache(self, method=None):
+        """
+        Drop cached query results, see `enable_cache`
+
+        Args:
+            method (str, optional): RPC method whose results are dropped, e.g. 'simListSceneObjects', all when None
+        """
+        cache = self._connection_layer(CachingConnection)
+        if cache is not None:
+            cache.invalidate(None if method is None else [method])
+
+    def enable_resilience(self, deadline=10.0, task_deadline=None, deadlines=None, max_reconnects=3, backoff=0.1,
+                          max_backoff=5.0, failure_threshold=3, reset_timeout=30.0):
+        """
+        Bound the time of every RPC, reconnect with exponential backoff when the simulator hangs or restarts, and
+        fail fast with `SimulatorUnavailable` once it failed repeatedly, see `ResilientConnection`
+
+        Args:
+            deadline (float, optional): Deadline of an RPC in seconds
+            task_deadline (float, optional): Deadline of the RPCs of *Async tasks in seconds, None for no deadline
+            deadlines (dict, optional): RPC method -> deadline in seconds or None, e.g. {'simGetImages': 30}
+            max_reconnects (int, optional): Reconnects per failed call
+            backoff (float, optional): Delay before the first reconnect in seconds, doubled for every next one
+            max_backoff (float, optional): Maximum delay before a reconnect in seconds
+            failure_threshold (int, optional): Consecutive failed calls after which calls fail right away
+            reset_timeout (float, optional): Time calls fail right away before the simulator is tried again
+
+        Returns:
+            ResilientConnection: Connection in use, with its `reconnects` count
+        """
+        self.disable_resilience()
+        resilient = ResilientConnection(self._connect, deadline, task_deadline, deadlines, max_reconnects, backoff,
+                                        max_backoff, failure_threshold, reset_timeout)
+        # the resilient connection replaces the plain one below the other layers, closing it
+        connection, outer = self.client, None
+        while isinstance(connection, _CONNECTION_LAYERS):
+            connection, outer = connection.connection, connection
+        transport = connection_transport(connection)
+        if transport is not None and transport.stats is not None:
+            connection_transport(resilient.connection).stats = transport.stats
+        connection.close()
+        if outer is None:
+            self.client = resilient
+        else:
+            outer.connection = resilient
+        return resilient
+
+    def disable_resilience(self):
+        """
+        Go back to a plain connection without deadlines, see `enable_resilience`
+        """
+        resilient = self._connection_layer(ResilientConnection)
+        if resilient is not None:
+            self._remove_connection_layer(resilient)
+
 
 # -----------------------------------  Multirotor APIs ---------------------------------------------
 class MultirotorClient(VehicleClient, object):
-    def __init__(self, ip="", port=41451, timeout_value=3600):
-        super(MultirotorClient, self).__init__(ip, port, timeout_value)
+    def __init__(self, ip="", port=41451, timeout_value=3600, typed_arrays=False, thread_safe=False):
+        super(MultirotorClient, self).__init__(ip, port, timeout_value, typed_arrays, thread_safe)
 
     def takeoffAsync(self, timeout_sec=20, vehicle_name=''):
         """
@@ -2295,8 +2572,8 @@ class MultirotorClient(VehicleClient, object):
 
 #----------------------------------- Car APIs ---------------------------------------------
 class CarClient(VehicleClient, object):
-    def __init__(self, ip="", port=41451, timeout_value=3600):
-        super(CarClient, self).__init__(ip, port, timeout_value)
+    def __init__(self, ip="", port=41451, timeout_value=3600, typed_arrays=False, thread_safe=False):
+        super(CarClient, self).__init__(ip, port, timeout_value, typed_arrays, thread_safe)
 
     def setCarControls(self, controls, vehicle_name=''):
         """
@@ -2335,8 +2612,8 @@ class CarClient(VehicleClient, object):
 
 #------------------------------ ComputerVision APIs ---------------------------------------
 class ComputerVisionClient(VehicleClient, object):
-    def __init__(self, ip="", port=41451, timeout_value=3600):
-        super(ComputerVisionClient, self).__init__(ip, port, timeout_value)
+    def __init__(self, ip="", port=41451, timeout_value=3600, typed_arrays=False, thread_safe=False):
+        super(ComputerVisionClient, self).__init__(ip, port, timeout_value, typed_arrays, thread_safe)
 
     def getComputerVisionState(self, vehicle_name=''):
         """
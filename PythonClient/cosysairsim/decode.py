@@ -0,0 +1,170 @@
+import concurrent.futures
+import contextlib
+import os
+import threading
+import numpy as np
+from .utils import rotate_vectors
+
+
+class ImageDecoder:
+    """
+    Decodes the images of `simGetImages` responses into NumPy arrays, png compressed ones concurrently.
+
+    Png images are decoded with OpenCV (pip install opencv-python) on a pool of threads, which run in parallel as
+    OpenCV releases the GIL while decoding. Uncompressed and float images are only reshaped. Arrays are returned
+    in the order of the responses:
+
+        decoder = ImageDecoder()
+        responses = client.simGetImages([airsim.ImageRequest(camera, airsim.ImageType.Scene) for camera in cameras])
+        images = decoder.decode(responses)
+
+    With `reuse_buffers`, the decoded images are written into the arrays returned for the same response index by
+    the previous call whenever their shape allows it, instead of allocating new ones for every frame. Those
+    arrays are then only valid until the next call.
+
+    Args:
+        workers (int, optional): Decoding threads, the number of CPUs when None
+        rgb (bool, optional): Return png images in RGB(A) channel order like the uncompressed images, instead of
+            the BGR(A) order of `cv2.imdecode`
+        reuse_buffers (bool, optional): Decode into the arrays returned by the previous call
+    """
+    def __init__(self, workers=None, rgb=False, reuse_buffers=False):
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count(),
+                                                               thread_name_prefix='cosysairsim-decode')
+        self._rgb = rgb
+        self._reuse_buffers = reuse_buffers
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def _decode_png(self, index, data):
+        import cv2      # pip install opencv-python
+
+        buffer = self._buffers.get(index) if self._reuse_buffers else None
+        # the Python binding of imdecode has no output argument, the image is copied into the buffer below
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError("Image {} is not a valid png".format(index))
+        if self._rgb and image.ndim == 3:
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB if image.shape[2] == 3 else cv2.COLOR_BGRA2RGBA, image)
+        if self._reuse_buffers:
+            if buffer is not None and buffer.shape == image.shape and buffer.dtype == image.dtype:
+                np.copyto(buffer, image)
+                image = buffer
+            else:
+                self._buffers[index] = image
+        return image
+
+    def _decode(self, index, response):
+        if response.pixels_as_float:
+            image = np.asarray(response.image_data_float, dtype=np.float32)
+            return image.reshape(response.height, response.width)
+        if response.compress:
+            return self._decode_png(index, response.image_data_uint8)
+        image = np.frombuffer(response.image_data_uint8, dtype=np.uint8)
+        return image.reshape(response.height, response.width, -1)
+
+    def decode(self, responses):
+        """
+        Args:
+            responses (list[ImageResponse]): Responses of `simGetImages`, with or without `as_numpy`
+
+        Returns:
+            list[np.ndarray]: Image per response, (height, width, channels) uint8 arrays for png and uncompressed
+            images, (height, width) float32 arrays for float images. Uncompressed images are read-only views on
+            the response data.
+        """
+        # the buffers of a call are only handed out once the previous call is done with them
+        with self._lock if self._reuse_buffers else contextlib.nullcontext():
+            if len(responses) == 1:
+                return [self._decode(0, responses[0])]
+            futures = [self._executor.submit(self._decode, index, response)
+                       for index, response in enumerate(responses)]
+            return [future.result() for future in futures]
+
+    def close(self):
+        """
+        Stop the decoding threads
+        """
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_default_decoder = None
+_default_decoder_lock = threading.Lock()
+
+
+def decode_images(responses, rgb=False):
+    """
+    Decode the images of `simGetImages` responses concurrently on a shared `ImageDecoder`
+
+    Args:
+        responses (list[ImageResponse]): Responses of `simGetImages`
+        rgb (bool, optional): Return png images in RGB(A) instead of BGR(A) channel order
+
+    Returns:
+        list[np.ndarray]: Image per response, see `ImageDecoder.decode`
+    """
+    global _default_decoder
+    with _default_decoder_lock:
+        if _default_decoder is None:
+            _default_decoder = {False: ImageDecoder(), True: ImageDecoder(rgb=True)}
+    return _default_decoder[bool(rgb)].decode(responses)
+
+
+def _response_channels(response, channels, name):
+    # (height, width, channels) float32 view of the float data, or uint8 RGB(A) pixels of other responses
+    if response.pixels_as_float:
+        data = np.asarray(response.image_data_float, dtype=np.float32).reshape(-1)
+        count = data.size // max(response.width * response.height, 1)
+        if count < channels:
+            raise ValueError("Float {} response carries {} channel(s), {} are needed: request it with "
+                             "pixels_as_float=False".format(name, count, channels))
+        return data.reshape(response.height, response.width, count)
+    if response.compress:
+        return decode_images([response], rgb=True)[0]
+    return np.frombuffer(response.image_data_uint8, dtype=np.uint8).reshape(response.height, response.width, -1)
+
+
+def decode_surface_normals(response, frame='world', out=None):
+    """
+    Decode a `SurfaceNormals` response into unit normal vectors.
+
+    The simulator renders the world normals of the Unreal frame mapped from [-1, 1] to [0, 1] in the color
+    channels. They are converted to the NED frame of the APIs and renormalized after the 8 bit quantization.
+
+    Args:
+        response (ImageResponse): `SurfaceNormals` response, uncompressed or png compressed
+        frame (str, optional): 'world' for normals in the world frame, or 'camera' for normals in the camera
+            frame, x forward, y right and z down, using the camera pose of the response
+        out (np.ndarray, optional): (height, width, 3) float32 array to write the normals into
+
+    Returns:
+        np.ndarray: (height, width, 3) float32 unit normals, zero where no surface was rendered
+    """
+    if frame not in ('world', 'camera'):
+        raise ValueError("Unknown frame '{}', expected 'world' or 'camera'".format(frame))
+    channels = _response_channels(response, 3, 'SurfaceNormals')
+    if out is None:
+        out = np.empty((response.height, response.width, 3), dtype=np.float32)
+    if channels.dtype == np.uint8:
+        np.multiply(channels[..., :3], np.float32(2 / 255), out=out)
+        out -= 1
+    else:
+        np.multiply(channels[..., :3], np.float32(2), out=out)
+        out -= 1
+    # Unreal z up to NED z down
+    out[..., 2] *= -1
+    if frame == 'camera':
+        orientation = response.camera_orientation
+        inverse = np.array([-orientation.x_val, -orientation.y_val, -orientation.z_val, orientation.w_val])
+        out[...] = rotate_vectors(inverse, out.reshape(-1, 3)).reshape(out.shape)
+    norms = np.sqrt(np.einsum('ijk,ijk->ij', out, out))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out /= norms[..., np.newaxis]
+    out[norms < 0.5] = 0
+    return out
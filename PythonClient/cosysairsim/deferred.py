@@ -0,0 +1,80 @@
+import copy
+
+
+class _Pending(BaseException):
+    """
+    Raised out of a client method body once it needs the result of an RPC that has not arrived yet
+    """
+
+
+class _DeferredConnection:
+    """
+    Stands in for the connection of a client while one of its methods is run deferred.
+
+    Results known so far are replayed in call order. The first RPC without a known result is sent on the real
+    connection and the method body is abandoned, its future kept in `pending`.
+    """
+    def __init__(self, connection, results):
+        self._connection = connection
+        self._results = results
+        self._index = 0
+        self.pending = None
+
+    def call(self, method, *args):
+        if self._index < len(self._results):
+            self._index += 1
+            return self._results[self._index - 1]
+        self.pending = self._connection.call_async(method, *args)
+        raise _Pending()
+
+    def call_async(self, method, *args):
+        # futures of *Async tasks are recorded as their own result so the task is only sent once
+        if self._index == len(self._results):
+            self._results.append(self._connection.call_async(method, *args))
+        self._index += 1
+        return self._results[self._index - 1]
+
+
+class DeferredCall:
+    """
+    A client method call run without blocking on the RPCs it issues.
+
+    The method body runs on a shallow copy of the client whose connection is swapped for a recording one. When
+    the body needs the result of an RPC that is still in flight, `step()` hands back that RPC's future. Once it
+    has completed, `resolve()` records its result and the next `step()` runs the body again from the start with
+    every result known so far, until it returns. Code in the method body before its last RPC can therefore run
+    more than once.
+
+    Args:
+        client (VehicleClient): Client whose method is called, its `client` attribute is the connection used
+        name (str): Name of the client method
+        args (tuple): Positional arguments of the call
+        kwargs (dict): Keyword arguments of the call
+    """
+    def __init__(self, client, name, args=(), kwargs=None):
+        self._client = client
+        self._name = name
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._results = []
+
+    def step(self):
+        """
+        Run the method body as far as the known results allow
+
+        Returns:
+            tuple: (True, return value of the method) when it completed, otherwise (False, future of the RPC
+            whose result is needed next)
+        """
+        shadow = copy.copy(self._client)
+        shadow.client = _DeferredConnection(self._client.client, self._results)
+        try:
+            return True, getattr(shadow, self._name)(*self._args, **self._kwargs)
+        except _Pending:
+            return False, shadow.client.pending
+
+    def resolve(self, result):
+        """
+        Record the result of the future returned by the last `step()`
+        """
+        self._results.append(result)
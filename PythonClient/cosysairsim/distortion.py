@@ -0,0 +1,187 @@
+import collections
+import threading
+import numpy as np
+
+
+def distortion_coefficients(distortion_params):
+    """
+    Args:
+        distortion_params (list[float] | dict): Distortion parameters K1, K2, K3, P1, P2 as returned by
+            `simGetDistortionParams`, or as a dict like the one of `simSetDistortionParams`
+
+    Returns:
+        np.ndarray: Coefficients (k1, k2, p1, p2, k3) in the order of OpenCV. The simulator applies them to texture
+        coordinates centered on the image, so the matching OpenCV camera matrix is [[width, 0, (width - 1) / 2],
+        [0, height, (height - 1) / 2], [0, 0, 1]] rather than the pinhole intrinsics of the camera.
+    """
+    if isinstance(distortion_params, dict):
+        distortion_params = [distortion_params.get(name, 0.0) for name in ('K1', 'K2', 'K3', 'P1', 'P2')]
+    k1, k2, k3, p1, p2 = (float(value) for value in distortion_params)
+    return np.array([k1, k2, p1, p2, k3])
+
+
+def _distort(x, y, coefficients):
+    # Python floats keep float32 coordinates in float32
+    k1, k2, p1, p2, k3 = (float(value) for value in coefficients)
+    r2 = x * x + y * y
+    radial = 1 + r2 * (k1 + r2 * (k2 + r2 * k3))
+    return (x * radial + 2 * p1 * x * y + p2 * (r2 + 2 * x * x),
+            y * radial + p1 * (r2 + 2 * y * y) + 2 * p2 * x * y)
+
+
+def _undistort(xd, yd, coefficients, iterations=10, tolerance=1e-6):
+    # Newton's method on the distortion model, converging in a few iterations over the whole image
+    k1, k2, p1, p2, k3 = (float(value) for value in coefficients)
+    x, y = xd.copy(), yd.copy()
+    for _ in range(iterations):
+        xx, yy, xy = x * x, y * y, x * y
+        r2 = xx + yy
+        radial = 1 + r2 * (k1 + r2 * (k2 + r2 * k3))
+        slope = 2 * (k1 + r2 * (2 * k2 + 3 * k3 * r2))
+        error_x = x * radial + 2 * p1 * xy + p2 * (r2 + 2 * xx) - xd
+        error_y = y * radial + p1 * (r2 + 2 * yy) + 2 * p2 * xy - yd
+        dx_dx = radial + xx * slope + 2 * p1 * y + 6 * p2 * x
+        dy_dy = radial + yy * slope + 6 * p1 * y + 2 * p2 * x
+        dx_dy = xy * slope + 2 * p1 * x + 2 * p2 * y
+        determinant = dx_dx * dy_dy - dx_dy * dx_dy
+        step_x = (dy_dy * error_x - dx_dy * error_y) / determinant
+        step_y = (dx_dx * error_y - dx_dy * error_x) / determinant
+        x -= step_x
+        y -= step_y
+        if max(np.abs(step_x).max(initial=0.0), np.abs(step_y).max(initial=0.0)) < tolerance:
+            break
+    # points beyond the fold of a strong distortion have no undistorted source
+    distorted_x, distorted_y = _distort(x, y, coefficients)
+    invalid = ~((np.abs(distorted_x - xd) < 1e3 * tolerance) & (np.abs(distorted_y - yd) < 1e3 * tolerance))
+    x[invalid] = np.nan
+    y[invalid] = np.nan
+    return x, y
+
+
+class DistortionRemapper:
+    """
+    Removes or applies the lens distortion of a camera on its images, with remap tables computed once.
+
+    The simulator distorts images with the Brown-Conrady model of `simGetDistortionParams` (K1, K2, K3, P1, P2) in a
+    post process: every pixel of the distorted image reads the undistorted render at its texture coordinates
+    centered on the image, distorted by the model. The remap tables only depend on those parameters and the image
+    size, so they are computed once per camera geometry, kept for the next frames and shared between threads. A
+    frame then costs a single `cv2.remap` (pip install opencv-python):
+
+        remapper = DistortionRemapper(client)
+        images = airsim.decode_images(client.simGetImages(requests))
+        undistorted = remapper.undistort(images, "front")
+
+    The distortion parameters are fetched on every call that does not pass them. With the query cache of the
+    client enabled (`enable_cache`), they are only fetched again after `simSetDistortionParam`, and changed
+    parameters select new tables.
+
+    Args:
+        client (VehicleClient, optional): Client to fetch the distortion parameters with
+        max_maps (int, optional): Remap tables kept, the least recently used ones are dropped first
+        interpolation (int, optional): OpenCV interpolation of the remap, `cv2.INTER_LINEAR` when None
+    """
+    def __init__(self, client=None, max_maps=8, interpolation=None):
+        self.client = client
+        self.max_maps = max_maps
+        self.interpolation = interpolation
+        self._maps = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def maps(self, distortion_params, width, height, undistort=True):
+        """
+        Args:
+            distortion_params (list[float] | dict): Distortion parameters, see `distortion_coefficients`
+            width (int): Width of the images in pixels
+            height (int): Height of the images in pixels
+            undistort (bool, optional): Tables removing the distortion, or applying it when False
+
+        Returns:
+            tuple: (height, width) float32 x and y source coordinates of every pixel of the remapped image,
+            shared between calls, do not modify
+        """
+        coefficients = distortion_coefficients(distortion_params)
+        key = (tuple(coefficients), width, height, undistort)
+        with self._lock:
+            maps = self._maps.get(key)
+            if maps is not None:
+                self._maps.move_to_end(key)
+                return maps
+        # texture coordinates of the pixel centers minus 0.5, as the distortion shader sees them
+        cx, cy = (width - 1) / 2, (height - 1) / 2
+        x = ((np.arange(width, dtype=np.float32) - np.float32(cx)) / np.float32(width))[np.newaxis, :]
+        y = ((np.arange(height, dtype=np.float32) - np.float32(cy)) / np.float32(height))[:, np.newaxis]
+        x, y = x.repeat(height, axis=0), y.repeat(width, axis=1)
+        # a distorted pixel shows the render at its distorted coordinates, so an undistorted pixel is read back
+        # from the distorted one whose distorted coordinates are its own
+        with np.errstate(all='ignore'):
+            x, y = _undistort(x, y, coefficients) if undistort else _distort(x, y, coefficients)
+        # pixels without a source read outside of the image, which leaves them black
+        maps = tuple(np.nan_to_num(table, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+                     for table in (x * np.float32(width) + np.float32(cx), y * np.float32(height) + np.float32(cy)))
+        for table in maps:
+            table.setflags(write=False)
+        with self._lock:
+            self._maps[key] = maps
+            while len(self._maps) > self.max_maps:
+                self._maps.popitem(last=False)
+        return maps
+
+    def _remap(self, images, undistort, camera_name, vehicle_name, distortion_params):
+        import cv2      # pip install opencv-python
+
+        if distortion_params is None:
+            if self.client is None or camera_name is None:
+                raise ValueError("Either distortion_params or a client and camera_name are needed")
+            distortion_params = self.client.simGetDistortionParams(camera_name, vehicle_name)
+        single = isinstance(images, np.ndarray) and (images.ndim == 2 or images.ndim == 3 and images.shape[2] <= 4)
+        frames = [images] if single else images
+        interpolation = cv2.INTER_LINEAR if self.interpolation is None else self.interpolation
+        remapped = []
+        for frame in frames:
+            height, width = frame.shape[:2]
+            map_x, map_y = self.maps(distortion_params, width, height, undistort)
+            remapped.append(cv2.remap(frame, map_x, map_y, interpolation))
+        if single:
+            return remapped[0]
+        return np.stack(remapped) if isinstance(images, np.ndarray) else remapped
+
+    def undistort(self, images, camera_name=None, vehicle_name='', distortion_params=None):
+        """
+        Remove the lens distortion of images of a camera
+
+        Args:
+            images (np.ndarray | list[np.ndarray]): Image of (height, width) or (height, width, channels), a list
+                of images or a (frames, height, width, channels) batch
+            camera_name (str, optional): Camera the images were taken with, to fetch its parameters
+            vehicle_name (str, optional): Vehicle of the camera
+            distortion_params (list[float] | dict, optional): Distortion parameters, fetched with
+                `simGetDistortionParams` when None
+
+        Returns:
+            np.ndarray | list[np.ndarray]: Undistorted images, in the form they were given
+        """
+        return self._remap(images, True, camera_name, vehicle_name, distortion_params)
+
+    def distort(self, images, camera_name=None, vehicle_name='', distortion_params=None):
+        """
+        Apply the lens distortion of a camera on undistorted images, e.g. rendered without distortion
+
+        Args:
+            images (np.ndarray | list[np.ndarray]): Images, see `undistort`
+            camera_name (str, optional): Camera whose distortion is applied, to fetch its parameters
+            vehicle_name (str, optional): Vehicle of the camera
+            distortion_params (list[float] | dict, optional): Distortion parameters, fetched with
+                `simGetDistortionParams` when None
+
+        Returns:
+            np.ndarray | list[np.ndarray]: Distorted images, in the form they were given
+        """
+        return self._remap(images, False, camera_name, vehicle_name, distortion_params)
+
+    def clear(self):
+        """
+        Drop the cached remap tables
+        """
+        with self._lock:
+            self._maps.clear()
@@ -0,0 +1,104 @@
+import functools
+import inspect
+from .batch import Batch
+from .utils import poses_to_arrays, vectors_to_array
+
+
+class FleetResults(dict):
+    """
+    Results of a call broadcast to a fleet, vehicle name -> result in the order of `FleetClient.vehicle_names`
+    """
+    def join(self):
+        """
+        Wait for all the tasks of a broadcast *Async call to complete
+
+        Returns:
+            FleetResults: self
+        """
+        for future in self.values():
+            future.join()
+        return self
+
+
+class FleetClient:
+    """
+    Issues the same command or query to many vehicles at once.
+
+    Any method of the client taking a `vehicle_name` can be called on the fleet without it. The call is made for
+    every vehicle of the fleet, all pipelined on the client's connection so they take a single round trip
+    together, and a `FleetResults` dict of vehicle name -> result is returned:
+
+        fleet = FleetClient(airsim.MultirotorClient())
+        fleet.enableApiControl(True)
+        fleet.armDisarm(True)
+        fleet.takeoffAsync().join()
+        states = fleet.getMultirotorState()
+
+    Different arguments per vehicle are passed with `each()`, and `get_poses()` / `get_positions()` collect the
+    fleet state as arrays ordered like `vehicle_names`.
+
+    Args:
+        client (VehicleClient): Client the calls are made with, e.g. a `MultirotorClient`
+        vehicle_names (list[str], optional): Vehicles of the fleet, all vehicles of the simulation when None
+    """
+    def __init__(self, client, vehicle_names=None):
+        self.client = client
+        self.vehicle_names = list(client.listVehicles() if vehicle_names is None else vehicle_names)
+
+    def _vehicle_method(self, name):
+        method = getattr(type(self.client), name, None)
+        if name.startswith('_') or not callable(method) or \
+                'vehicle_name' not in inspect.signature(method).parameters:
+            raise AttributeError("'{}' does not take a vehicle_name".format(name))
+        return method
+
+    def __getattr__(self, name):
+        method = self._vehicle_method(name)
+
+        @functools.wraps(method)
+        def broadcast(*args, **kwargs):
+            return self.each(name, {vehicle_name: (args, kwargs) for vehicle_name in self.vehicle_names})
+        return broadcast
+
+    def each(self, name, arguments):
+        """
+        Call a client method for several vehicles with different arguments, pipelined
+
+            fleet.each('moveToPositionAsync', {'Drone1': (0, 0, -10, 5), 'Drone2': (10, 0, -10, 5)}).join()
+
+        Args:
+            name (str): Name of the client method, taking a `vehicle_name`
+            arguments (dict): Vehicle name -> tuple of positional arguments, or tuple of (positional arguments,
+                keyword arguments)
+
+        Returns:
+            FleetResults: Vehicle name -> return value of the call. The first error is raised if any call failed.
+        """
+        self._vehicle_method(name)
+        batch = Batch(self.client)
+        queued = {}
+        for vehicle_name, vehicle_arguments in arguments.items():
+            args, kwargs = vehicle_arguments, {}
+            if len(vehicle_arguments) == 2 and isinstance(vehicle_arguments[0], tuple) and \
+                    isinstance(vehicle_arguments[1], dict):
+                args, kwargs = vehicle_arguments
+            queued[vehicle_name] = getattr(batch, name)(*args, vehicle_name=vehicle_name, **kwargs)
+        batch.execute()
+        return FleetResults((vehicle_name, result.result()) for vehicle_name, result in queued.items())
+
+    def get_poses(self):
+        """
+        Returns:
+            tuple: (N, 3) array of the positions and (N, 4) array of the orientations (x, y, z, w) of the vehicles,
+            in the order of `vehicle_names`
+        """
+        poses = self.each('simGetVehiclePose', {vehicle_name: () for vehicle_name in self.vehicle_names})
+        return poses_to_arrays(list(poses.values()))
+
+    def get_positions(self):
+        """
+        Returns:
+            np.ndarray: (N, 3) array of the kinematic positions of the vehicles, in the order of `vehicle_names`
+        """
+        states = self.each('simGetGroundTruthKinematics', {vehicle_name: () for vehicle_name in self.vehicle_names})
+        return vectors_to_array([state.position for state in states.values()])
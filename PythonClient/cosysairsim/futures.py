@@ -0,0 +1,193 @@
+import concurrent.futures
+import time
+
+
+def _is_rpc_future(future):
+    # futures of the plain msgpack-rpc connection, only completed while their I/O loop is run
+    return not isinstance(future, concurrent.futures.Future) and hasattr(future, 'attach_callback')
+
+
+def _unwrap(future):
+    return future.future if isinstance(future, TaskFuture) else future
+
+
+def _run_loop(loop, timeout):
+    """
+    Run the I/O loop of msgpack-rpc futures until a response arrives or `timeout` seconds have passed
+    """
+    handle = loop._ioloop.call_later(max(timeout, 0.0), loop.stop) if timeout is not None else None
+    try:
+        loop.start()
+    finally:
+        if handle is not None:
+            loop._ioloop.remove_timeout(handle)
+
+
+def is_done(future):
+    """
+    Check without blocking whether the future of an RPC or *Async task has completed
+
+    Args:
+        future: Future returned by an *Async method or a `call_async`, or a `TaskFuture`
+
+    Returns:
+        bool: Whether its result is available
+    """
+    future = _unwrap(future)
+    if _is_rpc_future(future):
+        if not future._set_flag:
+            # process the responses that arrived so far
+            _run_loop(future._loop, 0.0)
+        return future._set_flag
+    return future.done()
+
+
+def add_done_callback(future, callback):
+    """
+    Call `callback(future)` once the future of an RPC or *Async task has completed, right away when it already has.
+    Callbacks run on the thread that completes the future: the I/O thread of a thread-safe client, or the thread
+    waiting on the future for other clients.
+
+    Args:
+        future: Future returned by an *Async method or a `call_async`, or a `TaskFuture`
+        callback (callable): Called with the future
+    """
+    future = _unwrap(future)
+    if not _is_rpc_future(future):
+        future.add_done_callback(callback)
+    elif future._set_flag:
+        callback(future)
+    else:
+        # msgpack-rpc futures hold a single callback, chain it with the ones attached before
+        previous = future._callback
+
+        def chained(future):
+            if previous is not None:
+                previous(future)
+            callback(future)
+        future.attach_callback(chained)
+
+
+def _wait(futures, timeout, return_when):
+    futures = list(futures)
+    waited = [_unwrap(future) for future in futures]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        done = [future for future, waited_future in zip(futures, waited) if is_done(waited_future)]
+        if len(done) == len(futures) or (done and return_when == concurrent.futures.FIRST_COMPLETED):
+            break
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            break
+        rpc_futures = [future for future in waited if _is_rpc_future(future) and not future._set_flag]
+        if not rpc_futures:
+            # futures of the plain connection that completed since the last pass have no `done()`
+            pending = [future for future in waited
+                       if isinstance(future, concurrent.futures.Future) and not is_done(future)]
+            if pending:
+                concurrent.futures.wait(pending, remaining, return_when)
+        elif len(rpc_futures) == len(waited) - len(done):
+            _run_loop(rpc_futures[0]._loop, remaining)
+        else:
+            # both kinds of futures pending, alternate between them
+            _run_loop(rpc_futures[0]._loop, 0.001 if remaining is None else min(remaining, 0.001))
+    done_ids = set(map(id, done))
+    return done, [future for future in futures if id(future) not in done_ids]
+
+
+def wait_all(futures, timeout=None):
+    """
+    Wait for all the futures of RPCs or *Async tasks to complete, e.g. movements of several vehicles
+
+    Args:
+        futures (list): Futures returned by *Async methods or `call_async`, or `TaskFuture`s
+        timeout (float, optional): Maximum time to wait in seconds, waits indefinitely when None
+
+    Returns:
+        tuple: (list of the completed futures, list of the futures still pending), in the order of `futures`
+    """
+    return _wait(futures, timeout, concurrent.futures.ALL_COMPLETED)
+
+
+def wait_any(futures, timeout=None):
+    """
+    Wait for the first of the futures of RPCs or *Async tasks to complete
+
+    Args:
+        futures (list): Futures returned by *Async methods or `call_async`, or `TaskFuture`s
+        timeout (float, optional): Maximum time to wait in seconds, waits indefinitely when None
+
+    Returns:
+        tuple: (list of the completed futures, list of the futures still pending), in the order of `futures`
+    """
+    return _wait(futures, timeout, concurrent.futures.FIRST_COMPLETED)
+
+
+class TaskFuture:
+    """
+    Future of a vehicle's *Async task that can be polled, waited on with a timeout and cancelled. Cancelling maps
+    to `cancelLastTask`, so it only applies to the task the vehicle was given last.
+
+        move = client.task(client.moveToPositionAsync(0, 0, -10, 5, vehicle_name="Drone1"), "Drone1")
+        while not move.done():
+            process(client.getImuData(vehicle_name="Drone1"))
+        if obstacle_ahead:
+            move.cancel()
+
+    Args:
+        future: Future returned by the *Async method
+        client (VehicleClient): Client the task was started with
+        vehicle_name (str, optional): Name of the vehicle running the task
+    """
+    def __init__(self, future, client, vehicle_name=''):
+        self.future = future
+        self._client = client
+        self._vehicle_name = vehicle_name
+        self.cancelled = False
+
+    def done(self):
+        """
+        Returns:
+            bool: Whether the task completed, without blocking
+        """
+        return is_done(self.future)
+
+    def result(self, timeout=None):
+        """
+        Wait for the task to complete
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds, `TimeoutError` is raised when it expires
+
+        Returns:
+            Return value of the task, its error is raised if it failed
+        """
+        if timeout is not None and wait_all([self.future], timeout)[1]:
+            raise TimeoutError("Task of vehicle '{}' still running".format(self._vehicle_name))
+        return self.future.get()
+
+    def join(self):
+        self.future.join()
+
+    def get(self):
+        return self.future.get()
+
+    def add_done_callback(self, callback):
+        """
+        Call `callback(task)` once the task completed, see `add_done_callback`
+        """
+        add_done_callback(self.future, lambda future: callback(self))
+
+    def cancel(self):
+        """
+        Cancel the task with `cancelLastTask`, the vehicle stops with its next task or hover. The future
+        completes once the simulator stopped the task.
+
+        Returns:
+            bool: False when the task had already completed
+        """
+        if self.done():
+            return False
+        self._client.cancelLastTask(self._vehicle_name)
+        self.cancelled = True
+        return True
@@ -0,0 +1,207 @@
+import bisect
+import csv
+import json
+import threading
+import time
+from .futures import add_done_callback
+
+# upper bounds of the latency histogram buckets in seconds, 40 per decade from 1 us to 100 s (~6% resolution)
+_LATENCY_BOUNDS = [10 ** (exponent / 40) for exponent in range(-240, 81)]
+
+STATS_FIELDS = ('method', 'count', 'errors', 'latency_mean', 'latency_p50', 'latency_p95', 'latency_p99',
+                'latency_max', 'request_bytes', 'response_bytes', 'decode_time', 'network_time')
+
+
+class _MethodStats:
+    __slots__ = ('count', 'errors', 'latency_total', 'latency_max', 'histogram', 'request_bytes', 'response_bytes',
+                 'decode_time', 'decoded')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * (len(_LATENCY_BOUNDS) + 1)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.decode_time = 0.0
+        self.decoded = 0
+
+    def percentile(self, fraction):
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                return min(_LATENCY_BOUNDS[bucket] if bucket < len(_LATENCY_BOUNDS) else self.latency_max,
+                           self.latency_max)
+        return self.latency_max
+
+
+class RpcStats:
+    """
+    Per RPC method call counts, latency histogram, payload sizes and decode time of a connection.
+
+    Latencies are measured from the call until its result is available to the caller. Payload sizes are the
+    encoded sizes of the request and response messages, the decode time is spent unpacking responses on the
+    client, the rest of the latency is network and simulator time. See `VehicleClient.enable_rpc_stats`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+        self._dump_stop = None
+
+    def _method(self, method):
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = _MethodStats()
+        return stats
+
+    def record_call(self, method, latency, error=False):
+        with self._lock:
+            stats = self._method(method)
+            stats.count += 1
+            stats.errors += error
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.histogram[bisect.bisect_left(_LATENCY_BOUNDS, latency)] += 1
+
+    def record_request(self, method, size):
+        with self._lock:
+            self._method(method).request_bytes += size
+
+    def record_response(self, method, size, decode_time):
+        with self._lock:
+            stats = self._method(method)
+            stats.response_bytes += size
+            stats.decode_time += decode_time
+            stats.decoded += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: RPC method -> dict of 'count', 'errors', 'latency_mean', 'latency_p50', 'latency_p95',
+            'latency_p99' and 'latency_max' in seconds, total 'request_bytes' and 'response_bytes', and total
+            'decode_time' and 'network_time' in seconds
+        """
+        with self._lock:
+            snapshot = {}
+            for method, stats in self._methods.items():
+                snapshot[method] = {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'latency_mean': stats.latency_total / stats.count if stats.count else 0.0,
+                    'latency_p50': stats.percentile(0.50),
+                    'latency_p95': stats.percentile(0.95),
+                    'latency_p99': stats.percentile(0.99),
+                    'latency_max': stats.latency_max,
+                    'request_bytes': stats.request_bytes,
+                    'response_bytes': stats.response_bytes,
+                    'decode_time': stats.decode_time,
+                    'network_time': max(stats.latency_total - stats.decode_time, 0.0),
+                }
+            return snapshot
+
+    def reset(self):
+        """
+        Clear all statistics
+        """
+        with self._lock:
+            self._methods = {}
+
+    def dump(self, path):
+        """
+        Write a snapshot, as CSV with one row per method when `path` ends with .csv and as JSON otherwise
+
+        Args:
+            path (str): Path of the file, overwritten
+        """
+        snapshot = self.snapshot()
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                writer = csv.writer(f)
+                writer.writerow(STATS_FIELDS)
+                for method, stats in sorted(snapshot.items()):
+                    writer.writerow([method] + [stats[field] for field in STATS_FIELDS[1:]])
+            else:
+                json.dump(snapshot, f, indent=2, sort_keys=True)
+
+    def start_periodic_dump(self, path, interval=60.0):
+        """
+        Dump the statistics to `path` every `interval` seconds from a background thread, see `dump`
+
+        Args:
+            path (str): Path of the file, overwritten on every dump
+            interval (float, optional): Time between dumps in seconds
+        """
+        self.stop_periodic_dump()
+        stop = self._dump_stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.dump(path)
+            self.dump(path)
+        threading.Thread(target=run, name="cosysairsim-rpc-stats", daemon=True).start()
+
+    def stop_periodic_dump(self):
+        """
+        Stop dumping periodically, after a last dump
+        """
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_stop = None
+
+
+class InstrumentedConnection:
+    """
+    Connection proxy recording the calls made through it in an `RpcStats`, and the payload sizes and decode
+    times measured by the transport of the wrapped connection.
+
+    Args:
+        connection: Connection of a client, its `client` attribute
+        stats (RpcStats): Statistics to record in
+        transport (ClientTransport, optional): Transport of the wrapped connection, for payload sizes and decode times
+    """
+    def __init__(self, connection, stats, transport=None):
+        self.connection = connection
+        self.stats = stats
+        self._transport = transport
+        if transport is not None:
+            transport.stats = stats
+
+    def call(self, method, *args):
+        start = time.perf_counter()
+        try:
+            result = self.connection.call(method, *args)
+        except Exception:
+            self.stats.record_call(method, time.perf_counter() - start, error=True)
+            raise
+        self.stats.record_call(method, time.perf_counter() - start)
+        return result
+
+    def call_async(self, method, *args):
+        start = time.perf_counter()
+        future = self.connection.call_async(method, *args)
+
+        def done(future):
+            error = future.exception() is not None if hasattr(future, 'exception') else future.error is not None
+            self.stats.record_call(method, time.perf_counter() - start, error=error)
+        add_done_callback(future, done)
+        return future
+
+    def detach(self):
+        """
+        Stop recording
+
+        Returns:
+            The wrapped connection
+        """
+        if self._transport is not None:
+            self._transport.stats = None
+        self.stats.stop_periodic_dump()
+        return self.connection
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
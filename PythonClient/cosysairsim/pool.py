@@ -0,0 +1,223 @@
+import contextlib
+import functools
+import itertools
+import queue
+import threading
+import time
+from .client import VehicleClient
+from .instrumentation import RpcStats
+
+
+class ClientPool:
+    """
+    Pool of thread-safe clients, each on its own connection, for multi-threaded consumers.
+
+    Clients can be used in two ways:
+
+    - checked out for exclusive use with `with pool.checkout() as client:` and returned afterwards,
+    - pinned to a thread with `pool.thread_client()`, threads are spread round-robin over the pool.
+
+    The pool also exposes the full API of `client_class` itself, each call being made on a client checked out
+    for the duration of that call, so `pool.simGetImages(...)` can be called from any number of threads. The
+    statistics, cache and resilience methods (`enable_rpc_stats`, `enable_cache`, `enable_resilience`, ...) apply
+    to all clients of the pool instead.
+
+    Args:
+        size (int, optional): Number of clients and connections in the pool
+        ip (str, optional): IP address of the simulator, localhost when empty
+        port (int, optional): RPC port of the simulator
+        timeout_value (int, optional): Timeout of a single RPC call in seconds
+        typed_arrays (bool, optional): Decode large float arrays to `np.float32` arrays, see `VehicleClient`
+        client_class (type, optional): Client class of the pool, e.g. `MultirotorClient`
+    """
+    def __init__(self, size=4, ip="", port=41451, timeout_value=3600, typed_arrays=False,
+                 client_class=VehicleClient):
+        self._client_class = client_class
+        self._clients = [client_class(ip, port, timeout_value, typed_arrays, thread_safe=True)
+                         for _ in range(size)]
+        self._idle = queue.Queue()
+        for client in self._clients:
+            self._idle.put(client)
+        self._next_thread_client = itertools.cycle(self._clients)
+        self._thread_clients = threading.local()
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._checked_out = 0
+        self._max_checked_out = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._rpc_stats = None
+
+    @contextlib.contextmanager
+    def checkout(self, timeout=None):
+        """
+        Check out a client for exclusive use, it is returned to the pool when leaving the `with` block
+
+        Args:
+            timeout (float, optional): Maximum time to wait for a free client in seconds, `queue.Empty` is raised
+                when it expires. Waits indefinitely when None.
+        """
+        start = time.perf_counter()
+        client = self._idle.get(timeout=timeout)
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._checkouts += 1
+            self._checked_out += 1
+            self._max_checked_out = max(self._max_checked_out, self._checked_out)
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._checked_out -= 1
+            self._idle.put(client)
+
+    def thread_client(self):
+        """
+        Returns:
+            VehicleClient: Client pinned to the calling thread, shared with other threads once the pool is exhausted
+        """
+        client = getattr(self._thread_clients, 'client', None)
+        if client is None:
+            with self._lock:
+                client = next(self._next_thread_client)
+            self._thread_clients.client = client
+        return client
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(self._client_class, name)):
+            raise AttributeError(name)
+        method = getattr(self._client_class, name)
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            with self.checkout() as client:
+                return getattr(client, name)(*args, **kwargs)
+        return call
+
+    def enable_rpc_stats(self, dump_path=None, dump_interval=60.0):
+        """
+        Record the RPC statistics of all clients of the pool together, see `VehicleClient.enable_rpc_stats`
+
+        Args:
+            dump_path (str, optional): File the statistics are written to every `dump_interval` seconds
+            dump_interval (float, optional): Time between dumps in seconds
+
+        Returns:
+            RpcStats: Statistics being recorded
+        """
+        with self._lock:
+            if self._rpc_stats is None:
+                self._rpc_stats = RpcStats()
+            stats = self._rpc_stats
+        for client in self._clients:
+            client.enable_rpc_stats(stats=stats)
+        if dump_path is not None:
+            stats.start_periodic_dump(dump_path, dump_interval)
+        return stats
+
+    def disable_rpc_stats(self):
+        """
+        Stop recording RPC statistics on all clients, see `enable_rpc_stats`
+        """
+        for client in self._clients:
+            client.disable_rpc_stats()
+        with self._lock:
+            self._rpc_stats = None
+
+    def get_rpc_stats(self):
+        """
+        Returns:
+            dict: Snapshot of the RPC statistics of all clients per method, see `RpcStats.snapshot`. Empty when not
+            enabled.
+        """
+        stats = self._rpc_stats
+        return {} if stats is None else stats.snapshot()
+
+    def enable_cache(self, policies=None, invalidations=None):
+        """
+        Cache queries on all clients, see `VehicleClient.enable_cache`. A change made through any client of the pool
+        drops the affected results from the caches of all of them.
+
+        Args:
+            policies (dict, optional): RPC method -> (time to live in seconds or None, maximum cached argument
+                sets), `DEFAULT_CACHE_POLICIES` when None
+            invalidations (dict, optional): RPC method -> cached RPC methods it invalidates or None for all,
+                `CACHE_INVALIDATIONS` when None
+
+        Returns:
+            list[CachingConnection]: Cache of every client
+        """
+        caches = [client.enable_cache(policies, invalidations) for client in self._clients]
+        for cache in caches:
+            cache.peers = tuple(peer for peer in caches if peer is not cache)
+        return caches
+
+    def disable_cache(self):
+        """
+        Stop caching query results on all clients, see `enable_cache`
+        """
+        for client in self._clients:
+            client.disable_cache()
+
+    def invalidate_cache(self, method=None):
+        """
+        Drop cached query results of all clients, see `VehicleClient.invalidate_cache`
+
+        Args:
+            method (str, optional): RPC method whose results are dropped, all when None
+        """
+        for client in self._clients:
+            client.invalidate_cache(method)
+
+    def enable_resilience(self, *args, **kwargs):
+        """
+        Bound the time of the RPCs of all clients and reconnect them, with the arguments of
+        `VehicleClient.enable_resilience`
+
+        Returns:
+            list[ResilientConnection]: Connection of every client
+        """
+        return [client.enable_resilience(*args, **kwargs) for client in self._clients]
+
+    def disable_resilience(self):
+        """
+        Go back to plain connections on all clients, see `enable_resilience`
+        """
+        for client in self._clients:
+            client.disable_resilience()
+
+    def get_stats(self):
+        """
+        Usage statistics to size the pool
+
+        Returns:
+            dict: 'size', 'checked_out' and 'max_checked_out' clients, 'checkouts' so far, 'wait_time_total',
+            'wait_time_mean' and 'wait_time_max' in seconds spent waiting for a free client, and 'in_flight'
+            RPC calls per client
+        """
+        with self._lock:
+            return {
+                'size': len(self._clients),
+                'checked_out': self._checked_out,
+                'max_checked_out': self._max_checked_out,
+                'checkouts': self._checkouts,
+                'wait_time_total': self._wait_time_total,
+                'wait_time_mean': self._wait_time_total / self._checkouts if self._checkouts else 0.0,
+                'wait_time_max': self._wait_time_max,
+                'in_flight': [client.client.pending for client in self._clients],
+            }
+
+    def close(self):
+        """
+        Close the connections of all clients in the pool
+        """
+        for client in self._clients:
+            client.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,329 @@
+import collections
+import math
+import threading
+import numpy as np
+from .types import ImageType
+from .utils import quaternions_to_array, quaternions_to_rotation_matrices, transform_points, vectors_to_array
+
+
+def camera_intrinsics(camera_info, width, height):
+    """
+    Pinhole intrinsics of a camera for images of the given size, with pixel centers at integer coordinates.
+
+    The focal lengths are read from the projection matrix of `simGetCameraInfo`, which accounts for the aspect
+    ratio of the render target, and derived from its horizontal field of view when the matrix is not available.
+    The camera frame is the one of the simulator: x forward, y right and z down, so a point (x, y, z) is seen at
+    pixel (cx + fx * y / x, cy + fy * z / x).
+
+    Args:
+        camera_info (CameraInfo): Info of the camera, `simGetCameraInfo`
+        width (int): Width of the images in pixels
+        height (int): Height of the images in pixels
+
+    Returns:
+        np.ndarray: (3, 3) camera matrix [[fx, 0, cx], [0, fy, cy], [0, 0, 1]]
+    """
+    fx = fy = None
+    matrix = np.asarray(camera_info.proj_mat.matrix, dtype=np.float64)
+    if matrix.shape == (4, 4) and np.all(np.isfinite(matrix)) and matrix[3, 0] != 0:
+        # clip coordinates of the unit steps forward, right and down of the NED camera frame
+        fx = abs(matrix[0, 1] / matrix[3, 0]) * width / 2
+        fy = abs(matrix[1, 2] / matrix[3, 0]) * height / 2
+    if not fx or not fy:
+        if not 0 < camera_info.fov < 180:
+            raise ValueError("Camera has neither a projection matrix nor a field of view")
+        fx = fy = width / (2 * math.tan(math.radians(camera_info.fov) / 2))
+    return np.array([[fx, 0.0, (width - 1) / 2],
+                     [0.0, fy, (height - 1) / 2],
+                     [0.0, 0.0, 1.0]])
+
+
+class DepthProjector:
+    """
+    Converts depth images into point clouds in one vectorised pass per frame.
+
+    The ray of every pixel only depends on the camera intrinsics and the image size, so the grid of rays is
+    computed once per camera geometry and kept for the next frames. Depth is then a single multiplication with
+    the grid, and the world frame points a single rotation and translation by the camera pose of the response:
+
+        projector = DepthProjector(client)
+        responses = client.simGetImages([airsim.ImageRequest("front", airsim.ImageType.DepthPlanar, True, False),
+                                         airsim.ImageRequest("front", airsim.ImageType.Scene, False, False)])
+        points, colors = projector.project(responses[0], "front", colors=responses[1])
+
+    The camera info is fetched with `simGetCameraInfo` on every call that does not pass it, and a changed field
+    of view selects a new ray grid. Pass the `camera_info` of an earlier call to skip the fetch while the field
+    of view stays the same.
+
+    Args:
+        client (VehicleClient, optional): Client to fetch the camera info with
+        max_grids (int, optional): Ray grids kept, the least recently used one is dropped first
+    """
+    def __init__(self, client=None, max_grids=8):
+        self.client = client
+        self.max_grids = max_grids
+        self._grids = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def rays(self, intrinsics, width, height, perspective=False):
+        """
+        Args:
+            intrinsics (np.ndarray): (3, 3) camera matrix, see `camera_intrinsics`
+            width (int): Width of the images in pixels
+            height (int): Height of the images in pixels
+            perspective (bool, optional): Unit length rays for `DepthPerspective` images, instead of rays with a
+                forward component of 1 for `DepthPlanar` images
+
+        Returns:
+            np.ndarray: (height, width, 3) float32 rays in the camera frame, shared between calls, do not modify
+        """
+        fx, fy, cx, cy = (float(intrinsics[0, 0]), float(intrinsics[1, 1]), float(intrinsics[0, 2]),
+                          float(intrinsics[1, 2]))
+        key = (width, height, fx, fy, cx, cy, perspective)
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                return grid
+        grid = np.empty((height, width, 3), dtype=np.float32)
+        grid[..., 0] = 1.0
+        grid[..., 1] = ((np.arange(width, dtype=np.float32) - cx) / fx)[np.newaxis, :]
+        grid[..., 2] = ((np.arange(height, dtype=np.float32) - cy) / fy)[:, np.newaxis]
+        if perspective:
+            grid /= np.linalg.norm(grid, axis=2, keepdims=True)
+        grid.setflags(write=False)
+        with self._lock:
+            self._grids[key] = grid
+            while len(self._grids) > self.max_grids:
+                self._grids.popitem(last=False)
+        return grid
+
+    def project(self, response, camera_name=None, vehicle_name='', camera_info=None, colors=None, frame='world',
+                max_depth=None):
+        """
+        Convert a depth image into a point cloud
+
+        Args:
+            response (ImageResponse): `DepthPlanar` or `DepthPerspective` response, requested with
+                `pixels_as_float`
+            camera_name (str, optional): Camera the image was taken with, to fetch its info
+            vehicle_name (str, optional): Vehicle of the camera
+            camera_info (CameraInfo, optional): Info of the camera, fetched with `simGetCameraInfo` when None
+            colors (ImageResponse | np.ndarray, optional): Uncompressed `Scene` response or (height, width,
+                channels) image of the same camera and size, giving the color of every point
+            frame (str, optional): 'world' for points in the world frame, using the camera pose of the response,
+                or 'camera' for points in the camera frame
+            max_depth (float, optional): Drop the points further than this depth, e.g. the sky
+
+        Returns:
+            np.ndarray | tuple: (N, 3) float32 points of the pixels with a valid depth, and their (N, channels)
+            colors when `colors` is given
+        """
+        if response.image_type not in (ImageType.DepthPlanar, ImageType.DepthPerspective):
+            raise ValueError("Image type {} is not a depth image".format(response.image_type))
+        if frame not in ('world', 'camera'):
+            raise ValueError("Unknown frame '{}', expected 'world' or 'camera'".format(frame))
+        if camera_info is None:
+            if self.client is None or camera_name is None:
+                raise ValueError("Either camera_info or a client and camera_name are needed")
+            camera_info = self.client.simGetCameraInfo(camera_name, vehicle_name)
+        width, height = response.width, response.height
+        depth = np.asarray(response.image_data_float, dtype=np.float32).reshape(height, width)
+        rays = self.rays(camera_intrinsics(camera_info, width, height), width, height,
+                         response.image_type == ImageType.DepthPerspective)
+
+        valid = np.isfinite(depth) & (depth > 0)
+        if max_depth is not None:
+            valid &= depth <= max_depth
+        valid = valid.ravel()
+        points = (rays * depth[..., np.newaxis]).reshape(-1, 3)
+        if not valid.all():
+            # np.compress selects rows much faster than boolean indexing
+            points = np.compress(valid, points, axis=0)
+        if frame == 'world':
+            position, orientation = response.camera_position, response.camera_orientation
+            points = transform_points((position.x_val, position.y_val, position.z_val),
+                                      (orientation.x_val, orientation.y_val, orientation.z_val, orientation.w_val),
+                                      points)
+        if colors is None:
+            return points
+        if not isinstance(colors, np.ndarray):
+            colors = np.frombuffer(colors.image_data_uint8, dtype=np.uint8).reshape(colors.height, colors.width, -1)
+        if colors.shape[:2] != depth.shape:
+            raise ValueError("Color image of {}x{} does not match the depth image of {}x{}".format(
+                colors.shape[1], colors.shape[0], width, height))
+        colors = colors.reshape(height * width, -1)
+        return points, colors if valid.all() else np.compress(valid, colors, axis=0)
+
+    def clear(self):
+        """
+        Drop the cached ray grids
+        """
+        with self._lock:
+            self._grids.clear()
+
+
+_default_projector = DepthProjector()
+
+
+def depth_to_points(response, camera_info, colors=None, frame='world', max_depth=None):
+    """
+    Convert a depth image into a point cloud with a shared `DepthProjector`
+
+    Args:
+        response (ImageResponse): `DepthPlanar` or `DepthPerspective` response, requested with `pixels_as_float`
+        camera_info (CameraInfo): Info of the camera the image was taken with, `simGetCameraInfo`
+        colors (ImageResponse | np.ndarray, optional): Uncompressed `Scene` image of the same camera and size
+        frame (str, optional): 'world' or 'camera', the frame of the points
+        max_depth (float, optional): Drop the points further than this depth
+
+    Returns:
+        np.ndarray | tuple: Points and their colors, see `DepthProjector.project`
+    """
+    return _default_projector.project(response, camera_info=camera_info, colors=colors, frame=frame,
+                                      max_depth=max_depth)
+
+
+def camera_transforms(responses):
+    """
+    Camera to world transforms of a set of images, from the camera pose stored in every response
+
+    Args:
+        responses (list[ImageResponse]): Responses of `simGetImages`
+
+    Returns:
+        np.ndarray: (N, 4, 4) homogeneous transforms of the camera frames into the world frame
+    """
+    transforms = np.zeros((len(responses), 4, 4))
+    transforms[:, :3, :3] = quaternions_to_rotation_matrices(
+        quaternions_to_array([response.camera_orientation for response in responses]))
+    transforms[:, :3, 3] = vectors_to_array([response.camera_position for response in responses])
+    transforms[:, 3, 3] = 1.0
+    return transforms
+
+
+def cameras_intrinsics(responses, camera_infos):
+    """
+    Camera matrices of a set of images, see `camera_intrinsics`
+
+    Args:
+        responses (list[ImageResponse]): Responses of `simGetImages`
+        camera_infos (CameraInfo | list[CameraInfo]): Info of the camera of every response, or of the camera
+            all images were taken with
+
+    Returns:
+        np.ndarray: (N, 3, 3) camera matrices
+    """
+    if not isinstance(camera_infos, (list, tuple)):
+        camera_infos = [camera_infos] * len(responses)
+    if len(camera_infos) != len(responses):
+        raise ValueError("{} camera infos for {} responses".format(len(camera_infos), len(responses)))
+    return np.stack([camera_intrinsics(camera_info, response.width, response.height)
+                     for response, camera_info in zip(responses, camera_infos)]).reshape(-1, 3, 3)
+
+
+def project_points(points, transforms, intrinsics, image_sizes=None):
+    """
+    Project world points into several cameras at once, e.g. to label the images of all cameras of a frame.
+
+    The world to pixel projections of the cameras are stacked so that all points are projected into all cameras
+    by a single matrix product.
+
+    Args:
+        points (np.ndarray): (M, 3) points in the world frame
+        transforms (np.ndarray): (N, 4, 4) camera to world transforms, see `camera_transforms`
+        intrinsics (np.ndarray): (N, 3, 3) camera matrices, see `cameras_intrinsics`
+        image_sizes (np.ndarray, optional): (N, 2) width and height of the images, to tell which points fall
+            inside them
+
+    Returns:
+        tuple: (N, M, 2) pixel coordinates, (N, M) depths along the optical axis of the cameras and (N, M) mask
+        of the points in front of the cameras, and inside their images when `image_sizes` is given
+    """
+    transforms = np.asarray(transforms, dtype=np.float64).reshape(-1, 4, 4)
+    intrinsics = np.asarray(intrinsics, dtype=np.float64).reshape(-1, 3, 3)
+    # camera matrix reordered for the x forward, y right, z down camera frame: (u w, v w, w) = (cx x + fx y,
+    # cy x + fy z, x)
+    pixel_from_camera = np.zeros((len(intrinsics), 3, 3))
+    pixel_from_camera[:, 0, 0] = intrinsics[:, 0, 2]
+    pixel_from_camera[:, 0, 1] = intrinsics[:, 0, 0]
+    pixel_from_camera[:, 1, 0] = intrinsics[:, 1, 2]
+    pixel_from_camera[:, 1, 2] = intrinsics[:, 1, 1]
+    pixel_from_camera[:, 2, 0] = 1.0
+    rotations = transforms[:, :3, :3].transpose(0, 2, 1)
+    world_to_camera = np.concatenate((rotations, -rotations @ transforms[:, :3, 3:]), axis=2)
+    projections = pixel_from_camera @ world_to_camera
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    homogeneous = np.concatenate((points, np.ones((len(points), 1))), axis=1)
+    # one (M, 4) x (4, 3 N) product for all cameras, kept (M, N) until returned
+    projected = (homogeneous @ projections.reshape(-1, 4).T).reshape(len(points), -1, 3)
+    depths = projected[..., 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pixels = projected[..., :2] / depths[..., np.newaxis]
+    visible = depths > 0
+    if image_sizes is not None:
+        sizes = np.asarray(image_sizes, dtype=np.float64).reshape(-1, 2) - 0.5
+        u, v = pixels[..., 0], pixels[..., 1]
+        with np.errstate(invalid='ignore'):
+            visible &= (u >= -0.5) & (u < sizes[:, 0]) & (v >= -0.5) & (v < sizes[:, 1])
+    pixels, depths, visible = pixels.transpose(1, 0, 2), depths.T, visible.T
+    return pixels, depths, visible
+
+
+def box3d_corners(boxes):
+    """
+    Args:
+        boxes (list[Box3D]): Boxes aligned with the axes of their frame, e.g. the `box3D` of `simGetDetections`
+            results
+
+    Returns:
+        np.ndarray: (B, 8, 3) corners of the boxes, in their frame
+    """
+    minima = vectors_to_array([box.min for box in boxes])
+    maxima = vectors_to_array([box.max for box in boxes])
+    select = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=bool)
+    return np.where(select, maxima[:, np.newaxis, :], minima[:, np.newaxis, :])
+
+
+def project_boxes(boxes, transforms, intrinsics, image_sizes, box_transform=None):
+    """
+    Label 3D boxes in several cameras at once with the 2D box enclosing their projected corners.
+
+    The boxes of `simGetDetections` are expressed in the frame of the camera they were detected with, whose camera
+    to world transform is passed as `box_transform`:
+
+        responses = client.simGetImages(requests)
+        transforms = airsim.camera_transforms(responses)
+        boxes = [detection.box3D for detection in client.simGetDetections("front", airsim.ImageType.Scene)]
+        rectangles, visible = airsim.project_boxes(boxes, transforms,
+                                                   airsim.cameras_intrinsics(responses, camera_infos),
+                                                   [(response.width, response.height) for response in responses],
+                                                   box_transform=transforms[0])
+
+    Args:
+        boxes (list[Box3D]): Boxes to label, e.g. the `box3D` of `simGetDetections` results
+        transforms (np.ndarray): (N, 4, 4) camera to world transforms, see `camera_transforms`
+        intrinsics (np.ndarray): (N, 3, 3) camera matrices, see `cameras_intrinsics`
+        image_sizes (np.ndarray): (N, 2) width and height of the images
+        box_transform (np.ndarray, optional): (4, 4) transform of the frame of the boxes into the world frame,
+            the boxes are in the world frame when None
+
+    Returns:
+        tuple: (N, B, 4) rectangles (x min, y min, x max, y max) in pixels clipped to the images, and (N, B) mask
+        of the boxes seen by each camera: entirely in front of it and overlapping its image
+    """
+    corners = box3d_corners(boxes).reshape(-1, 3)
+    if box_transform is not None:
+        box_transform = np.asarray(box_transform, dtype=np.float64)
+        corners = corners @ box_transform[:3, :3].T + box_transform[:3, 3]
+    pixels, depths, _ = project_points(corners, transforms, intrinsics)
+    pixels = pixels.reshape(len(pixels), -1, 8, 2)
+    in_front = np.all(depths.reshape(len(depths), -1, 8) > 0, axis=-1)
+    sizes = np.asarray(image_sizes, dtype=np.float64).reshape(-1, 1, 2)
+    with np.errstate(invalid='ignore'):
+        low = np.min(pixels, axis=2)
+        high = np.max(pixels, axis=2)
+        visible = in_front & np.all(high >= 0, axis=-1) & np.all(low <= sizes - 1, axis=-1)
+        rectangles = np.concatenate((np.clip(low, 0, sizes - 1), np.clip(high, 0, sizes - 1)), axis=-1)
+    return rectangles, visible
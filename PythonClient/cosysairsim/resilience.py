@@ -0,0 +1,239 @@
+import re
+import threading
+import time
+from msgpackrpc.error import RPCError, TransportError
+from .futures import _is_rpc_future, add_done_callback, wait_all
+from .transport import RpcFuture, ThreadedConnection, connection_transport
+
+# RPCs of the *Async tasks, which take as long as the movement they command
+TASK_METHODS = frozenset((
+    'goHome', 'hover', 'land', 'moveByAngleRatesThrottle', 'moveByAngleRatesZ', 'moveByManual', 'moveByMotorPWMs',
+    'moveByRollPitchYawThrottle', 'moveByRollPitchYawZ', 'moveByRollPitchYawrateThrottle', 'moveByRollPitchYawrateZ',
+    'moveByVelocity', 'moveByVelocityBodyFrame', 'moveByVelocityZ', 'moveByVelocityZBodyFrame', 'moveOnPath',
+    'moveToGPS', 'moveToPosition', 'moveToZ', 'rotateByYawRate', 'rotateToYaw', 'takeoff'))
+
+# queries that can be sent again after reconnecting without side effects
+_IDEMPOTENT = re.compile(r'^(ping|get|list|sim(Get|List|Is|Test))')
+
+
+class SimulatorUnavailable(ConnectionError):
+    """
+    The simulator could not be reached, did not respond in time or failed too often recently
+    """
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    An RPC did not complete within its deadline
+    """
+
+
+def _settle(future, lock, result=None, error=None):
+    # complete a future unless the deadline or the response completed it first
+    with lock:
+        if future.done():
+            return False
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    return True
+
+
+def _raise_error(error):
+    # msgpack-rpc futures wrap their errors in RPCError, keep DeadlineExceeded as it is
+    if isinstance(error, (DeadlineExceeded, RPCError)):
+        raise error
+    raise RPCError(error)
+
+
+class ResilientConnection:
+    """
+    Connection proxy bounding the time of every RPC and recovering from a simulator that hangs, crashes or
+    restarts, instead of waiting for the timeout of the connection.
+
+    - Every call must complete within the deadline of its method, `deadline` by default and `task_deadline` for
+      the RPCs of *Async tasks in `TASK_METHODS`, otherwise `DeadlineExceeded` is raised. The futures of
+      `call_async`, which batches, snapshots, fleets and the asyncio clients wait on, fail with it as well.
+    - A call that fails on the connection or exceeds its deadline is followed by a reconnect, after a delay
+      growing exponentially from `backoff` to `max_backoff`, up to `max_reconnects` times. Queries are sent again
+      on the new connection, commands are not since the simulator may have executed them. After a future of
+      `call_async` exceeded its deadline, the next call reconnects first.
+    - After `failure_threshold` consecutive failed calls the circuit opens: calls raise `SimulatorUnavailable`
+      right away for `reset_timeout` seconds, then the next call probes the simulator again.
+
+    Calls that cannot be completed raise `SimulatorUnavailable`, chained to the error of the last attempt.
+    See `VehicleClient.enable_resilience`.
+
+    Args:
+        connect (callable): Returns a new connection to the simulator
+        deadline (float, optional): Deadline of an RPC in seconds
+        task_deadline (float, optional): Deadline of the RPCs of *Async tasks in seconds, None for no deadline
+        deadlines (dict, optional): RPC method -> deadline in seconds or None, overriding the defaults
+        max_reconnects (int, optional): Reconnects per failed call
+        backoff (float, optional): Delay before the first reconnect in seconds, doubled for every next one
+        max_backoff (float, optional): Maximum delay before a reconnect in seconds
+        failure_threshold (int, optional): Consecutive failed calls opening the circuit
+        reset_timeout (float, optional): Time the circuit stays open in seconds
+    """
+    def __init__(self, connect, deadline=10.0, task_deadline=None, deadlines=None, max_reconnects=3, backoff=0.1,
+                 max_backoff=5.0, failure_threshold=3, reset_timeout=30.0):
+        self._connect = connect
+        self.deadline = deadline
+        self.task_deadline = task_deadline
+        self.deadlines = dict(deadlines or {})
+        self.max_reconnects = max_reconnects
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        # connection of a call_async future that exceeded its deadline, replaced on the next call
+        self._expired = None
+        self.reconnects = 0
+        self.connection = connect()
+
+    def _deadline(self, method):
+        if method in self.deadlines:
+            return self.deadlines[method]
+        return self.task_deadline if method in TASK_METHODS else self.deadline
+
+    def _check_circuit(self):
+        with self._lock:
+            if self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout:
+                raise SimulatorUnavailable("Circuit open after {} consecutive failures, retrying in {:.1f} s".format(
+                    self._failures, self.reset_timeout - (time.monotonic() - self._opened_at)))
+
+    def _record(self, success):
+        with self._lock:
+            if success:
+                self._failures = 0
+                self._opened_at = None
+            else:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._opened_at = time.monotonic()
+
+    def _reconnect(self, failed, delay=0.0):
+        time.sleep(delay)
+        with self._lock:
+            if self.connection is not failed:
+                # another thread reconnected already
+                return
+            connection = self._connect()
+            old_transport, transport = connection_transport(failed), connection_transport(connection)
+            if old_transport is not None and transport is not None:
+                # keep recording payload sizes when RPC statistics are enabled
+                transport.stats = old_transport.stats
+            self.connection = connection
+            self.reconnects += 1
+        try:
+            failed.close()
+        except Exception:
+            pass
+
+    def _replace_expired(self):
+        expired = self._expired
+        if expired is not None and expired is self.connection:
+            self._reconnect(expired)
+
+    def _bound(self, future, connection, method, deadline):
+        error = DeadlineExceeded("'{}' did not complete within {} s".format(method, deadline))
+        if _is_rpc_future(future):
+            # completed on the thread running the I/O loop of the plain connection while it waits for responses
+            ioloop = future._loop._ioloop
+
+            def expire():
+                if future._set_flag:
+                    return
+                # drop the request, so a late response does not replace the error
+                requests = getattr(connection, '_request_table', {})
+                for message_id, pending in list(requests.items()):
+                    if pending is future:
+                        del requests[message_id]
+                self._expired = connection
+                future.set_error(error)
+                future._loop.stop()
+            handle = ioloop.call_later(deadline, expire)
+            add_done_callback(future, lambda _: ioloop.remove_timeout(handle))
+            future.attach_error_handler(_raise_error)
+            return future
+        bounded, lock = RpcFuture(), threading.Lock()
+
+        def expire():
+            if _settle(bounded, lock, error=error):
+                self._expired = connection
+
+        def forward(future):
+            _settle(bounded, lock, None if future.exception() else future.result(), future.exception())
+        if isinstance(connection, ThreadedConnection):
+            connection.call_later(deadline, expire)
+        else:
+            timer = threading.Timer(deadline, expire)
+            timer.daemon = True
+            timer.start()
+            bounded.add_done_callback(lambda _: timer.cancel())
+        future.add_done_callback(forward)
+        return bounded
+
+    def _call_once(self, connection, method, args):
+        deadline = self._deadline(method)
+        if deadline is None:
+            return connection.call(method, *args)
+        future = connection.call_async(method, *args)
+        if wait_all([future], deadline)[1]:
+            raise DeadlineExceeded("'{}' did not complete within {} s".format(method, deadline))
+        return future.get()
+
+    def call(self, method, *args):
+        self._check_circuit()
+        self._replace_expired()
+        for attempt in range(self.max_reconnects + 1):
+            connection = self.connection
+            try:
+                result = self._call_once(connection, method, args)
+            except (TransportError, DeadlineExceeded, OSError) as error:
+                last_error = error
+                if attempt == self.max_reconnects or not _IDEMPOTENT.match(method):
+                    # leave a new connection for the next call
+                    self._reconnect(connection)
+                    break
+                self._reconnect(connection, min(self.backoff * 2 ** attempt, self.max_backoff))
+                continue
+            self._record(True)
+            return result
+        self._record(False)
+        raise SimulatorUnavailable("'{}' failed: {}".format(method, last_error)) from last_error
+
+    def call_async(self, method, *args):
+        self._check_circuit()
+        self._replace_expired()
+        connection = self.connection
+        try:
+            future = connection.call_async(method, *args)
+        except (TransportError, OSError) as error:
+            # the request was not sent, send it on a new connection
+            self._reconnect(connection)
+            connection = self.connection
+            try:
+                future = connection.call_async(method, *args)
+            except (TransportError, OSError):
+                self._record(False)
+                raise SimulatorUnavailable("'{}' failed: {}".format(method, error)) from error
+        deadline = self._deadline(method)
+        if deadline is not None:
+            future = self._bound(future, connection, method, deadline)
+
+        def done(future):
+            error = future.exception() if hasattr(future, 'exception') else future.error
+            self._record(not isinstance(error, (TransportError, OSError)))
+        add_done_callback(future, done)
+        return future
+
+    def close(self):
+        self.connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
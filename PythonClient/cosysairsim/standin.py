@@ -0,0 +1,567 @@
+import argparse
+import asyncio
+import struct
+import threading
+import time
+import zlib
+import msgpack
+import msgpackrpc
+import numpy as np
+from msgpackrpc.server import AsyncResult
+from msgpackrpc.transport import tcp
+from tornado import ioloop
+from tornado.iostream import StreamClosedError
+from .types import *
+from .utils import load_colormap
+
+
+def _encode_defaults(value):
+    """
+    msgpack map of the default field values of a type, shaped like the simulator sends it
+    """
+    if isinstance(value, type):
+        value = value()
+    if isinstance(value, MsgpackMixin):
+        fields = {name: field for name, field in vars(type(value)).items()
+                  if not name.startswith('_') and not callable(field)
+                  and not isinstance(field, (classmethod, staticmethod, property))}
+        fields.update(value._fields())
+        return {name: _encode_defaults(field) for name, field in fields.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_encode_defaults(item) for item in value]
+    return value
+
+
+def _png_bytes(pixels):
+    """
+    Minimal RGB png encoding of an (H, W, 3) uint8 array
+    """
+    height, width, _ = pixels.shape
+    rows = np.concatenate((np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)), axis=1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(rows.tobytes(), 1)) + chunk(b'IEND', b''))
+
+
+class StandInSimulator:
+    """
+    Pure-Python stand-in for the RPC surface of the simulator, serving synthetic data of a configurable size.
+
+    Every RPC of `VehicleClient`, `MultirotorClient`, `CarClient` and `ComputerVisionClient` is answered: sensor,
+    state and image getters with payloads shaped like the simulator's, listings with `object_count` objects, and
+    commands and setters with None. Payloads are built once and only their time stamps change between calls, so
+    the stand-in costs little next to the client it is measuring.
+
+    Vehicle poses set with `simSetVehiclePose` are returned by the later `simGetVehiclePose` calls and, as the
+    world pose of its cameras, by `simGetCameraInfo`.
+
+    Responses captured with `ResponseRecorder` are replayed instead of the synthetic ones for the methods they
+    cover, exact argument matches first and otherwise the recorded responses of the method in turn.
+
+    Args:
+        image_size (tuple, optional): (width, height) of the images
+        lidar_points (int, optional): Points of a lidar scan, [x, y, z] each
+        gpulidar_points (int, optional): Points of a GPU lidar scan, [x, y, z, rgb, intensity] each
+        echo_points (int, optional): Points of an echo scan, 6 floats each
+        object_count (int, optional): Objects of the scene listings, poses and detections
+        sensor_rate_hz (float, optional): Rate at which the sensor time stamps advance
+        frame_rate (float, optional): Frames per second of `simContinueForFrames`, which like
+            `simContinueForTime` runs the paused simulation for that long in wall-clock time
+        replay (str, optional): Path of a file recorded with `ResponseRecorder`
+    """
+    def __init__(self, image_size=(256, 144), lidar_points=10000, gpulidar_points=10000, echo_points=1000,
+                 object_count=100, sensor_rate_hz=10.0, frame_rate=60.0, replay=None):
+        self.image_size = image_size
+        self.lidar_points = lidar_points
+        self.gpulidar_points = gpulidar_points
+        self.echo_points = echo_points
+        self.object_count = object_count
+        self.sensor_rate_hz = sensor_rate_hz
+        self.frame_rate = frame_rate
+        self._paused = False
+        self._run_until = None
+        self._payloads = {}
+        self._images = {}
+        self._annotation_ids = {}
+        self._vehicle_poses = {}
+        self._replay = {}
+        self._replay_next = {}
+        if replay is not None:
+            self.load_replay(replay)
+
+    def load_replay(self, path):
+        """
+        Serve the responses recorded in a `ResponseRecorder` file
+
+        Args:
+            path (str): Path of the recording
+        """
+        with open(path, 'rb') as f:
+            for method, args, result in msgpack.Unpacker(f, raw=False):
+                by_args = self._replay.setdefault(method, ({}, []))
+                by_args[0].setdefault(msgpack.packb(args), []).append(result)
+                by_args[1].append(result)
+
+    def respond(self, method, args):
+        """
+        Returns:
+            Response of the RPC `method` called with `args`
+        """
+        if method in self._replay:
+            by_args, results = self._replay[method]
+            matches = by_args.get(msgpack.packb(list(args)), results)
+            index = self._replay_next.get((method, id(matches)), 0)
+            self._replay_next[(method, id(matches))] = index + 1
+            return matches[index % len(matches)]
+        handler = getattr(self, '_' + method, None)
+        if handler is not None:
+            return handler(*args)
+        if method in _TYPED_RESULTS:
+            return self._payload(method, lambda: _encode_defaults(_TYPED_RESULTS[method]))
+        return _CONSTANT_RESULTS.get(method)
+
+    def _payload(self, key, build):
+        payload = self._payloads.get(key)
+        if payload is None:
+            payload = self._payloads[key] = build()
+        return payload
+
+    def _sensor_time_stamp(self):
+        period_ns = int(1e9 / self.sensor_rate_hz)
+        return time.time_ns() // period_ns * period_ns
+
+    def _sensor(self, method, point_cloud=None):
+        def build():
+            payload = _encode_defaults(_TYPED_RESULTS[method])
+            if point_cloud is not None:
+                payload['point_cloud'] = np.linspace(-50.0, 50.0, point_cloud, dtype=np.float32).tolist()
+                if 'groundtruth' in payload:
+                    payload['groundtruth'] = []
+                if 'passive_beacons_point_cloud' in payload:
+                    payload['passive_beacons_point_cloud'] = []
+                    payload['passive_beacons_groundtruth'] = []
+            return payload
+        payload = dict(self._payload(method, build))
+        payload['time_stamp'] = self._sensor_time_stamp()
+        return payload
+
+    def _getImuData(self, *args):
+        return self._sensor('getImuData')
+
+    def _getBarometerData(self, *args):
+        return self._sensor('getBarometerData')
+
+    def _getMagnetometerData(self, *args):
+        return self._sensor('getMagnetometerData')
+
+    def _getGpsData(self, *args):
+        return self._sensor('getGpsData')
+
+    def _getDistanceSensorData(self, *args):
+        return self._sensor('getDistanceSensorData')
+
+    def _getLidarData(self, *args):
+        return self._sensor('getLidarData', 3 * self.lidar_points)
+
+    def _getGPULidarData(self, *args):
+        return self._sensor('getGPULidarData', 5 * self.gpulidar_points)
+
+    def _getEchoData(self, *args):
+        return self._sensor('getEchoData', 6 * self.echo_points)
+
+    def _getUWBSensorData(self, *args):
+        return self._sensor('getUWBSensorData')
+
+    def _getWifiSensorData(self, *args):
+        return self._sensor('getWifiSensorData')
+
+    def _image(self, image_type, pixels_as_float, compress):
+        key = (image_type, pixels_as_float, compress)
+        image = self._images.get(key)
+        if image is None:
+            width, height = self.image_size
+            if pixels_as_float:
+                image = np.linspace(1.0, 100.0, width * height, dtype=np.float32).tolist()
+            else:
+                rows, columns = np.indices((height, width))
+                if image_type in (ImageType.Segmentation, ImageType.Annotation):
+                    # blocks of object colors, so ID lookups have something to find
+                    ids = np.arange(max(self.object_count, 1))
+                    if image_type == ImageType.Annotation:
+                        for name, object_id in self._annotation_ids.items():
+                            ids[int(name.rsplit('_', 1)[1])] = object_id
+                    colors = load_colormap()[ids].astype(np.uint8)
+                    pixels = colors[(rows // 16 * (width // 16 + 1) + columns // 16) % len(colors)]
+                else:
+                    pixels = np.stack((columns % 256, rows % 256, (rows + columns) % 256), axis=-1).astype(np.uint8)
+                image = _png_bytes(pixels) if compress else pixels.tobytes()
+            self._images[key] = image
+        return image
+
+    def _simGetImages(self, requests, vehicle_name='', *args):
+        template = self._payload('simGetImages', lambda: _encode_defaults(ImageResponse))
+        width, height = self.image_size
+        responses = []
+        for request in requests:
+            response = dict(template)
+            image = self._image(request['image_type'], request['pixels_as_float'], request['compress'])
+            response.update(camera_name=request['camera_name'], image_type=request['image_type'],
+                            annotation_name=request.get('annotation_name', ''),
+                            pixels_as_float=request['pixels_as_float'], compress=request['compress'],
+                            width=width, height=height, time_stamp=time.time_ns(),
+                            image_data_uint8=b'' if request['pixels_as_float'] else image,
+                            image_data_float=image if request['pixels_as_float'] else [])
+            responses.append(response)
+        return responses
+
+    def _simGetImage(self, camera_name, image_type, *args):
+        return self._image(image_type, False, True)
+
+    def _object_names(self, prefix='object'):
+        return ['{}_{}'.format(prefix, index) for index in range(self.object_count)]
+
+    def _object_poses(self):
+        def build():
+            poses = []
+            for index in range(self.object_count):
+                pose = _encode_defaults(Pose)
+                pose['position'] = {'x_val': float(index % 100), 'y_val': float(index // 100), 'z_val': 0.0}
+                poses.append(pose)
+            return poses
+        return self._payload('object_poses', build)
+
+    def _simListInstanceSegmentationObjects(self):
+        return self._object_names()
+
+    def _simListInstanceSegmentationPoses(self, *args):
+        return self._object_poses()
+
+    def _simListAnnotationObjects(self, annotation_name):
+        return self._object_names()
+
+    def _simListAnnotationPoses(self, annotation_name, *args):
+        return self._object_poses()
+
+    def _simGetAnnotationObjectID(self, annotation_name, mesh_name):
+        # annotation layers are in index mode, with the object ID of the segmentation until one is set
+        if mesh_name not in self._object_names():
+            return -1
+        return self._annotation_ids.get(mesh_name, int(mesh_name.rsplit('_', 1)[1]))
+
+    def _simSetAnnotationObjectID(self, annotation_name, mesh_name, object_id, is_name_regex=False):
+        if mesh_name not in self._object_names():
+            return False
+        self._annotation_ids[mesh_name] = object_id
+        for key in [key for key in self._images if key[0] == ImageType.Annotation]:
+            del self._images[key]
+        return True
+
+    def _simListSceneObjects(self, name_regex='.*'):
+        return self._object_names()
+
+    def _simListAssets(self):
+        return self._object_names('asset')
+
+    def _simGetDetections(self, *args):
+        def build():
+            detections = []
+            for name in self._object_names():
+                detection = _encode_defaults(DetectionInfo)
+                detection['name'] = name
+                detections.append(detection)
+            return detections
+        return self._payload('simGetDetections', build)
+
+    def _simGetMeshPositionVertexBuffers(self):
+        def build():
+            mesh = _encode_defaults(MeshPositionVertexBuffersResponse)
+            mesh.update(name='mesh', vertices=np.zeros(3 * 1000, dtype=np.float32).tolist(),
+                        indices=list(range(999)))
+            return [mesh] * max(1, self.object_count // 10)
+        return self._payload('simGetMeshPositionVertexBuffers', build)
+
+    def _simSpawnObject(self, object_name, *args):
+        return object_name
+
+    def _simSetVehiclePose(self, pose, ignore_collision, vehicle_name=''):
+        self._vehicle_poses[vehicle_name] = pose
+
+    def _simGetVehiclePose(self, vehicle_name=''):
+        return self._vehicle_poses.get(vehicle_name) or self._payload('simGetVehiclePose',
+                                                                      lambda: _encode_defaults(Pose))
+
+    def _simGetCameraInfo(self, camera_name, vehicle_name='', *args):
+        info = self._payload('simGetCameraInfo', lambda: _encode_defaults(_CAMERA_INFO))
+        # cameras sit at the origin of their vehicle
+        return dict(info, pose=self._simGetVehiclePose(vehicle_name))
+
+    def _simPause(self, is_paused):
+        self._paused = is_paused
+        self._run_until = None
+
+    def _simIsPaused(self):
+        return self._paused and (self._run_until is None or time.monotonic() >= self._run_until)
+
+    def _simContinueForTime(self, seconds):
+        self._paused = True
+        self._run_until = time.monotonic() + seconds
+
+    def _simContinueForFrames(self, frames):
+        self._simContinueForTime(frames / self.frame_rate)
+
+
+_CAMERA_INFO = CameraInfo()
+_CAMERA_INFO.fov = 90.0
+
+# RPCs answered with the default values of their result type
+_TYPED_RESULTS = {
+    'getHomeGeoPoint': GeoPoint,
+    'simGetCollisionInfo': CollisionInfo,
+    'simGetVehiclePose': Pose,
+    'simGetObjectPose': Pose,
+    'simGetObjectScale': Vector3r(1.0, 1.0, 1.0),
+    'simGetCameraInfo': _CAMERA_INFO,
+    'simGetGroundTruthKinematics': KinematicsState,
+    'simGetGroundTruthEnvironment': EnvironmentState,
+    'getImuData': ImuData,
+    'getBarometerData': BarometerData,
+    'getMagnetometerData': MagnetometerData,
+    'getGpsData': GpsData,
+    'getDistanceSensorData': DistanceSensorData,
+    'getLidarData': LidarData,
+    'getGPULidarData': GPULidarData,
+    'getEchoData': EchoData,
+    'getUWBData': UwbData,
+    'getUWBSensorData': UwbSensorData,
+    'getWifiData': WifiData,
+    'getWifiSensorData': WifiSensorData,
+    'getMultirotorState': MultirotorState,
+    'getRotorStates': RotorStates,
+    'getCarState': CarState,
+    'getCarControls': CarControls,
+    'getComputerVisionState': ComputerVisionState,
+}
+
+# RPCs answered with a fixed value, all others with None
+_CONSTANT_RESULTS = {
+    'ping': True,
+    'getServerVersion': 3,
+    'getMinRequiredClientVersion': 3,
+    'isApiControlEnabled': True,
+    'armDisarm': True,
+    'isRecording': False,
+    'listVehicles': [''],
+    'getSettingsString': '{}',
+    'simGetWorldExtents': [_encode_defaults(GeoPoint), _encode_defaults(GeoPoint)],
+    'simGetSegmentationObjectID': 0,
+    'simSetSegmentationObjectID': True,
+    'simGetPresetLensSettings': [],
+    'simGetLensSettings': '',
+    'simGetPresetFilmbackSettings': [],
+    'simGetFilmbackSettings': '',
+    'simGetDistortionParams': [0.0, 0.0, 0.0, 0.0, 0.0],
+    'simTestLineOfSightToPoint': True,
+    'simTestLineOfSightBetweenPoints': True,
+    'simRunConsoleCommand': True,
+    'simLoadLevel': True,
+    'simDestroyObject': True,
+    'simSetObjectPose': True,
+    'simSetObjectScale': True,
+    'simCreateVoxelGrid': True,
+    'simAddVehicle': True,
+}
+
+
+class ResponseRecorder:
+    """
+    Connection proxy recording the responses of a real simulator for `StandInSimulator` to replay.
+
+    Wraps the connection of a client, `client.client = ResponseRecorder(client.client, "session.msgpack")`, and
+    appends every blocking call with its arguments and raw response to the file. *Async commands are passed
+    through without being recorded. Record with `typed_arrays=False` to capture the responses as sent.
+
+    Args:
+        connection: Connection of a client, its `client` attribute
+        path (str): File the calls are appended to
+    """
+    def __init__(self, connection, path):
+        self._connection = connection
+        self._file = open(path, 'ab')
+        self._packer = msgpack.Packer(default=self._encode)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        return value.to_msgpack()
+
+    def call(self, method, *args):
+        result = self._connection.call(method, *args)
+        with self._lock:
+            self._file.write(self._packer.pack([method, list(args), result]))
+        return result
+
+    def call_async(self, method, *args):
+        return self._connection.call_async(method, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        """
+        Close the recording and the wrapped connection
+        """
+        self._file.close()
+        self._connection.close()
+
+
+class _ServerSocket(tcp.ServerSocket):
+    def __init__(self, stream, transport):
+        super().__init__(stream, transport)
+        # floats go out as float32 like from the simulator, so payload sizes and typed decoding match
+        self._packer = msgpack.Packer(default=lambda x: x.to_msgpack(), use_single_float=True)
+
+
+class _MessagePackServer(tcp.MessagePackServer):
+    def handle_stream(self, stream, address):
+        _ServerSocket(stream, self._transport)
+
+
+class _ServerTransport(tcp.ServerTransport):
+    def listen(self, server):
+        self._server = server
+        self._mp_server = _MessagePackServer(self)
+        self._mp_server.listen(self._address.port, self._address.host)
+
+
+class _ServerBuilder:
+    ServerTransport = _ServerTransport
+
+
+class _Dispatcher:
+    """
+    msgpack-rpc dispatcher answering every method from the stand-in simulator, after the configured latency
+    """
+    def __init__(self, simulator, latency, latencies):
+        self._simulator = simulator
+        self._latency = latency
+        self._latencies = latencies or {}
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        latency = self._latencies.get(method, self._latency)
+
+        def dispatch(*args):
+            result = self._simulator.respond(method, args)
+            if latency <= 0:
+                return result
+            # answered later without blocking the loop, so pipelined calls overlap as on the simulator
+            delayed = AsyncResult()
+
+            async def respond():
+                try:
+                    await delayed.set_result(result)
+                except StreamClosedError:
+                    # the client disconnected before the response was due, e.g. after its deadline expired
+                    pass
+            loop = asyncio.get_event_loop()
+            loop.call_later(latency, lambda: loop.create_task(respond()))
+            return delayed
+        return dispatch
+
+
+class StandInServer:
+    """
+    msgpack-rpc server answering clients from a `StandInSimulator`, in place of the simulator
+
+        with StandInServer(StandInSimulator(lidar_points=100000), port=41451, latency=0.001):
+            client = MultirotorClient()
+            client.getLidarData()
+
+    Args:
+        simulator (StandInSimulator, optional): Source of the responses, default settings when None
+        ip (str, optional): IP address to listen on, localhost when empty
+        port (int, optional): RPC port to listen on
+        latency (float, optional): Delay of every response in seconds
+        latencies (dict, optional): RPC method -> delay of its responses in seconds, overriding `latency`
+    """
+    def __init__(self, simulator=None, ip="", port=41451, latency=0.0, latencies=None):
+        self.simulator = simulator if simulator is not None else StandInSimulator()
+        self._address = msgpackrpc.Address(ip or "127.0.0.1", port)
+        self._dispatcher = _Dispatcher(self.simulator, latency, latencies)
+        self._thread = None
+        self._ioloop = None
+        self._started = threading.Event()
+
+    def serve_forever(self):
+        """
+        Serve on the calling thread until `stop()` is called
+        """
+        server = msgpackrpc.Server(self._dispatcher, loop=msgpackrpc.Loop(), builder=_ServerBuilder)
+        server.listen(self._address)
+        self._ioloop = ioloop.IOLoop.current()
+        self._ioloop.add_callback(self._started.set)
+        server.start()
+        server.close()
+
+    def start(self):
+        """
+        Serve from a background thread
+
+        Returns:
+            StandInServer: This server, listening once the call returns
+        """
+        def run():
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            self.serve_forever()
+        self._thread = threading.Thread(target=run, name="cosysairsim-standin", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        """
+        Stop serving
+        """
+        if self._ioloop is not None:
+            self._ioloop.add_callback(self._ioloop.stop)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start() if self._thread is None else self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Stand-in simulator serving synthetic data to Cosys-AirSim clients")
+    parser.add_argument('--ip', default="", help="IP address to listen on, localhost by default")
+    parser.add_argument('--port', type=int, default=41451)
+    parser.add_argument('--image-size', default="256x144", help="WIDTHxHEIGHT of the images")
+    parser.add_argument('--lidar-points', type=int, default=10000)
+    parser.add_argument('--gpulidar-points', type=int, default=10000)
+    parser.add_argument('--echo-points', type=int, default=1000)
+    parser.add_argument('--objects', type=int, default=100, help="objects of the scene listings")
+    parser.add_argument('--sensor-rate', type=float, default=10.0, help="sensor update rate in Hz")
+    parser.add_argument('--latency', type=float, default=0.0, help="delay of every response in seconds")
+    parser.add_argument('--replay', help="file recorded with ResponseRecorder to serve")
+    args = parser.parse_args()
+    width, height = (int(size) for size in args.image_size.lower().split('x'))
+    simulator = StandInSimulator((width, height), args.lidar_points, args.gpulidar_points, args.echo_points,
+                                 args.objects, args.sensor_rate, replay=args.replay)
+    server = StandInServer(simulator, args.ip, args.port, args.latency)
+    print("Stand-in simulator listening on {}:{}".format(server._address.host, args.port))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    _main()
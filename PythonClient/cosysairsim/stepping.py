@@ -0,0 +1,144 @@
+import time
+from .batch import SensorSnapshot
+
+
+def wait_for_pause(client, timeout=30.0, poll_interval=0.001):
+    """
+    Wait for the simulation to pause again after `simContinueForTime` or `simContinueForFrames`
+
+    Args:
+        client (VehicleClient): Client of the simulation
+        timeout (float, optional): Maximum time to wait in seconds, `TimeoutError` is raised when it expires
+        poll_interval (float, optional): Time between two `simIsPause` queries in seconds
+    """
+    deadline = time.monotonic() + timeout
+    while not client.simIsPause():
+        if time.monotonic() >= deadline:
+            raise TimeoutError("Simulation did not pause within {} s".format(timeout))
+        time.sleep(poll_interval)
+
+
+class LockstepCapture:
+    """
+    Deterministic capture of a paused simulation, advanced by a fixed step between two captures.
+
+    The simulation is paused on `start()`, or when entering the `with` block. Every `step()` lets it run for
+    `dt` seconds or `frames` frames, waits for it to pause again and fetches the declared snapshots, all in a
+    single batch. The data of a step is thus captured at the same simulation time, however long fetching takes:
+
+        snapshot = airsim.SensorSnapshot("Drone1", sensors={"Imu": "imu"}, image_requests=requests)
+        with airsim.LockstepCapture(client, snapshot, dt=0.05) as capture:
+            for data in capture.steps(100):
+                process(data["pose"], data["Imu"], data["images"])
+
+    `replay()` sets the vehicle to every pose of a route in turn and captures it. The pause state the
+    simulation had before `start()` is restored on `close()`.
+
+    Args:
+        client (VehicleClient): Client of the simulation
+        snapshots (SensorSnapshot | list[SensorSnapshot]): Data captured at every step
+        dt (float, optional): Simulation time of a step in seconds, `simContinueForTime`
+        frames (int, optional): Frames of a step, `simContinueForFrames`, instead of `dt`
+        poll_interval (float, optional): Time between two `simIsPause` queries in seconds
+        timeout (float, optional): Maximum time for the simulation to pause after a step in seconds
+    """
+    def __init__(self, client, snapshots, dt=None, frames=None, poll_interval=0.001, timeout=30.0):
+        if (dt is None) == (frames is None):
+            raise ValueError("Exactly one of dt and frames must be given")
+        self.client = client
+        self._single = isinstance(snapshots, SensorSnapshot)
+        self.snapshots = [snapshots] if self._single else list(snapshots)
+        self.dt = dt
+        self.frames = frames
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.step_count = 0
+        self._was_paused = None
+
+    def start(self):
+        """
+        Pause the simulation
+        """
+        if self._was_paused is None:
+            self._was_paused = self.client.simIsPause()
+            self.client.simPause(True)
+
+    def advance(self):
+        """
+        Let the simulation run for one step and wait for it to pause again, without capturing
+        """
+        self.start()
+        if self.frames is not None:
+            self.client.simContinueForFrames(self.frames)
+        else:
+            self.client.simContinueForTime(self.dt)
+        wait_for_pause(self.client, self.timeout, self.poll_interval)
+        self.step_count += 1
+
+    def capture(self):
+        """
+        Fetch the snapshots of the paused simulation in a single batch
+
+        Returns:
+            dict | list[dict]: Data of the snapshot, see `SensorSnapshot.fetch`, or list of the data of every
+            snapshot when several were given
+        """
+        with self.client.batch() as batch:
+            results = [[getattr(batch, method)(*args) for _, method, args in snapshot.calls]
+                       for snapshot in self.snapshots]
+        data = [{key: result.result() for (key, _, _), result in zip(snapshot.calls, snapshot_results)}
+                for snapshot, snapshot_results in zip(self.snapshots, results)]
+        return data[0] if self._single else data
+
+    def step(self):
+        """
+        Advance the simulation by one step and capture it
+
+        Returns:
+            dict | list[dict]: Captured data, see `capture`
+        """
+        self.advance()
+        return self.capture()
+
+    def steps(self, count):
+        """
+        Yields:
+            dict | list[dict]: Captured data of `count` consecutive steps
+        """
+        for _ in range(count):
+            yield self.step()
+
+    def __iter__(self):
+        while True:
+            yield self.step()
+
+    def replay(self, poses, vehicle_name=''):
+        """
+        Move the vehicle along a route, capturing every pose one step after setting it
+
+        Args:
+            poses (iterable[Pose]): Poses of the route
+            vehicle_name (str, optional): Name of the vehicle moved
+
+        Yields:
+            tuple: (pose, captured data)
+        """
+        for pose in poses:
+            self.start()
+            self.client.simSetVehiclePose(pose, True, vehicle_name)
+            yield pose, self.step()
+
+    def close(self):
+        """
+        Restore the pause state the simulation had before `start()`
+        """
+        if self._was_paused is not None:
+            self.client.simPause(self._was_paused)
+            self._was_paused = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,126 @@
+import collections
+import queue
+import threading
+import time
+from .batch import SENSOR_GETTERS
+
+
+class SensorSubscription:
+    """
+    Stream of the new samples of one sensor, polled by a background thread.
+
+    The sensor is polled at `rate_hz` and a sample is only buffered when its `time_stamp` differs from the one of
+    the previous sample, so consumers never see the same measurement twice. At most `buffer_size` samples are kept,
+    the oldest one is dropped when a new sample arrives on a full buffer and counted in `dropped`.
+
+    Samples are read with `get()` or by iterating over the subscription, which ends once it is closed:
+
+        with client.subscribe('gpulidar', 'LidarSensor1', 'Drone1', rate_hz=10) as lidar:
+            for data in lidar:
+                process(data.point_cloud)
+
+    Args:
+        client (VehicleClient): Thread-safe client the sensor is polled with
+        sensor_kind (str): Kind of the sensor, one of the keys of `SENSOR_GETTERS`
+        sensor_name (str, optional): Name of the sensor
+        vehicle_name (str, optional): Name of the vehicle the sensor is attached to
+        rate_hz (float, optional): Polling rate in Hz
+        buffer_size (int, optional): Maximum number of samples kept until they are read
+        owns_client (bool, optional): Close the connection of `client` when the subscription is closed
+    """
+    def __init__(self, client, sensor_kind, sensor_name='', vehicle_name='', rate_hz=10.0, buffer_size=16,
+                 owns_client=False):
+        if sensor_kind not in SENSOR_GETTERS:
+            raise ValueError("Unknown sensor kind '{}'".format(sensor_kind))
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self._client = client
+        self._getter = getattr(client, SENSOR_GETTERS[sensor_kind])
+        self._sensor_name = sensor_name
+        self._vehicle_name = vehicle_name
+        self._period = 1.0 / rate_hz
+        self._owns_client = owns_client
+        self._samples = collections.deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._closed = threading.Event()
+        self._finished = False
+        self._error = None
+        self.dropped = 0
+        self.received = 0
+        self._thread = threading.Thread(target=self._run, name="cosysairsim-subscription", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last_time_stamp = None
+        next_poll = time.monotonic()
+        try:
+            while not self._closed.is_set():
+                sample = self._getter(self._sensor_name, self._vehicle_name)
+                if sample.time_stamp != last_time_stamp:
+                    last_time_stamp = sample.time_stamp
+                    self._push(sample)
+                next_poll += self._period
+                delay = next_poll - time.monotonic()
+                if delay < 0:
+                    # polling is slower than the requested rate, do not try to catch up
+                    next_poll -= delay
+                    delay = 0
+                self._closed.wait(delay)
+        except Exception as error:
+            if not self._closed.is_set():
+                self._error = error
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def _push(self, sample):
+        with self._condition:
+            if len(self._samples) == self._samples.maxlen:
+                self.dropped += 1
+            self._samples.append(sample)
+            self.received += 1
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Wait for the next new sample
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds, waits indefinitely when None
+
+        Returns:
+            Next sample, e.g. `LidarData` for a lidar subscription. `queue.Empty` is raised when no sample arrived
+            in time or the subscription is closed, the error that stopped polling is raised if any.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._samples or self._finished, timeout):
+                raise queue.Empty()
+            if self._samples:
+                return self._samples.popleft()
+            if self._error is not None:
+                raise self._error
+            raise queue.Empty()
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except queue.Empty:
+                return
+
+    def close(self):
+        """
+        Stop polling, samples already buffered can still be read
+        """
+        self._closed.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        if self._owns_client:
+            self._client.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
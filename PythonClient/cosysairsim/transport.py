@@ -0,0 +1,357 @@
+import sys
+import time
+import asyncio
+import threading
+import concurrent.futures
+import msgpack
+import msgpackrpc
+import numpy as np
+from msgpackrpc.message import REQUEST, RESPONSE
+from msgpackrpc.transport import tcp
+from tornado import ioloop
+from tornado.iostream import IOStream
+
+# RPC methods whose results carry large float arrays: method -> (result is a list of maps, float array fields)
+TYPED_FLOAT_FIELDS = {
+    'simGetImages': (True, ('image_data_float',)),
+    'getLidarData': (False, ('point_cloud',)),
+    'getGPULidarData': (False, ('point_cloud',)),
+    'getEchoData': (False, ('point_cloud', 'passive_beacons_point_cloud')),
+    'simGetMeshPositionVertexBuffers': (True, ('vertices',)),
+}
+
+# msgpack type byte of a float element -> record layout of one encoded element
+_FLOAT_RECORDS = {
+    0xca: np.dtype([('tag', 'u1'), ('value', '>f4')]),
+    0xcb: np.dtype([('tag', 'u1'), ('value', '>f8')]),
+}
+
+
+class TransportBuilder:
+    """
+    Transport builder for `msgpackrpc.Client`, used in place of the default `msgpackrpc.transport.tcp` module.
+
+    Responses of the methods listed in `typed_fields` are decoded with their float arrays read straight into
+    contiguous `np.float32` buffers instead of Python lists of boxed floats. All other responses are decoded
+    exactly as by the default transport.
+
+    Args:
+        typed_fields (dict, optional): method -> (result is a list of maps, float array fields),
+            see `TYPED_FLOAT_FIELDS`. No typed decoding is done when empty.
+    """
+    def __init__(self, typed_fields=None):
+        self.typed_fields = typed_fields or {}
+
+    # named after the class the msgpackrpc session expects to find on its builder
+    def ClientTransport(self, session, address, reconnect_limit):
+        return ClientTransport(session, address, reconnect_limit, self.typed_fields)
+
+
+class ClientTransport(tcp.ClientTransport):
+    def __init__(self, session, address, reconnect_limit, typed_fields=None):
+        tcp.ClientTransport.__init__(self, session, address, reconnect_limit)
+        self.typed_fields = typed_fields or {}
+        self._typed_requests = {}
+        # RpcStats receiving payload sizes and decode times, see InstrumentedConnection
+        self.stats = None
+        self._stats_requests = {}
+
+    async def send_message(self, message):
+        if message[0] == REQUEST and message[2] in self.typed_fields:
+            self._typed_requests[message[1]] = self.typed_fields[message[2]]
+        await tcp.ClientTransport.send_message(self, message)
+
+    async def connect(self):
+        stream = IOStream(self._address.socket())
+        socket = ClientSocket(stream, self)
+        await socket.connect()
+
+    def pop_typed_fields(self, msgid):
+        return self._typed_requests.pop(msgid, None)
+
+    def track_request(self, message, size):
+        if self.stats is not None and message[0] == REQUEST:
+            self._stats_requests[message[1]] = message[2]
+            self.stats.record_request(message[2], size)
+
+    def track_response(self, message, size, decode_time):
+        method = self._stats_requests.pop(message[1], None) if message[0] == RESPONSE else None
+        if self.stats is not None and method is not None:
+            self.stats.record_response(method, size, decode_time)
+
+
+class ClientSocket(tcp.ClientSocket):
+    """
+    Client socket decoding the incoming stream message by message with a resumable parser, so that the float
+    arrays of typed responses can be read as raw bytes and converted with NumPy in one go.
+    """
+    def __init__(self, stream, transport):
+        tcp.ClientSocket.__init__(self, stream, transport)
+        self._parser = None
+        # stream position of the start of the unpacker buffer and of the message being parsed
+        self._offset = 0
+        self._message_start = 0
+        self._decode_time = 0.0
+
+    async def send_message(self, message):
+        packed = self._packer.pack(message)
+        if self._transport.stats is not None:
+            self._transport.track_request(message, len(packed))
+        await self._stream.write(packed)
+
+    async def on_read(self, data):
+        if not data:
+            return
+        self._unpacker.feed(data)
+        timed = self._transport.stats is not None
+        while True:
+            if self._parser is None:
+                self._parser = self._parse_message()
+                self._message_start = self._offset + self._unpacker.tell()
+                self._decode_time = 0.0
+            start = time.perf_counter() if timed else 0.0
+            try:
+                next(self._parser)
+                if timed:
+                    self._decode_time += time.perf_counter() - start
+                return  # waiting for more data
+            except StopIteration as parsed:
+                self._parser = None
+                if timed:
+                    self._decode_time += time.perf_counter() - start
+                    self._transport.track_response(parsed.value, self._offset + self._unpacker.tell() -
+                                                   self._message_start, self._decode_time)
+                await self.on_message(parsed.value)
+
+    # The parser is a generator that yields whenever the buffered data runs out and resumes the same
+    # read once more data has been fed. An interrupted msgpack read keeps its partial state, so retrying is safe.
+
+    def _retry(self, read):
+        while True:
+            try:
+                return read()
+            except msgpack.OutOfData:
+                yield
+
+    def _unpack(self):
+        return (yield from self._retry(lambda: self._unpacker.unpack()))
+
+    def _read_bytes(self, size):
+        chunks = []
+        while size > 0:
+            chunk = self._unpacker.read_bytes(size)
+            if chunk:
+                chunks.append(chunk)
+                size -= len(chunk)
+            else:
+                yield
+        return b''.join(chunks)
+
+    def _parse_message(self):
+        size = yield from self._retry(lambda: self._unpacker.read_array_header())
+        if size != 4:
+            fields = []
+            for _ in range(size):
+                fields.append((yield from self._unpack()))
+            return fields
+        msgtype = yield from self._unpack()
+        msgid = yield from self._unpack()
+        error = yield from self._unpack()
+        typed = self._transport.pop_typed_fields(msgid) if msgtype == RESPONSE else None
+        if typed is None or error is not None:
+            result = yield from self._unpack()
+        else:
+            result = yield from self._parse_typed_result(*typed)
+        return [msgtype, msgid, error, result]
+
+    def _parse_typed_result(self, is_list, float_fields):
+        if not is_list:
+            return (yield from self._parse_typed_map(float_fields))
+        count = yield from self._retry(lambda: self._unpacker.read_array_header())
+        result = []
+        for _ in range(count):
+            result.append((yield from self._parse_typed_map(float_fields)))
+        return result
+
+    def _parse_typed_map(self, float_fields):
+        size = yield from self._retry(lambda: self._unpacker.read_map_header())
+        result = {}
+        for _ in range(size):
+            key = yield from self._unpack()
+            if key in float_fields:
+                result[key] = yield from self._parse_float_array()
+            else:
+                result[key] = yield from self._unpack()
+        return result
+
+    def _parse_float_array(self):
+        count = yield from self._retry(lambda: self._unpacker.read_array_header())
+        if count == 0:
+            return np.empty(0, dtype=np.float32)
+        head = yield from self._read_bytes(1)
+        record = _FLOAT_RECORDS.get(head[0])
+        if record is None:
+            self._restart_unpacker(head)
+            return (yield from self._parse_float_elements(np.empty(0, dtype=np.float32), count))
+
+        raw = head + (yield from self._read_bytes(count * record.itemsize - 1))
+        elements = np.frombuffer(raw, dtype=record)
+        mismatch = np.flatnonzero(elements['tag'] != head[0])
+        if mismatch.size == 0:
+            return elements['value'].astype(np.float32)
+
+        # mixed element encodings: keep the uniform prefix, hand the bytes read past it back to the unpacker
+        uniform = mismatch[0]
+        self._restart_unpacker(raw[uniform * record.itemsize:])
+        return (yield from self._parse_float_elements(elements['value'][:uniform].astype(np.float32),
+                                                      count - uniform))
+
+    def _parse_float_elements(self, values, count):
+        rest = []
+        for _ in range(count):
+            rest.append((yield from self._unpack()))
+        return np.concatenate((values, np.asarray(rest, dtype=np.float32)))
+
+    def _restart_unpacker(self, prefix):
+        buffered = self._unpacker.read_bytes(sys.maxsize)
+        self._offset += self._unpacker.tell() - len(prefix) - len(buffered)
+        self._unpacker = msgpack.Unpacker()
+        self._unpacker.feed(prefix + buffered)
+
+
+class RpcFuture(concurrent.futures.Future):
+    """
+    `concurrent.futures.Future` of an RPC call, also offering the `join()` / `get()` interface of msgpack-rpc
+    futures so it can be used wherever the client returns those.
+    """
+    def join(self):
+        self.exception()
+
+    def get(self):
+        return self.result()
+
+
+def connection_transport(connection):
+    """
+    Returns:
+        ClientTransport: Transport of a plain msgpack-rpc or `ThreadedConnection` connection, None for others
+    """
+    if isinstance(connection, ThreadedConnection):
+        return connection.transport
+    return getattr(connection, '_transport', None)
+
+
+class ThreadedConnection:
+    """
+    msgpack-rpc connection driven by its own I/O thread, safe to share between threads.
+
+    Calls from any thread are handed to the I/O thread and sent on the single underlying connection without
+    waiting for earlier calls to complete, so many requests can be in flight at once. `call` blocks the calling
+    thread until its response has arrived, `call_async` returns an `RpcFuture` right away.
+
+    Args:
+        ip (str): IP address of the simulator
+        port (int): RPC port of the simulator
+        timeout_value (int): Timeout of a single RPC call in seconds
+        typed_fields (dict, optional): Typed float array decoding, see `TransportBuilder`
+    """
+    def __init__(self, ip, port, timeout_value, typed_fields=None):
+        self._address = msgpackrpc.Address(ip, port)
+        self._timeout = timeout_value
+        self._typed_fields = typed_fields
+        self._closed = False
+        self._pending_lock = threading.Lock()
+        self._pending = 0
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cosysairsim-rpc", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self._ioloop = ioloop.IOLoop.current()
+        self._client = msgpackrpc.Client(self._address, timeout=self._timeout, loop=msgpackrpc.Loop(),
+                                         builder=TransportBuilder(self._typed_fields))
+        self._started.set()
+        # the msgpack-rpc session stops the loop after every response, keep it going until closed
+        while not self._closed:
+            self._ioloop.start()
+        loop = asyncio.get_event_loop()
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._ioloop.close(all_fds=True)
+
+    def _send(self, future, method, args):
+        try:
+            rpc_future = self._client.call_async(method, *args)
+        except Exception as error:
+            self._resolve(future, None, error)
+            return
+        rpc_future.attach_callback(lambda done: self._resolve(future, done))
+
+    def _resolve(self, future, rpc_future, error=None):
+        with self._pending_lock:
+            self._pending -= 1
+        if error is not None:
+            future.set_exception(error)
+        elif rpc_future.error is None:
+            future.set_result(rpc_future.result)
+        elif isinstance(rpc_future.error, msgpackrpc.error.RPCError):
+            future.set_exception(rpc_future.error)
+        else:
+            future.set_exception(msgpackrpc.error.RPCError(rpc_future.error))
+
+    def call(self, method, *args):
+        return self.call_async(method, *args).result()
+
+    def call_async(self, method, *args):
+        if self._closed:
+            raise msgpackrpc.error.TransportError("Client is closed, connection could not be set")
+        future = RpcFuture()
+        with self._pending_lock:
+            self._pending += 1
+        self._ioloop.add_callback(self._send, future, method, args)
+        return future
+
+    def call_later(self, delay, callback):
+        """
+        Run `callback()` on the I/O thread after `delay` seconds
+        """
+        self._ioloop.add_callback(self._ioloop.call_later, delay, callback)
+
+    @property
+    def transport(self):
+        """
+        `ClientTransport` of the connection
+        """
+        return self._client._transport
+
+    @property
+    def address(self):
+        """
+        Address of the simulator, as `msgpackrpc.Client.address`
+        """
+        return self._address
+
+    @property
+    def pending(self):
+        """
+        Number of calls sent on this connection that have not completed yet
+        """
+        return self._pending
+
+    def close(self):
+        """
+        Close the connection and stop its I/O thread
+        """
+        if self._closed:
+            return
+        self._ioloop.add_callback(self._shutdown)
+        self._thread.join()
+
+    def _shutdown(self):
+        self._closed = True
+        self._client.close()
+        self._ioloop.stop()
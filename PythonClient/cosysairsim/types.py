@@ -2,12 +2,20 @@ import numpy as np
 import math
 
 class MsgpackMixin:
+    __slots__ = ()
+
+    def _fields(self):
+        # compact value types keep their fields in __slots__ instead of an instance __dict__
+        if hasattr(self, '__dict__'):
+            return self.__dict__
+        return {name: getattr(self, name) for name in self.__slots__}
+
     def __repr__(self):
         from pprint import pformat
-        return "<" + type(self).__name__ + "> " + pformat(vars(self), indent=4, width=1)
+        return "<" + type(self).__name__ + "> " + pformat(self._fields(), indent=4, width=1)
 
     def to_msgpack(self, *args, **kwargs):
-        return self.__dict__
+        return self._fields()
 
     @classmethod
     def from_msgpack(cls, encoded):
@@ -70,6 +78,11 @@ class ImageType(metaclass=_ImageType):
     OpticalFlowVis = 9
     Annotation = 10
 
+class AnnotationType:
+    RGB = 0
+    Greyscale = 1
+    Texture = 2
+
 class DrivetrainType:
     MaxDegreeOfFreedom = 0
     ForwardOnly = 1
@@ -90,23 +103,28 @@ class WeatherParameter:
     Enabled = 8
 
 class Vector2r(MsgpackMixin):
-    x_val = 0.0
-    y_val = 0.0
+    __slots__ = ('x_val', 'y_val')
 
     def __init__(self, x_val = 0.0, y_val = 0.0):
         self.x_val = x_val
         self.y_val = y_val
 
+    @classmethod
+    def from_msgpack(cls, encoded):
+        return cls(encoded.get('x_val', 0.0), encoded.get('y_val', 0.0))
+
 class Vector3r(MsgpackMixin):
-    x_val = 0.0
-    y_val = 0.0
-    z_val = 0.0
+    __slots__ = ('x_val', 'y_val', 'z_val')
 
     def __init__(self, x_val=0.0, y_val=0.0, z_val=0.0):
         self.x_val = x_val
         self.y_val = y_val
         self.z_val = z_val
 
+    @classmethod
+    def from_msgpack(cls, encoded):
+        return cls(encoded.get('x_val', 0.0), encoded.get('y_val', 0.0), encoded.get('z_val', 0.0))
+
     @staticmethod
     def nanVector3r():
         return Vector3r(np.nan, np.nan, np.nan)
@@ -161,10 +179,7 @@ class Vector3r(MsgpackMixin):
         return iter((self.x_val, self.y_val, self.z_val))
 
 class Quaternionr(MsgpackMixin):
-    w_val = 0.0
-    x_val = 0.0
-    y_val = 0.0
-    z_val = 0.0
+    __slots__ = ('w_val', 'x_val', 'y_val', 'z_val')
 
     def __init__(self, x_val = 0.0, y_val = 0.0, z_val = 0.0, w_val = 1.0):
         self.x_val = x_val
@@ -172,6 +187,11 @@ class Quaternionr(MsgpackMixin):
         self.z_val = z_val
         self.w_val = w_val
 
+    @classmethod
+    def from_msgpack(cls, encoded):
+        return cls(encoded.get('x_val', 0.0), encoded.get('y_val', 0.0), encoded.get('z_val', 0.0),
+                   encoded.get('w_val', 1.0))
+
     @staticmethod
     def nanQuaternionr():
         return Quaternionr(np.nan, np.nan, np.nan, np.nan)
@@ -256,8 +276,7 @@ class Quaternionr(MsgpackMixin):
         return iter((self.x_val, self.y_val, self.z_val, self.w_val))
 
 class Pose(MsgpackMixin):
-    position = Vector3r()
-    orientation = Quaternionr()
+    __slots__ = ('position', 'orientation')
 
     def __init__(self, position_val = None, orientation_val = None):
         position_val = position_val if position_val is not None else Vector3r()
@@ -265,6 +284,12 @@ class Pose(MsgpackMixin):
         self.position = position_val
         self.orientation = orientation_val
 
+    @classmethod
+    def from_msgpack(cls, encoded):
+        # fields missing from the response keep their defaults, like the generic `MsgpackMixin.from_msgpack`
+        return cls(Vector3r.from_msgpack(encoded.get('position', {})),
+                   Quaternionr.from_msgpack(encoded.get('orientation', {})))
+
     @staticmethod
     def nanPose():
         return Pose(Vector3r.nanVector3r(), Quaternionr.nanQuaternionr())
@@ -360,6 +385,38 @@ class ImageResponse(MsgpackMixin):
     image_type = ImageType.Scene
     annotation_name = ""
 
+    @classmethod
+    def from_msgpack_numpy(cls, encoded):
+        """
+        Build an ImageResponse with its pixel buffers decoded to NumPy arrays
+
+        `image_data_uint8` becomes a read-only `np.frombuffer` view over the received bytes (no copy), shaped
+        (height, width, channels) for uncompressed images and left flat for compressed (png) ones.
+        `image_data_float` becomes a float32 array shaped (height, width).
+
+        Args:
+            encoded (dict): Raw msgpack map of a single image response
+
+        Returns:
+            ImageResponse: Response with NumPy pixel buffers
+        """
+        obj = cls()
+        obj.__dict__.update(encoded)
+        obj.camera_position = Vector3r.from_msgpack(encoded['camera_position'])
+        obj.camera_orientation = Quaternionr.from_msgpack(encoded['camera_orientation'])
+
+        pixels = obj.height * obj.width
+        image_data_uint8 = np.frombuffer(encoded['image_data_uint8'], dtype=np.uint8)
+        if not obj.compress and pixels > 0 and image_data_uint8.size > 0 and image_data_uint8.size % pixels == 0:
+            image_data_uint8 = image_data_uint8.reshape(obj.height, obj.width, image_data_uint8.size // pixels)
+        obj.image_data_uint8 = image_data_uint8
+
+        image_data_float = np.asarray(encoded['image_data_float'], dtype=np.float32)
+        if pixels > 0 and image_data_float.size == pixels:
+            image_data_float = image_data_float.reshape(obj.height, obj.width)
+        obj.image_data_float = image_data_float
+        return obj
+
 class CarControls(MsgpackMixin):
     throttle = 0.0
     steering = 0.0
@@ -391,12 +448,26 @@ class CarControls(MsgpackMixin):
             self.throttle = - abs(throttle_val)
 
 class KinematicsState(MsgpackMixin):
-    position = Vector3r()
-    orientation = Quaternionr()
-    linear_velocity = Vector3r()
-    angular_velocity = Vector3r()
-    linear_acceleration = Vector3r()
-    angular_acceleration = Vector3r()
+    __slots__ = ('position', 'orientation', 'linear_velocity', 'angular_velocity', 'linear_acceleration',
+                 'angular_acceleration')
+
+    def __init__(self, position_val=None, orientation_val=None, linear_velocity_val=None, angular_velocity_val=None,
+                 linear_acceleration_val=None, angular_acceleration_val=None):
+        self.position = position_val if position_val is not None else Vector3r()
+        self.orientation = orientation_val if orientation_val is not None else Quaternionr()
+        self.linear_velocity = linear_velocity_val if linear_velocity_val is not None else Vector3r()
+        self.angular_velocity = angular_velocity_val if angular_velocity_val is not None else Vector3r()
+        self.linear_acceleration = linear_acceleration_val if linear_acceleration_val is not None else Vector3r()
+        self.angular_acceleration = angular_acceleration_val if angular_acceleration_val is not None else Vector3r()
+
+    @classmethod
+    def from_msgpack(cls, encoded):
+        return cls(Vector3r.from_msgpack(encoded.get('position', {})),
+                   Quaternionr.from_msgpack(encoded.get('orientation', {})),
+                   Vector3r.from_msgpack(encoded.get('linear_velocity', {})),
+                   Vector3r.from_msgpack(encoded.get('angular_velocity', {})),
+                   Vector3r.from_msgpack(encoded.get('linear_acceleration', {})),
+                   Vector3r.from_msgpack(encoded.get('angular_acceleration', {})))
 
 class EnvironmentState(MsgpackMixin):
     position = Vector3r()
@@ -134,24 +134,24 @@ def get_colormap_colors(maxVal, enable1, enable2, enable3, colormap, channelValu
 def generate_colormap():
     channelValues = get_colormap_channel_values()
     numPerChannel = 256
-    colorMap = []
-    okValues = []
-    num_per_channel = 256
     uneven_start = 79
     full_start = 149
-    for i in np.arange(uneven_start, full_start + 1, 2):
-        okValues.append(i)
-    for i in np.arange(full_start + 1, numPerChannel, 1):
-        okValues.append(i)
+    # same palette and order as get_colormap_colors, with the channel value filter applied per axis
+    okValues = np.zeros(channelValues.max() + 1, dtype=bool)
+    okValues[uneven_start:full_start:2] = True
+    okValues[full_start + 1:numPerChannel] = True
+    okChannels = okValues[channelValues]
+    gamma = np.asarray(gammaCorrectionTable)
+    colorMap = []
     for maxChannelIndex in range(0, numPerChannel):
-        get_colormap_colors(maxChannelIndex, False, False, True, colorMap, channelValues, okValues)
-        get_colormap_colors(maxChannelIndex, False, True, False, colorMap, channelValues, okValues)
-        get_colormap_colors(maxChannelIndex, False, True, True, colorMap, channelValues, okValues)
-        get_colormap_colors(maxChannelIndex, True, False, False, colorMap, channelValues, okValues)
-        get_colormap_colors(maxChannelIndex, True, False, True, colorMap, channelValues, okValues)
-        get_colormap_colors(maxChannelIndex, True, True, False, colorMap, channelValues, okValues)
-        get_colormap_colors(maxChannelIndex, True, True, True, colorMap, channelValues, okValues)
-    colorMap = np.asarray(colorMap)
+        free = channelValues[np.flatnonzero(okChannels[:maxChannelIndex])]
+        fixed = channelValues[maxChannelIndex:maxChannelIndex + 1] if okChannels[maxChannelIndex] else free[:0]
+        for enabled in ((False, False, True), (False, True, False), (False, True, True), (True, False, False),
+                        (True, False, True), (True, True, False), (True, True, True)):
+            axes = [fixed if enable else free for enable in enabled]
+            colors = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+            colorMap.append(gamma[colors])
+    colorMap = np.concatenate(colorMap)
     return colorMap
 
 def load_read_csv(path: str):
@@ -168,9 +168,97 @@ def load_read_csv(path: str):
 
     return matrix
 
+_colormap = None
+_colormap_ids = None
+
+
 def load_colormap():
-    colorMap = np.load(os.path.dirname(os.path.abspath(__file__)) + "/colormap.npy")
-    return colorMap
+    """
+    Returns:
+        np.ndarray: (N, 3) RGB color of every segmentation object ID. It is loaded once from the shipped
+        `colormap.npy`, or generated when that is missing, and shared between calls so it is read-only.
+    """
+    global _colormap
+    if _colormap is None:
+        path = os.path.dirname(os.path.abspath(__file__)) + "/colormap.npy"
+        colorMap = np.load(path) if os.path.exists(path) else generate_colormap()
+        colorMap.flags.writeable = False
+        _colormap = colorMap
+    return _colormap
+
+
+def get_colormap_id_lookup():
+    """
+    Returns:
+        np.ndarray: Table of 2^24 object IDs indexed by the packed color (R << 16) | (G << 8) | B, -1 for colors
+        that are not in the colormap. Built once on first use, it takes 64 MB.
+    """
+    global _colormap_ids
+    if _colormap_ids is None:
+        colorMap = load_colormap().astype(np.int32)
+        ids = np.full(1 << 24, -1, dtype=np.int32)
+        # assigned in reverse so the lowest ID wins for a color listed twice
+        ids[((colorMap[:, 0] << 16) | (colorMap[:, 1] << 8) | colorMap[:, 2])[::-1]] = \
+            np.arange(len(colorMap), dtype=np.int32)[::-1]
+        ids.flags.writeable = False
+        _colormap_ids = ids
+    return _colormap_ids
+
+
+def segmentation_image_to_ids(img):
+    """
+    Map the colors of a segmentation image back to object IDs
+
+    Args:
+        img (np.ndarray): (..., 3) RGB segmentation image, e.g. (H, W, 3) from `simGetImages` with `as_numpy=True`
+
+    Returns:
+        np.ndarray: (...) int32 object IDs, -1 for pixels whose color is not in the colormap
+    """
+    img = np.asarray(img)
+    packed = (img[..., 0].astype(np.int32) << 16) | (img[..., 1].astype(np.int32) << 8) | img[..., 2]
+    return get_colormap_id_lookup()[packed]
+
+
+# record of one object pose of simListInstanceSegmentationPoses and simListAnnotationPoses with as_numpy=True,
+# 'index' is the position of the object in the name list and 'visible' False for objects returned as NaN pose
+POSE_LIST_DTYPE = np.dtype([('index', np.int32),
+                            ('x_pos', np.float32), ('y_pos', np.float32), ('z_pos', np.float32),
+                            ('w_qua', np.float32), ('x_qua', np.float32), ('y_qua', np.float32), ('z_qua', np.float32),
+                            ('visible', np.bool_)])
+
+
+def pose_list_to_array(poses_raw):
+    """
+    Args:
+        poses_raw (list[dict]): Poses as decoded from msgpack
+
+    Returns:
+        np.ndarray: Structured array of the poses with dtype `POSE_LIST_DTYPE`
+    """
+    poses = np.array([(index, p['position']['x_val'], p['position']['y_val'], p['position']['z_val'],
+                       p['orientation']['w_val'], p['orientation']['x_val'], p['orientation']['y_val'],
+                       p['orientation']['z_val'], True)
+                      for index, p in enumerate(poses_raw)], dtype=POSE_LIST_DTYPE).reshape(-1)
+    poses['visible'] = ~np.isnan(poses['x_pos'])
+    return poses
+
+
+def write_pose_list_csv(filename, names, poses):
+    """
+    Write object poses as CSV with the header `ObjectName,x_pos,y_pos,z_pos,w_qua,x_qua,y_qua,z_qua`
+
+    Args:
+        filename (str): Path of the CSV file
+        names (np.ndarray): Object names, indexed by the 'index' field of `poses`
+        poses (np.ndarray): Structured array of poses with dtype `POSE_LIST_DTYPE`
+    """
+    fields = ('x_pos', 'y_pos', 'z_pos', 'w_qua', 'x_qua', 'y_qua', 'z_qua')
+    # columns are formatted as a whole by NumPy, only the row joins are left to Python
+    columns = [np.asarray(names)[poses['index']].tolist()] + [poses[field].astype(str).tolist() for field in fields]
+    with open(filename, 'w') as f:
+        f.write("ObjectName," + ",".join(fields) + "\n")
+        f.writelines(",".join(row) + "\n" for row in zip(*columns))
 
 
 # helper method for converting getOrientation to roll/pitch/yaw
@@ -251,6 +339,200 @@ def apply_rotation_offset(position, pitch, yaw, roll):
 
     return rotated_position
 
+# ----------------------------------- Array pose math -------------------------------------------------
+# Quaternions are (..., 4) arrays ordered x, y, z, w like `Quaternionr.to_numpy_array`, vectors and points
+# (..., 3) arrays. Leading dimensions broadcast, so a single quaternion can be applied to N points.
+
+def vectors_to_array(vectors):
+    """
+    Args:
+        vectors (list[Vector3r]): Vectors to convert
+
+    Returns:
+        np.ndarray: (N, 3) array of the vectors
+    """
+    return np.array([(v.x_val, v.y_val, v.z_val) for v in vectors], dtype=np.float64).reshape(-1, 3)
+
+
+def quaternions_to_array(quaternions):
+    """
+    Args:
+        quaternions (list[Quaternionr]): Quaternions to convert
+
+    Returns:
+        np.ndarray: (N, 4) array of the quaternions, ordered x, y, z, w
+    """
+    return np.array([(q.x_val, q.y_val, q.z_val, q.w_val) for q in quaternions], dtype=np.float64).reshape(-1, 4)
+
+
+def poses_to_arrays(poses):
+    """
+    Args:
+        poses (list[Pose]): Poses to convert, e.g. from `simListInstanceSegmentationPoses`
+
+    Returns:
+        tuple: (N, 3) array of the positions and (N, 4) array of the orientations
+    """
+    positions = vectors_to_array([pose.position for pose in poses])
+    return positions, quaternions_to_array([pose.orientation for pose in poses])
+
+
+def quaternions_to_euler_angles(quaternions):
+    """
+    Array counterpart of `quaternion_to_euler_angles`
+
+    Args:
+        quaternions (np.ndarray): (..., 4) quaternions
+
+    Returns:
+        tuple: roll, pitch and yaw arrays in radians
+    """
+    x, y, z, w = np.moveaxis(np.asarray(quaternions), -1, 0)
+    roll = np.arctan2(2.0 * (w*x + y*z), 1.0 - 2.0 * (x*x + y*y))
+    pitch = np.arcsin(np.clip(2.0 * (w*y - z*x), -1.0, 1.0))
+    yaw = np.arctan2(2.0 * (w*z + x*y), 1.0 - 2.0 * (y*y + z*z))
+    return roll, pitch, yaw
+
+
+def euler_angles_to_quaternions(roll, pitch, yaw):
+    """
+    Array counterpart of `euler_to_quaternion`
+
+    Args:
+        roll (np.ndarray): Roll angles in radians
+        pitch (np.ndarray): Pitch angles in radians
+        yaw (np.ndarray): Yaw angles in radians
+
+    Returns:
+        np.ndarray: (..., 4) quaternions
+    """
+    cr, sr = np.cos(np.multiply(roll, 0.5)), np.sin(np.multiply(roll, 0.5))
+    cp, sp = np.cos(np.multiply(pitch, 0.5)), np.sin(np.multiply(pitch, 0.5))
+    cy, sy = np.cos(np.multiply(yaw, 0.5)), np.sin(np.multiply(yaw, 0.5))
+    return np.stack(np.broadcast_arrays(cy * sr * cp - sy * cr * sp,
+                                        cy * cr * sp + sy * sr * cp,
+                                        sy * cr * cp - cy * sr * sp,
+                                        cy * cr * cp + sy * sr * sp), axis=-1)
+
+
+def quaternions_multiply(q, r):
+    """
+    Array counterpart of `Quaternionr.__mul__`, the Hamilton product q * r
+
+    Args:
+        q (np.ndarray): (..., 4) quaternions
+        r (np.ndarray): (..., 4) quaternions
+
+    Returns:
+        np.ndarray: (..., 4) products
+    """
+    x, y, z, t = np.moveaxis(np.asarray(q), -1, 0)
+    b, c, d, a = np.moveaxis(np.asarray(r), -1, 0)
+    return np.stack(np.broadcast_arrays(b*t + a*x + d*y - c*z,
+                                        c*t + a*y + b*z - d*x,
+                                        d*t + a*z + c*x - b*y,
+                                        a*t - b*x - c*y - d*z), axis=-1)
+
+
+def quaternions_inverse(quaternions):
+    """
+    Array counterpart of `Quaternionr.inverse`
+
+    Args:
+        quaternions (np.ndarray): (..., 4) quaternions
+
+    Returns:
+        np.ndarray: (..., 4) inverse quaternions
+    """
+    quaternions = np.asarray(quaternions)
+    conjugate = quaternions * np.array([-1.0, -1.0, -1.0, 1.0])
+    return conjugate / np.sum(quaternions * quaternions, axis=-1, keepdims=True)
+
+
+def quaternions_to_rotation_matrices(quaternions):
+    """
+    Args:
+        quaternions (np.ndarray): (..., 4) unit quaternions
+
+    Returns:
+        np.ndarray: (..., 3, 3) rotation matrices, rotating column vectors like `rotate_vectors`
+    """
+    x, y, z, w = np.moveaxis(np.asarray(quaternions), -1, 0)
+    return np.stack((np.stack((1 - 2*(y*y + z*z), 2*(x*y - z*w), 2*(x*z + y*w)), axis=-1),
+                     np.stack((2*(x*y + z*w), 1 - 2*(x*x + z*z), 2*(y*z - x*w)), axis=-1),
+                     np.stack((2*(x*z - y*w), 2*(y*z + x*w), 1 - 2*(x*x + y*y)), axis=-1)), axis=-2)
+
+
+def rotate_vectors(quaternions, vectors):
+    """
+    Array counterpart of `Quaternionr.rotate`, rotates each vector v by its quaternion q as q * v * q^-1
+
+    Args:
+        quaternions (np.ndarray): (..., 4) unit quaternions, or a single (4,) quaternion for all vectors
+        vectors (np.ndarray): (..., 3) vectors or points, e.g. a lidar point cloud reshaped to (N, 3)
+
+    Returns:
+        np.ndarray: (..., 3) rotated vectors
+    """
+    quaternions = np.asarray(quaternions)
+    vectors = np.asarray(vectors)
+    if quaternions.ndim == 1:
+        # a single rotation is cheapest as one matrix product, kept in the precision of the points
+        rotation = quaternions_to_rotation_matrices(quaternions)
+        if np.issubdtype(vectors.dtype, np.floating):
+            rotation = rotation.astype(vectors.dtype)
+        return vectors @ rotation.T
+    axis, w = quaternions[..., :3], quaternions[..., 3:]
+    t = 2.0 * np.cross(axis, vectors)
+    return vectors + w * t + np.cross(axis, t)
+
+
+def transform_points(positions, orientations, points):
+    """
+    Transform points from the frame of poses into the frame the poses are expressed in, e.g. body to world
+
+    Args:
+        positions (np.ndarray): (..., 3) positions of the poses, or a single (3,) position
+        orientations (np.ndarray): (..., 4) orientations of the poses, or a single (4,) orientation
+        points (np.ndarray): (..., 3) points in the frame of the poses
+
+    Returns:
+        np.ndarray: (..., 3) transformed points
+    """
+    rotated = rotate_vectors(orientations, points)
+    return rotated + np.asarray(positions, dtype=rotated.dtype)
+
+
+def compose_poses(positions_a, orientations_a, positions_b, orientations_b):
+    """
+    Compose poses b, expressed in the frame of poses a, with poses a
+
+    Args:
+        positions_a (np.ndarray): (..., 3) positions of poses a
+        orientations_a (np.ndarray): (..., 4) orientations of poses a
+        positions_b (np.ndarray): (..., 3) positions of poses b, in the frame of poses a
+        orientations_b (np.ndarray): (..., 4) orientations of poses b, in the frame of poses a
+
+    Returns:
+        tuple: (..., 3) positions and (..., 4) orientations of the composed poses
+    """
+    positions = np.asarray(positions_a) + rotate_vectors(orientations_a, positions_b)
+    return positions, quaternions_multiply(orientations_a, orientations_b)
+
+
+def inverse_poses(positions, orientations):
+    """
+    Args:
+        positions (np.ndarray): (..., 3) positions of the poses
+        orientations (np.ndarray): (..., 4) unit orientations of the poses
+
+    Returns:
+        tuple: (..., 3) positions and (..., 4) orientations of the inverse poses
+    """
+    inverse_orientations = quaternions_inverse(orientations)
+    return -rotate_vectors(inverse_orientations, positions), inverse_orientations
+
+
 def get_camera_type(cameraType):
     if cameraType == "Scene":
         cameraTypeClass = ImageType.Scene
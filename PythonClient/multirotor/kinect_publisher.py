@@ -9,11 +9,6 @@ import numpy as np
 
 CLAHE_ENABLED = False  # when enabled, RGB image is enhanced using CLAHE
 
-CAMERA_FX = 320
-CAMERA_FY = 320
-CAMERA_CX = 320
-CAMERA_CY = 240
-
 CAMERA_K1 = -0.000591
 CAMERA_K2 = 0.000519
 CAMERA_P1 = 0.000001
@@ -25,7 +20,8 @@ IMAGE_HEIGHT = 480
 
 
 class KinectPublisher:
-    def __init__(self):
+    def __init__(self, intrinsics):
+        self.intrinsics = intrinsics
         self.bridge_rgb = CvBridge()
         self.msg_rgb = Image()
         self.bridge_d = CvBridge()
@@ -90,12 +86,14 @@ class KinectPublisher:
         self.msg_info.D.append(CAMERA_P2)
         self.msg_info.D.append(CAMERA_P3)
 
-        self.msg_info.K[0] = CAMERA_FX
+        fx, fy = self.intrinsics[0, 0], self.intrinsics[1, 1]
+        cx, cy = self.intrinsics[0, 2], self.intrinsics[1, 2]
+        self.msg_info.K[0] = fx
         self.msg_info.K[1] = 0
-        self.msg_info.K[2] = CAMERA_CX
+        self.msg_info.K[2] = cx
         self.msg_info.K[3] = 0
-        self.msg_info.K[4] = CAMERA_FY
-        self.msg_info.K[5] = CAMERA_CY
+        self.msg_info.K[4] = fy
+        self.msg_info.K[5] = cy
         self.msg_info.K[6] = 0
         self.msg_info.K[7] = 0
         self.msg_info.K[8] = 1
@@ -110,13 +108,13 @@ class KinectPublisher:
         self.msg_info.R[7] = 0
         self.msg_info.R[8] = 1
 
-        self.msg_info.P[0] = CAMERA_FX
+        self.msg_info.P[0] = fx
         self.msg_info.P[1] = 0
-        self.msg_info.P[2] = CAMERA_CX
+        self.msg_info.P[2] = cx
         self.msg_info.P[3] = 0
         self.msg_info.P[4] = 0
-        self.msg_info.P[5] = CAMERA_FY
-        self.msg_info.P[6] = CAMERA_CY
+        self.msg_info.P[5] = fy
+        self.msg_info.P[6] = cy
         self.msg_info.P[7] = 0
         self.msg_info.P[8] = 0
         self.msg_info.P[9] = 0
@@ -191,7 +189,7 @@ if __name__ == "__main__":
     publisher_info = rospy.Publisher('/camera/rgb/camera_info', CameraInfo, queue_size=1)
     publisher_tf = rospy.Publisher('/tf', TFMessage, queue_size=1)
     rate = rospy.Rate(30)  # 30hz
-    pub = KinectPublisher()
+    pub = KinectPublisher(airsim.camera_intrinsics(client.simGetCameraInfo(0), IMAGE_WIDTH, IMAGE_HEIGHT))
 
     while not rospy.is_shutdown():
         responses = client.simGetImages([airsim.ImageRequest(0, airsim.ImageType.DepthPlanar, True, False),
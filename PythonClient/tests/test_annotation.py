@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+LAYER = 'RGBTestIndex'
+
+
+@pytest.fixture
+def client():
+    # 64x32 images of 16x16 blocks, the object of block (row, column) is object_{5 * row + column}
+    with StandInServer(StandInSimulator(image_size=(64, 32), object_count=20), port=42313):
+        client = airsim.VehicleClient(port=42313)
+        yield client
+        client.client.close()
+
+
+def annotation(client):
+    request = airsim.ImageRequest('front', airsim.ImageType.Annotation, False, False, annotation_name=LAYER)
+    return client.simGetImages([request])[0]
+
+
+def decoder(client, **kwargs):
+    return airsim.AnnotationDecoder(client, LAYER, layer_type=airsim.AnnotationType.RGB, direct=False, **kwargs)
+
+
+@pytest.mark.parametrize('max_table_size', [1 << 22, 0])
+def test_decode_blocks(client, max_table_size):
+    objects = decoder(client, max_table_size=max_table_size).decode(annotation(client))
+    assert objects.names == ['object_{}'.format(index) for index in (0, 1, 2, 3, 5, 6, 7, 8)]
+    assert objects.areas.tolist() == [256] * 8
+    assert objects.boxes[5].tolist() == [16, 16, 31, 31]
+    assert objects.centroids[5].tolist() == [23.5, 23.5]
+    assert objects.mask('object_6').sum() == 256 and objects.mask('object_6')[16:32, 16:32].all()
+
+
+def test_unknown_colors_are_background(client):
+    image = np.zeros((2, 2, 3), dtype=np.uint8)
+    image[0, 0] = airsim.load_colormap()[1]
+    image[1, 1] = [1, 2, 3]
+    labels = decoder(client).labels(image)
+    assert labels.tolist() == [[1, -1], [-1, -1]]
+
+
+def test_changes_through_cached_client_rebuild_table(client):
+    client.enable_cache()
+    layer = decoder(client)
+    layer.decode(annotation(client))
+    # object_1 takes the color of object_19, which is listed later and loses it
+    assert client.simSetAnnotationObjectID(LAYER, 'object_1', 19)
+    objects = layer.decode(annotation(client))
+    assert 'object_1' in objects.names and 'object_19' not in objects.names
+    assert objects.boxes[objects.names.index('object_1')].tolist() == [16, 0, 31, 15]
+
+
+def test_refresh_without_cache(client):
+    layer = decoder(client)
+    layer.decode(annotation(client))
+    client.simSetAnnotationObjectID(LAYER, 'object_1', 19)
+    assert 'object_19' in layer.decode(annotation(client)).names
+    layer.refresh()
+    assert 'object_1' in layer.decode(annotation(client)).names
@@ -0,0 +1,46 @@
+import asyncio
+import time
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(StandInSimulator(image_size=(16, 8)), port=42311,
+                       latencies={'simGetVehiclePose': 0.2}) as server:
+        yield server
+
+
+def test_gathered_calls_overlap(server):
+    async def run():
+        async with airsim.AsyncVehicleClient(port=42311) as client:
+            start = time.monotonic()
+            poses = await asyncio.gather(*[client.simGetVehiclePose() for _ in range(5)])
+            elapsed = time.monotonic() - start
+            assert all(isinstance(pose, airsim.Pose) for pose in poses)
+            assert elapsed < 0.6
+    asyncio.run(run())
+
+
+def test_results_match_sync_client(server):
+    async def run():
+        async with airsim.AsyncMultirotorClient(port=42311) as client:
+            await client.simSetVehiclePose(airsim.Pose(airsim.Vector3r(1.0, 2.0, 3.0)), True)
+            pose, state, images = await asyncio.gather(
+                client.simGetVehiclePose(), client.getMultirotorState(),
+                client.simGetImages([airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)],
+                                    as_numpy=True))
+            assert list(pose.position) == [1.0, 2.0, 3.0]
+            assert list(client.sync.simGetVehiclePose().position) == [1.0, 2.0, 3.0]
+            assert isinstance(state, airsim.MultirotorState)
+            assert images[0].image_data_uint8.shape == (8, 16, 3)
+            assert await client.takeoffAsync() is None
+            await client.simSetVehiclePose(airsim.Pose(), True)
+    asyncio.run(run())
+
+
+def test_sync_only_helpers_stay_on_sync_client():
+    assert not hasattr(airsim.AsyncVehicleClient, 'batch')
+    assert not hasattr(airsim.AsyncVehicleClient, 'enable_cache')
+    assert asyncio.iscoroutinefunction(airsim.AsyncMultirotorClient.moveToZAsync)
@@ -0,0 +1,52 @@
+import time
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(StandInSimulator(image_size=(16, 8)), port=42312,
+                       latencies={'simGetVehiclePose': 0.2, 'getImuData': 0.2}) as server:
+        yield server
+
+
+@pytest.mark.parametrize('thread_safe', [False, True])
+def test_calls_are_pipelined(server, thread_safe):
+    client = airsim.VehicleClient(port=42312, thread_safe=thread_safe)
+    start = time.monotonic()
+    with client.batch() as batch:
+        pose = batch.simGetVehiclePose()
+        imu = batch.getImuData('Imu')
+        assert not pose.done()
+    assert time.monotonic() - start < 0.35
+    assert isinstance(pose.result(), airsim.Pose)
+    assert isinstance(imu.result(), airsim.ImuData)
+    assert batch.results == [pose, imu]
+    client.client.close()
+
+
+def test_results_before_execute(server):
+    client = airsim.VehicleClient(port=42312)
+    batch = client.batch()
+    pose = batch.simGetVehiclePose()
+    with pytest.raises(RuntimeError):
+        pose.result()
+    assert len(batch.execute()) == 1
+    client.client.close()
+
+
+def test_snapshot_fetches_everything(server):
+    client = airsim.VehicleClient(port=42312)
+    requests = [airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)]
+    snapshot = airsim.SensorSnapshot(kinematics=True, sensors={'Imu': 'imu', 'Lidar': 'lidar'},
+                                     image_requests=requests, as_numpy=True)
+    start = time.monotonic()
+    data = snapshot.fetch(client)
+    assert time.monotonic() - start < 0.35
+    assert set(data) == {'pose', 'kinematics', 'Imu', 'Lidar', 'images'}
+    assert isinstance(data['kinematics'], airsim.KinematicsState)
+    assert data['images'][0].image_data_uint8.shape == (8, 16, 3)
+    with pytest.raises(ValueError):
+        airsim.SensorSnapshot(sensors={'Imu': 'accelerometer'})
+    client.client.close()
@@ -0,0 +1,107 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.broker import _MANIFEST_HEADER_SIZE, _MANIFEST_SIZE, list_frame_streams
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture
+def manifest():
+    prefix = 'cosysairsim_test_{}'.format(os.getpid())
+    segment = shared_memory.SharedMemory(prefix, create=True, size=_MANIFEST_SIZE)
+    header = np.ndarray(2, np.uint64, segment.buf)
+    yield prefix, segment, header
+    del header
+    segment.close()
+    segment.unlink()
+
+
+def write(segment, header, generation, payload, length=None):
+    segment.buf[_MANIFEST_HEADER_SIZE:_MANIFEST_HEADER_SIZE + len(payload)] = payload
+    header[1] = len(payload) if length is None else length
+    header[0] = generation
+
+
+def test_consistent_manifest(manifest):
+    prefix, segment, header = manifest
+    streams = {'front': {'kind': 'image', 'type': 'ImageResponse', 'slots': 4}}
+    write(segment, header, 2, json.dumps(streams).encode('utf-8'))
+    assert list_frame_streams(prefix) == streams
+
+
+def test_writer_died_mid_update(manifest):
+    prefix, segment, header = manifest
+    write(segment, header, 3, b'{"front": ')
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        list_frame_streams(prefix)
+    assert time.monotonic() - start < 5.0
+
+
+def test_torn_header(manifest):
+    prefix, segment, header = manifest
+    write(segment, header, 4, b'{}', length=1 << 40)
+    with pytest.raises(TimeoutError):
+        list_frame_streams(prefix)
+
+
+def test_no_broker():
+    assert list_frame_streams('cosysairsim_test_missing_{}'.format(os.getpid())) == {}
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(image_size=(64, 48), lidar_points=100), port=42305):
+        client = airsim.VehicleClient(port=42305)
+        yield client
+        client.client.close()
+
+
+def test_publish_read_roundtrip(client):
+    prefix = 'cosysairsim_test_roundtrip_{}'.format(os.getpid())
+    front = airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)
+    with airsim.FrameBroker(client, images={'front': front}, sensors={'lidar': ('lidar', 'LidarSensor1')},
+                            prefix=prefix) as broker:
+        broker.tick()
+        assert list_frame_streams(prefix)['front'] == {'kind': 'image', 'type': 'ImageResponse', 'slots': 4}
+        with airsim.FrameReader('front', prefix) as images, airsim.FrameReader('lidar', prefix) as lidar:
+            frame = images.get(timeout=1.0)
+            assert frame.seq == 1 and frame.is_valid()
+            assert frame.data.shape == (48, 64, 3)
+            assert (frame.record.width, frame.record.height) == (64, 48)
+            scan = lidar.get(timeout=1.0)
+            assert scan.data.shape == (300,)
+            assert isinstance(scan.record, airsim.LidarData)
+            broker.tick()
+            assert images.get(timeout=1.0).seq == 2
+            assert broker.published['front'] == 2
+            with pytest.raises(queue.Empty):
+                images.get(timeout=0.01)
+    assert list_frame_streams(prefix) == {}
+
+
+def test_refuses_running_broker(client):
+    prefix = 'cosysairsim_test_running_{}'.format(os.getpid())
+    with airsim.FrameBroker(client, prefix=prefix):
+        with pytest.raises(FileExistsError):
+            airsim.FrameBroker(client, prefix=prefix)
+        assert list_frame_streams(prefix) == {}
+
+
+def test_replaces_dead_broker(client):
+    prefix = 'cosysairsim_test_dead_{}'.format(os.getpid())
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    # manifest left behind by a broker whose process is gone
+    segment = shared_memory.SharedMemory(prefix, create=True, size=_MANIFEST_SIZE)
+    np.ndarray(3, np.uint64, segment.buf)[2] = process.pid
+    segment.close()
+    with airsim.FrameBroker(client, prefix=prefix):
+        assert list_frame_streams(prefix) == {}
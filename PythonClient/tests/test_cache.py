@@ -0,0 +1,48 @@
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(StandInSimulator(object_count=3), port=42304) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = airsim.VehicleClient(port=42304)
+    yield client
+    client.client.close()
+
+
+def test_camera_info_follows_vehicle_pose(client):
+    client.enable_cache()
+    assert client.simGetCameraInfo('front').pose.position.x_val == 0.0
+    client.simSetVehiclePose(airsim.Pose(airsim.Vector3r(5.0, 0.0, 0.0)), True)
+    assert client.simGetCameraInfo('front').pose.position.x_val == 5.0
+    client.simSetVehiclePose(airsim.Pose(), True)
+
+
+def test_hits_and_invalidation(client):
+    cache = client.enable_cache()
+    assert client.simListSceneObjects() == client.simListSceneObjects()
+    assert (cache.hits, cache.misses) == (1, 1)
+    generation = cache.generation
+    # setters made through the client drop the results they affect
+    client.simSpawnObject('object_3', 'Cube', airsim.Pose(), airsim.Vector3r(1, 1, 1))
+    assert cache.generation == generation + 1
+    client.simListSceneObjects()
+    assert cache.misses == 2
+    client.invalidate_cache('simListSceneObjects')
+    client.simListSceneObjects()
+    assert (cache.hits, cache.misses) == (1, 3)
+    client.disable_cache()
+    assert client._connection_layer(airsim.CachingConnection) is None
+
+
+def test_async_results_are_cached(client):
+    cache = client.enable_cache()
+    assert client.client.call_async('getSettingsString').get() == '{}'
+    assert client.getSettingsString() == '{}'
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+def test_colormap_is_shared_and_read_only():
+    colormap = airsim.load_colormap()
+    assert airsim.load_colormap() is colormap
+    assert not colormap.flags.writeable
+    with pytest.raises(ValueError):
+        colormap[0, 0] = 0
+
+
+def test_ids_of_colors():
+    colormap = airsim.load_colormap()
+    ids = np.array([[0, 1, 255], [1000, 2743999, 42]])
+    image = colormap[ids]
+    assert airsim.segmentation_image_to_ids(image).tolist() == ids.tolist()
+    assert airsim.segmentation_image_to_ids(np.zeros((1, 3), dtype=np.uint8)).tolist() == [-1]
+    assert airsim.VehicleClient.simIsValidColor(*colormap[42])
+    assert not airsim.VehicleClient.simIsValidColor(0, 0, 0)
+
+
+def test_segmentation_image_ids():
+    with StandInServer(StandInSimulator(image_size=(32, 16), object_count=4), port=42315):
+        client = airsim.VehicleClient(port=42315)
+        response = client.simGetImages([airsim.ImageRequest('front', airsim.ImageType.Segmentation, False, False)],
+                                       as_numpy=True)[0]
+        ids = airsim.segmentation_image_to_ids(response.image_data_uint8)
+        # 16x16 blocks of the objects in turn
+        assert ids[0, ::16].tolist() == [0, 1]
+        assert ids[15, 15] == 0 and ids[15, 16] == 1
+        client.client.close()
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(image_size=(32, 24)), port=42319):
+        client = airsim.VehicleClient(port=42319)
+        yield client
+        client.client.close()
+
+
+def get_normals(client):
+    return client.simGetImages([airsim.ImageRequest('front', airsim.ImageType.SurfaceNormals, False, False)])[0]
+
+
+def expected_normals(response):
+    pixels = np.frombuffer(response.image_data_uint8, np.uint8).reshape(response.height, response.width, 3)
+    normals = pixels * (2 / 255) - 1
+    normals[..., 2] *= -1
+    norms = np.linalg.norm(normals, axis=2, keepdims=True)
+    return np.where(norms < 0.5, 0, normals / norms)
+
+
+def test_world_normals(client):
+    response = get_normals(client)
+    normals = airsim.decode_surface_normals(response)
+    assert normals.shape == (24, 32, 3) and normals.dtype == np.float32
+    np.testing.assert_allclose(normals, expected_normals(response), atol=1e-5)
+    out = np.empty_like(normals)
+    assert airsim.decode_surface_normals(response, out=out) is out
+    np.testing.assert_array_equal(out, normals)
+
+
+def test_camera_normals(client):
+    response = get_normals(client)
+    yaw = np.pi / 2
+    response.camera_orientation = airsim.euler_to_quaternion(0, 0, yaw)
+    normals = airsim.decode_surface_normals(response, frame='camera')
+    world = expected_normals(response)
+    # a camera turned right by 90 degrees sees the world x axis on its left
+    np.testing.assert_allclose(normals[..., 0], world[..., 1], atol=1e-5)
+    np.testing.assert_allclose(normals[..., 1], -world[..., 0], atol=1e-5)
+    np.testing.assert_allclose(normals[..., 2], world[..., 2], atol=1e-5)
+
+
+def test_refused_responses(client):
+    response = get_normals(client)
+    with pytest.raises(ValueError):
+        airsim.decode_surface_normals(response, frame='body')
+    depth = client.simGetImages([airsim.ImageRequest('front', airsim.ImageType.DepthPlanar, True, False)])[0]
+    with pytest.raises(ValueError):
+        airsim.decode_surface_normals(depth)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from cosysairsim.distortion import DistortionRemapper, distortion_coefficients
+
+PARAMS = [0.2, 0.05, 0.01, 0.01, -0.005]     # K1, K2, K3, P1, P2 as returned by simGetDistortionParams
+WIDTH, HEIGHT = 160, 120
+
+
+def grid(x, y):
+    # smooth grid pattern of the undistorted scene, at continuous pixel coordinates
+    return 127.5 + 127.5 * np.cos(2 * np.pi * x / 32) * np.cos(2 * np.pi * y / 32)
+
+
+def shader(params, width, height):
+    # CameraDistortion material: every pixel shows the scene at distort(UV - 0.5) + 0.5
+    k1, k2, k3, p1, p2 = params
+    v, u = np.indices((height, width), dtype=np.float64)
+    x, y = (u + 0.5) / width - 0.5, (v + 0.5) / height - 0.5
+    r2 = x * x + y * y
+    radial = 1 + k1 * r2 + k2 * r2 ** 2 + k3 * r2 ** 3
+    out_x = x * radial + 2 * p1 * x * y + p2 * (r2 + 2 * x * x) + 0.5
+    out_y = y * radial + 2 * p2 * x * y + p1 * (r2 + 2 * y * y) + 0.5
+    return grid(out_x * width - 0.5, out_y * height - 0.5)
+
+
+def bilinear(image, map_x, map_y):
+    x0, y0 = np.floor(map_x).astype(int), np.floor(map_y).astype(int)
+    fx, fy = map_x - x0, map_y - y0
+    inside = (x0 >= 0) & (y0 >= 0) & (x0 < image.shape[1] - 1) & (y0 < image.shape[0] - 1)
+    x0, y0 = np.clip(x0, 0, image.shape[1] - 2), np.clip(y0, 0, image.shape[0] - 2)
+    values = (image[y0, x0] * (1 - fx) * (1 - fy) + image[y0, x0 + 1] * fx * (1 - fy) +
+              image[y0 + 1, x0] * (1 - fx) * fy + image[y0 + 1, x0 + 1] * fx * fy)
+    return values, inside
+
+
+def test_coefficients_order():
+    assert distortion_coefficients(PARAMS).tolist() == [0.2, 0.05, 0.01, -0.005, 0.01]
+    assert distortion_coefficients({'K1': 0.2, 'P2': -0.005}).tolist() == [0.2, 0.0, 0.0, -0.005, 0.0]
+
+
+def test_undistort_maps_invert_the_shader():
+    distorted = shader(PARAMS, WIDTH, HEIGHT)
+    scene = grid(*np.indices((HEIGHT, WIDTH), dtype=np.float64)[::-1])
+    map_x, map_y = DistortionRemapper().maps(PARAMS, WIDTH, HEIGHT, undistort=True)
+    recovered, inside = bilinear(distorted, map_x, map_y)
+    error = np.abs(recovered - scene)[inside].mean()
+    uncorrected = np.abs(distorted - scene)[inside].mean()
+    assert inside.mean() > 0.8
+    assert error < 2.0
+    assert error < uncorrected / 10
+
+
+def test_distort_maps_match_the_shader():
+    map_x, map_y = DistortionRemapper().maps(PARAMS, WIDTH, HEIGHT, undistort=False)
+    assert np.allclose(grid(map_x, map_y), shader(PARAMS, WIDTH, HEIGHT), atol=1e-2)
+
+
+def test_undistort_recovers_grid():
+    cv2 = pytest.importorskip('cv2')
+    distorted = shader(PARAMS, WIDTH, HEIGHT).astype(np.float32)
+    scene = grid(*np.indices((HEIGHT, WIDTH), dtype=np.float64)[::-1])
+    recovered = DistortionRemapper(interpolation=cv2.INTER_LINEAR).undistort(distorted, distortion_params=PARAMS)
+    # a margin of pixels around the image may read outside of the distorted render
+    inner = (slice(10, -10), slice(10, -10))
+    error = np.abs(recovered - scene)[inner].mean()
+    assert error < 2.0
+    assert error < np.abs(distorted - scene)[inner].mean() / 10
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(), port=42317):
+        client = airsim.VehicleClient(port=42317)
+        yield client
+        client.client.close()
+
+
+def test_broadcast_and_each(client):
+    fleet = airsim.FleetClient(client, ['Drone1', 'Drone2', 'Drone3'])
+    fleet.each('simSetVehiclePose', {name: (airsim.Pose(airsim.Vector3r(index, 2 * index, -3)), True)
+                                     for index, name in enumerate(fleet.vehicle_names)})
+    poses = fleet.simGetVehiclePose()
+    assert isinstance(poses, airsim.FleetResults)
+    assert list(poses) == fleet.vehicle_names
+    assert list(poses['Drone3'].position) == [2, 4, -3]
+    positions, orientations = fleet.get_poses()
+    np.testing.assert_allclose(positions, [[0, 0, -3], [1, 2, -3], [2, 4, -3]])
+    np.testing.assert_allclose(orientations, np.tile([0, 0, 0, 1], (3, 1)))
+
+
+def test_keyword_arguments(client):
+    fleet = airsim.FleetClient(client, ['Drone1', 'Drone2'])
+    fleet.each('simSetVehiclePose', {'Drone1': ((airsim.Pose(airsim.Vector3r(5, 0, 0)),), {'ignore_collision': True}),
+                                     'Drone2': (airsim.Pose(airsim.Vector3r(0, 5, 0)), False)})
+    positions, _ = fleet.get_poses()
+    np.testing.assert_allclose(positions, [[5, 0, 0], [0, 5, 0]])
+
+
+def test_methods_without_vehicle_name(client):
+    fleet = airsim.FleetClient(client, ['Drone1'])
+    with pytest.raises(AttributeError):
+        fleet.simPause
+    with pytest.raises(AttributeError):
+        fleet.each('getSettingsString', {'Drone1': ()})
@@ -0,0 +1,34 @@
+import concurrent.futures
+import time
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(port=42302, latencies={'simGetVehiclePose': 0.05}) as server:
+        yield server
+
+
+def test_wait_all_mixed_futures(server):
+    client = airsim.VehicleClient(port=42302)
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        for _ in range(5):
+            # the response of the plain connection arrives while the other future is still pending
+            slow = executor.submit(time.sleep, 0.2)
+            pose = client.client.call_async('simGetVehiclePose', '')
+            task = airsim.TaskFuture(client.client.call_async('ping'), client)
+            done, pending = airsim.wait_all([slow, pose, task], 5)
+            assert pending == [] and done == [slow, pose, task]
+    client.client.close()
+
+
+def test_wait_any_timeout(server):
+    client = airsim.VehicleClient(port=42302, thread_safe=True)
+    pose = client.client.call_async('simGetVehiclePose', '')
+    done, pending = airsim.wait_any([pose], 0.0)
+    assert pending == [pose]
+    assert airsim.wait_any([pose], 5)[0] == [pose]
+    assert airsim.is_done(pose)
+    client.client.close()
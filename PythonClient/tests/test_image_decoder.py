@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(image_size=(40, 30)), port=42320):
+        client = airsim.VehicleClient(port=42320)
+        yield client
+        client.client.close()
+
+
+def test_uncompressed_and_float_images(client):
+    responses = client.simGetImages([airsim.ImageRequest('front', airsim.ImageType.Scene, False, False),
+                                     airsim.ImageRequest('front', airsim.ImageType.DepthPlanar, True, False)])
+    with airsim.ImageDecoder(workers=2) as decoder:
+        scene, depth = decoder.decode(responses)
+    assert scene.shape == (30, 40, 3) and scene.dtype == np.uint8
+    np.testing.assert_array_equal(scene.reshape(-1), np.frombuffer(responses[0].image_data_uint8, np.uint8))
+    assert depth.shape == (30, 40) and depth.dtype == np.float32
+    np.testing.assert_array_equal(depth.reshape(-1), responses[1].image_data_float)
+    # the responses in numpy form decode the same
+    numpy_responses = client.simGetImages([airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)],
+                                          as_numpy=True)
+    np.testing.assert_array_equal(airsim.decode_images(numpy_responses)[0], scene)
+
+
+def test_png_images(client):
+    pytest.importorskip('cv2')
+    requests = [airsim.ImageRequest('front', airsim.ImageType.Scene, False, False),
+                airsim.ImageRequest('front', airsim.ImageType.Scene, False, True),
+                airsim.ImageRequest('back', airsim.ImageType.Scene, False, True)]
+    responses = client.simGetImages(requests)
+    raw, rgb, _ = airsim.decode_images(responses, rgb=True)
+    np.testing.assert_array_equal(rgb, raw)
+    np.testing.assert_array_equal(airsim.decode_images(responses)[1], raw[..., ::-1])
+    with airsim.ImageDecoder(rgb=True, reuse_buffers=True) as decoder:
+        first = decoder.decode(responses)
+        second = decoder.decode(responses)
+    # png images are decoded into the arrays of the previous call
+    assert second[1] is first[1] and second[2] is first[2]
+    np.testing.assert_array_equal(second[2], raw)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(image_size=(40, 30)), port=42310):
+        client = airsim.VehicleClient(port=42310)
+        yield client
+        client.client.close()
+
+
+def test_numpy_responses_match_lists(client):
+    requests = [airsim.ImageRequest('front', airsim.ImageType.Scene, False, False),
+                airsim.ImageRequest('front', airsim.ImageType.DepthPlanar, True, False),
+                airsim.ImageRequest('front', airsim.ImageType.Scene, False, True)]
+    scene, depth, png = client.simGetImages(requests, as_numpy=True)
+    plain = client.simGetImages(requests)
+    assert scene.image_data_uint8.shape == (30, 40, 3) and not scene.image_data_uint8.flags.writeable
+    assert scene.image_data_uint8.tobytes() == plain[0].image_data_uint8
+    assert depth.image_data_float.dtype == np.float32 and depth.image_data_float.shape == (30, 40)
+    np.testing.assert_array_equal(depth.image_data_float.ravel(), np.float32(plain[1].image_data_float))
+    # compressed images are left flat for the decoder
+    assert png.image_data_uint8.ndim == 1 and png.image_data_uint8[:4].tobytes() == b'\x89PNG'
+    assert isinstance(scene.camera_position, airsim.Vector3r)
+    assert isinstance(scene.camera_orientation, airsim.Quaternionr)
+
+
+def test_from_msgpack_numpy_empty_response():
+    encoded = {'camera_position': {}, 'camera_orientation': {}, 'image_data_uint8': b'', 'image_data_float': [],
+               'width': 0, 'height': 0}
+    response = airsim.ImageResponse.from_msgpack_numpy(encoded)
+    assert response.image_data_uint8.size == 0 and response.image_data_float.size == 0
@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+
+def run(code):
+    return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout.split()
+
+
+def test_star_import_keeps_earlier_exports():
+    names = run("exec('from cosysairsim import *'); print(' '.join(sorted(globals())))")
+    # modules and helpers exported by the star imports of earlier versions, and the names of the lazy surface
+    for name in ('np', 'msgpackrpc', 'math', 'logging', 'client', 'utils', 'types', 'VehicleClient', 'Pose',
+                 'to_str', 'ClientPool', 'wait_all'):
+        assert name in names
+
+
+def test_import_does_not_load_rpc_stack():
+    loaded = run("import sys, cosysairsim; cosysairsim.Pose; print(' '.join(sys.modules))")
+    assert 'msgpackrpc' not in loaded and 'cosysairsim.client' not in loaded
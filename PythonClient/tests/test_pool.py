@@ -0,0 +1,66 @@
+import threading
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture
+def pool():
+    with StandInServer(StandInSimulator(object_count=3), port=42307):
+        with airsim.ClientPool(size=3, port=42307) as pool:
+            yield pool
+
+
+def test_calls_from_many_threads(pool):
+    results = []
+
+    def run():
+        for _ in range(10):
+            results.append(pool.ping())
+    threads = [threading.Thread(target=run) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 60
+    stats = pool.get_stats()
+    assert stats['checkouts'] == 60 and stats['checked_out'] == 0
+    assert stats['max_checked_out'] <= 3
+    with pool.checkout() as client:
+        assert client.ping()
+    assert pool.thread_client() is pool.thread_client()
+
+
+def test_rpc_stats_cover_all_clients(pool):
+    stats = pool.enable_rpc_stats()
+    for client in pool._clients:
+        client.ping()
+    assert pool.get_rpc_stats()['ping']['count'] == 3
+    assert pool.enable_rpc_stats() is stats
+    pool.disable_rpc_stats()
+    assert pool.get_rpc_stats() == {}
+    assert all(client.get_rpc_stats() == {} for client in pool._clients)
+
+
+def test_cache_invalidated_across_clients(pool):
+    caches = pool.enable_cache()
+    first, second = pool._clients[:2]
+    first.simListSceneObjects()
+    second.simListSceneObjects()
+    assert first.simListSceneObjects() and caches[0].hits == 1
+    # a setter called through one client drops the results cached by all of them
+    second.simSpawnObject('object_3', 'Cube', airsim.Pose(), airsim.Vector3r(1, 1, 1))
+    first.simListSceneObjects()
+    assert caches[0].misses == 2
+    pool.invalidate_cache()
+    assert all(cache.generation >= 2 for cache in caches)
+    pool.disable_cache()
+    assert all(client._connection_layer(airsim.CachingConnection) is None for client in pool._clients)
+
+
+def test_resilience_on_all_clients(pool):
+    connections = pool.enable_resilience(deadline=1.0)
+    assert len(connections) == 3
+    assert pool.ping()
+    pool.disable_resilience()
+    assert all(client._connection_layer(airsim.ResilientConnection) is None for client in pool._clients)
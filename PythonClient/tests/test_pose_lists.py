@@ -0,0 +1,49 @@
+import math
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(object_count=5), port=42314):
+        client = airsim.VehicleClient(port=42314)
+        yield client
+        client.client.close()
+
+
+@pytest.mark.parametrize('annotation', [False, True])
+def test_arrays_match_poses(client, annotation):
+    if annotation:
+        names, poses = client.simListAnnotationPoses('layer', as_numpy=True)
+        expected = client.simListAnnotationPoses('layer')
+    else:
+        names, poses = client.simListInstanceSegmentationPoses(as_numpy=True)
+        expected = client.simListInstanceSegmentationPoses()
+    assert names.tolist() == ['object_{}'.format(index) for index in range(5)]
+    assert poses.dtype == airsim.POSE_LIST_DTYPE
+    assert poses['index'].tolist() == list(range(5))
+    assert poses['x_pos'].tolist() == [pose.position.x_val for pose in expected]
+    assert poses['w_qua'].tolist() == [pose.orientation.w_val for pose in expected]
+    assert poses['visible'].all()
+
+
+def test_nan_poses_are_not_visible():
+    nan = {'x_val': math.nan, 'y_val': math.nan, 'z_val': math.nan}
+    poses = airsim.pose_list_to_array([{'position': {'x_val': 1.0, 'y_val': 2.0, 'z_val': 3.0},
+                                        'orientation': {'w_val': 1.0, 'x_val': 0.0, 'y_val': 0.0, 'z_val': 0.0}},
+                                       {'position': nan, 'orientation': dict(nan, w_val=math.nan)}])
+    assert poses['visible'].tolist() == [True, False]
+    assert airsim.pose_list_to_array([]).shape == (0,)
+
+
+def test_write_pose_list_csv(client, tmp_path):
+    names, poses = client.simListInstanceSegmentationPoses(as_numpy=True)
+    path = str(tmp_path / 'poses.csv')
+    airsim.write_pose_list_csv(path, names, poses[::-1])
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'ObjectName,x_pos,y_pos,z_pos,w_qua,x_qua,y_qua,z_qua'
+    assert lines[1] == 'object_4,4.0,0.0,0.0,1.0,0.0,0.0,0.0'
+    assert len(lines) == 6
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+
+
+@pytest.fixture
+def quaternions():
+    rng = np.random.default_rng(7)
+    quaternions = rng.normal(size=(50, 4))
+    return quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)
+
+
+def test_multiply_matches_quaternionr(quaternions):
+    products = airsim.quaternions_multiply(quaternions[:-1], quaternions[1:])
+    for q, r, product in zip(quaternions[:-1], quaternions[1:], products):
+        expected = airsim.Quaternionr(*q) * airsim.Quaternionr(*r)
+        np.testing.assert_allclose(product, [expected.x_val, expected.y_val, expected.z_val, expected.w_val],
+                                   atol=1e-12)
+
+
+def test_euler_angles_match_scalar_helpers(quaternions):
+    roll, pitch, yaw = airsim.quaternions_to_euler_angles(quaternions)
+    for index in range(0, 50, 7):
+        expected = airsim.quaternion_to_euler_angles(airsim.Quaternionr(*quaternions[index]))
+        np.testing.assert_allclose([roll[index], pitch[index], yaw[index]], expected, atol=1e-9)
+    rebuilt = airsim.euler_angles_to_quaternions(roll, pitch, yaw)
+    # q and -q are the same rotation
+    np.testing.assert_allclose(np.abs(np.sum(rebuilt * quaternions, axis=1)), 1.0, atol=1e-9)
+
+
+def test_rotation_matrices_rotate_like_rotate_vectors(quaternions):
+    vectors = np.random.default_rng(8).normal(size=(50, 3))
+    rotated = airsim.rotate_vectors(quaternions, vectors)
+    np.testing.assert_allclose(np.einsum('nij,nj->ni', airsim.quaternions_to_rotation_matrices(quaternions),
+                                         vectors), rotated, atol=1e-9)
+    np.testing.assert_allclose(np.linalg.norm(rotated, axis=1), np.linalg.norm(vectors, axis=1))
+    # a single quaternion applies to all vectors
+    np.testing.assert_allclose(airsim.rotate_vectors(quaternions[0], vectors),
+                               airsim.rotate_vectors(np.repeat(quaternions[:1], 50, axis=0), vectors))
+
+
+def test_inverse_poses_undo_composition(quaternions):
+    positions = np.random.default_rng(9).normal(size=(50, 3))
+    inverse_positions, inverse_orientations = airsim.inverse_poses(positions, quaternions)
+    composed_positions, composed_orientations = airsim.compose_poses(positions, quaternions, inverse_positions,
+                                                                     inverse_orientations)
+    np.testing.assert_allclose(composed_positions, 0.0, atol=1e-9)
+    np.testing.assert_allclose(np.abs(composed_orientations[:, 3]), 1.0, atol=1e-9)
+    points = airsim.transform_points(positions, quaternions, np.zeros((50, 3)))
+    np.testing.assert_allclose(points, positions)
+
+
+def test_poses_to_arrays():
+    poses = [airsim.Pose(airsim.Vector3r(1.0, 2.0, 3.0), airsim.Quaternionr(0.0, 0.0, 1.0, 0.0)), airsim.Pose()]
+    positions, orientations = airsim.poses_to_arrays(poses)
+    assert positions.tolist() == [[1.0, 2.0, 3.0], [0.0, 0.0, 0.0]]
+    assert orientations.tolist() == [[0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def client():
+    with StandInServer(StandInSimulator(image_size=(64, 48)), port=42318):
+        client = airsim.VehicleClient(port=42318)
+        yield client
+        client.client.close()
+
+
+def get_images(client, image_type=airsim.ImageType.DepthPlanar):
+    return client.simGetImages([airsim.ImageRequest('front', image_type, True, False),
+                                airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)])
+
+
+def test_project_depth_image(client):
+    depth, scene = get_images(client)
+    projector = airsim.DepthProjector(client)
+    points, colors = projector.project(depth, 'front', colors=scene, frame='camera')
+    expected = np.asarray(depth.image_data_float, dtype=np.float32)
+    assert points.shape == (64 * 48, 3) and colors.shape == (64 * 48, 3)
+    # planar depth is the forward distance, and a 90 degree camera sees y and z up to the depth
+    np.testing.assert_allclose(points[:, 0], expected, rtol=1e-6)
+    assert np.all(np.abs(points[:, 1:]) <= points[:, :1])
+    np.testing.assert_array_equal(colors, np.frombuffer(scene.image_data_uint8, np.uint8).reshape(-1, 3))
+    # the ray grid of the camera is kept for the next frames
+    camera_info = client.simGetCameraInfo('front')
+    intrinsics = airsim.camera_intrinsics(camera_info, 64, 48)
+    assert projector.rays(intrinsics, 64, 48) is projector.rays(intrinsics, 64, 48)
+
+    near = projector.project(depth, camera_info=camera_info, frame='camera', max_depth=50.0)
+    np.testing.assert_array_equal(near, points[expected <= 50.0])
+
+
+def test_perspective_depth_is_the_distance(client):
+    depth = get_images(client, airsim.ImageType.DepthPerspective)[0]
+    points = airsim.depth_to_points(depth, client.simGetCameraInfo('front'), frame='camera')
+    np.testing.assert_allclose(np.linalg.norm(points, axis=1), depth.image_data_float, rtol=1e-5)
+
+
+def test_world_points_project_back_to_their_pixels(client):
+    depth, scene = get_images(client)
+    depth.camera_position = airsim.Vector3r(10, -5, -2)
+    depth.camera_orientation = airsim.euler_to_quaternion(0.1, 0.2, 0.7)
+    camera_info = client.simGetCameraInfo('front')
+    points = airsim.depth_to_points(depth, camera_info)
+    camera_points = airsim.depth_to_points(depth, camera_info, frame='camera')
+    assert not np.allclose(points, camera_points)
+
+    # the same depth image seen by a second camera moved away along its optical axis
+    responses = [depth, airsim.ImageResponse()]
+    responses[1].width, responses[1].height = 64, 48
+    responses[1].camera_orientation = depth.camera_orientation
+    transforms = airsim.camera_transforms(responses)
+    transforms[1, :3, 3] = transforms[0, :3, 3] - transforms[0, :3, 0] * 100
+    intrinsics = airsim.cameras_intrinsics(responses, camera_info)
+    pixels, depths, visible = airsim.project_points(points, transforms, intrinsics, [(64, 48), (64, 48)])
+    rows, columns = np.indices((48, 64))
+    np.testing.assert_allclose(pixels[0], np.stack((columns.ravel(), rows.ravel()), axis=1), atol=1e-3)
+    np.testing.assert_allclose(depths[0], depth.image_data_float, rtol=1e-5)
+    np.testing.assert_allclose(depths[1], depths[0] + 100, rtol=1e-5)
+    assert visible[0].all() and visible[1].all()
+
+
+def test_project_boxes():
+    responses = [airsim.ImageResponse()]
+    responses[0].width, responses[0].height = 64, 48
+    camera_info = airsim.CameraInfo()
+    camera_info.fov = 90.0
+    box = airsim.Box3D()
+    box.min, box.max = airsim.Vector3r(9, -1, -1), airsim.Vector3r(11, 1, 1)
+    behind = airsim.Box3D()
+    behind.min, behind.max = airsim.Vector3r(-11, -1, -1), airsim.Vector3r(-9, 1, 1)
+    rectangles, visible = airsim.project_boxes([box, behind], airsim.camera_transforms(responses),
+                                               airsim.cameras_intrinsics(responses, camera_info), [(64, 48)])
+    assert visible.tolist() == [[True, False]]
+    # the near face of the box spans 2 / 9 of the focal length of 32 pixels around the image center
+    half = 32 / 9
+    np.testing.assert_allclose(rectangles[0, 0], [31.5 - half, 23.5 - half, 31.5 + half, 23.5 + half])
@@ -0,0 +1,54 @@
+import asyncio
+import time
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(port=42301, latencies={'simGetVehiclePose': 3.0}) as server:
+        yield server
+
+
+@pytest.mark.parametrize('thread_safe', [False, True])
+def test_batch_deadline(server, thread_safe):
+    client = airsim.VehicleClient(port=42301, thread_safe=thread_safe)
+    resilient = client.enable_resilience(deadline=0.5)
+    start = time.monotonic()
+    batch = client.batch()
+    pose = batch.simGetVehiclePose()
+    ping = batch.ping()
+    with pytest.raises(airsim.DeadlineExceeded):
+        batch.execute()
+    assert time.monotonic() - start < 2.0
+    with pytest.raises(airsim.DeadlineExceeded):
+        pose.result()
+    assert ping.result()
+    # the connection of the expired call is replaced before the next one
+    assert client.ping()
+    assert resilient.reconnects == 1
+    client.client.close()
+
+
+def test_async_client_deadline(server):
+    async def run():
+        client = airsim.AsyncVehicleClient(port=42301)
+        client.sync.enable_resilience(deadline=0.5)
+        start = time.monotonic()
+        with pytest.raises(airsim.DeadlineExceeded):
+            await client.simGetVehiclePose()
+        assert time.monotonic() - start < 2.0
+        assert await client.ping()
+        client.close()
+    asyncio.run(run())
+
+
+def test_fast_calls_keep_connection(server):
+    client = airsim.VehicleClient(port=42301, thread_safe=True)
+    resilient = client.enable_resilience(deadline=0.2)
+    assert client.client.call_async('ping').get()
+    time.sleep(0.3)
+    assert client.ping()
+    assert resilient.reconnects == 0
+    client.client.close()
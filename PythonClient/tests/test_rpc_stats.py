@@ -0,0 +1,60 @@
+import csv
+import json
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(StandInSimulator(lidar_points=1000), port=42316, latencies={'getLidarData': 0.05}) as server:
+        yield server
+
+
+@pytest.mark.parametrize('thread_safe', [False, True])
+def test_records_calls(server, thread_safe):
+    client = airsim.VehicleClient(port=42316, thread_safe=thread_safe)
+    assert client.get_rpc_stats() == {}
+    client.enable_rpc_stats()
+    for _ in range(3):
+        client.getLidarData()
+    client.client.call_async('ping').get() if not thread_safe else client.client.call_async('ping').result()
+    stats = client.get_rpc_stats()
+    lidar = stats['getLidarData']
+    assert lidar['count'] == 3 and lidar['errors'] == 0
+    assert 0.05 <= lidar['latency_p50'] <= lidar['latency_max'] < 1.0
+    # 1000 points of 3 floats
+    assert lidar['response_bytes'] > 3 * 12000 and lidar['request_bytes'] > 0
+    assert lidar['decode_time'] > 0 and lidar['network_time'] > 0
+    assert stats['ping']['count'] == 1
+    client.disable_rpc_stats()
+    assert client.get_rpc_stats() == {}
+    client.client.close()
+
+
+def test_statistics_survive_cache_and_resilience(server):
+    client = airsim.VehicleClient(port=42316)
+    stats = client.enable_rpc_stats()
+    client.enable_cache()
+    client.enable_resilience(deadline=5.0)
+    client.getSettingsString()
+    client.getSettingsString()
+    snapshot = stats.snapshot()['getSettingsString']
+    # the calls answered from the cache are counted too
+    assert snapshot['count'] == 2 and snapshot['response_bytes'] > 0
+    client.client.close()
+
+
+def test_dumps(tmp_path):
+    stats = airsim.RpcStats()
+    stats.record_call('ping', 0.01)
+    stats.record_call('ping', 0.02, error=True)
+    stats.dump(str(tmp_path / 'stats.json'))
+    with open(str(tmp_path / 'stats.json')) as f:
+        assert json.load(f)['ping']['errors'] == 1
+    stats.dump(str(tmp_path / 'stats.csv'))
+    with open(str(tmp_path / 'stats.csv')) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(airsim.STATS_FIELDS) and rows[1][:3] == ['ping', '2', '1']
+    stats.reset()
+    assert stats.snapshot() == {}
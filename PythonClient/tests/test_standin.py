@@ -0,0 +1,15 @@
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+def test_vehicle_pose_roundtrip():
+    with StandInServer(StandInSimulator(object_count=3), port=42303):
+        client = airsim.VehicleClient(port=42303)
+        assert client.simGetVehiclePose().position.to_numpy_array().tolist() == [0.0, 0.0, 0.0]
+        client.simSetVehiclePose(airsim.Pose(airsim.Vector3r(1.0, 2.0, -3.0)), True)
+        assert client.simGetVehiclePose().position.to_numpy_array().tolist() == [1.0, 2.0, -3.0]
+        assert client.simGetCameraInfo('front').pose.position.to_numpy_array().tolist() == [1.0, 2.0, -3.0]
+        # other vehicles keep their own pose
+        assert client.simGetVehiclePose('Drone2').position.to_numpy_array().tolist() == [0.0, 0.0, 0.0]
+        assert len(client.simListSceneObjects()) == 3
+        client.client.close()
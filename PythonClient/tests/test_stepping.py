@@ -0,0 +1,43 @@
+import time
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture
+def client():
+    with StandInServer(StandInSimulator(image_size=(32, 24)), port=42306):
+        client = airsim.VehicleClient(port=42306)
+        yield client
+        client.client.close()
+
+
+def test_steps_capture_paused_simulation(client):
+    requests = [airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)]
+    snapshot = airsim.SensorSnapshot(sensors={'Imu': 'imu'}, image_requests=requests, as_numpy=True)
+    with airsim.LockstepCapture(client, snapshot, dt=0.05) as capture:
+        assert client.simIsPause()
+        start = time.monotonic()
+        for data in capture.steps(3):
+            assert client.simIsPause()
+            assert data['images'][0].image_data_uint8.shape == (24, 32, 3)
+            assert isinstance(data['Imu'], airsim.ImuData)
+        assert time.monotonic() - start >= 0.15
+        assert capture.step_count == 3
+    # the pause state from before the capture is restored
+    assert not client.simIsPause()
+
+
+def test_replay_captures_every_pose(client):
+    poses = [airsim.Pose(airsim.Vector3r(float(x), 0.0, -1.0)) for x in range(3)]
+    with airsim.LockstepCapture(client, airsim.SensorSnapshot(), frames=2) as capture:
+        captured = [data['pose'].position.x_val for _, data in capture.replay(poses)]
+    assert captured == [0.0, 1.0, 2.0]
+
+
+def test_wait_for_pause_timeout(client):
+    with pytest.raises(TimeoutError):
+        airsim.wait_for_pause(client, timeout=0.05)
+    client.simContinueForTime(0.05)
+    airsim.wait_for_pause(client, timeout=1.0)
+    assert client.simIsPause()
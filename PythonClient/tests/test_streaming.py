@@ -0,0 +1,41 @@
+import queue
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(StandInSimulator(lidar_points=100, sensor_rate_hz=50.0), port=42309) as server:
+        yield server
+
+
+def test_only_new_samples(server):
+    client = airsim.VehicleClient(port=42309, thread_safe=True)
+    with client.subscribe('imu', rate_hz=200.0) as imu:
+        time_stamps = [imu.get(timeout=1.0).time_stamp for _ in range(5)]
+    assert time_stamps == sorted(set(time_stamps))
+    assert imu.received >= 5
+    with pytest.raises(queue.Empty):
+        while True:
+            imu.get(timeout=0.0)
+    client.client.close()
+
+
+def test_dedicated_connection_keeps_client_settings(server):
+    client = airsim.VehicleClient(port=42309, timeout_value=5)
+    with client.subscribe('lidar', 'LidarSensor1', typed_arrays=True) as lidar:
+        assert lidar._client._connection_args == client._connection_args[:3] + (True, True)
+        scan = lidar.get(timeout=1.0)
+    assert scan.point_cloud.dtype == np.float32 and scan.point_cloud.shape == (300,)
+    client.client.close()
+
+
+def test_typed_arrays(server):
+    client = airsim.VehicleClient(port=42309, typed_arrays=True)
+    assert client.getLidarData('LidarSensor1').point_cloud.dtype == np.float32
+    client.client.close()
+    client = airsim.VehicleClient(port=42309)
+    assert isinstance(client.getLidarData('LidarSensor1').point_cloud, list)
+    client.client.close()
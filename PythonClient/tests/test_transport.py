@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer, StandInSimulator
+
+
+class MixedEncodingSimulator(StandInSimulator):
+    # msgpack sends whole numbers of a float array as ints, and some servers floats as float32
+    clouds = {
+        'floats': [0.5, -1.25, 3.0, 1e30],
+        'int_first': [2, 0.5, 3, -1.5],
+        'int_after_floats': [0.5, 1.5, 7, 2.5, -3, 4],
+        'empty': [],
+    }
+
+    def _getLidarData(self, lidar_name='', *args):
+        payload = dict(super()._getLidarData())
+        payload['point_cloud'] = self.clouds[lidar_name]
+        return payload
+
+    def _getEchoData(self, *args):
+        payload = dict(self._sensor('getEchoData'))
+        payload.update(point_cloud=[1.0, 2, 3.5], passive_beacons_point_cloud=[-1, -2.5])
+        return payload
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StandInServer(MixedEncodingSimulator(image_size=(64, 48), object_count=20), port=42321) as server:
+        yield server
+
+
+@pytest.fixture(scope='module')
+def clients(server):
+    typed, plain = airsim.VehicleClient(port=42321, typed_arrays=True), airsim.VehicleClient(port=42321)
+    yield typed, plain
+    typed.client.close()
+    plain.client.close()
+
+
+@pytest.mark.parametrize('name', sorted(MixedEncodingSimulator.clouds))
+def test_mixed_element_encodings(clients, name):
+    typed, plain = clients
+    cloud = typed.getLidarData(name).point_cloud
+    assert isinstance(cloud, np.ndarray) and cloud.dtype == np.float32
+    np.testing.assert_array_equal(cloud, np.asarray(plain.getLidarData(name).point_cloud, dtype=np.float32))
+    # the connection carries on with the next responses after a fallback
+    assert typed.getSettingsString() == '{}'
+
+
+def test_typed_fields(clients):
+    typed, plain = clients
+    echo = typed.getEchoData()
+    np.testing.assert_array_equal(echo.point_cloud, [1, 2, 3.5])
+    np.testing.assert_array_equal(echo.passive_beacons_point_cloud, [-1, -2.5])
+    meshes = typed.simGetMeshPositionVertexBuffers()
+    assert len(meshes) == 2 and all(mesh.vertices.dtype == np.float32 for mesh in meshes)
+    assert meshes[0].indices == plain.simGetMeshPositionVertexBuffers()[0].indices
+
+
+def test_large_float_images(clients):
+    typed, plain = clients
+    requests = [airsim.ImageRequest('front', airsim.ImageType.DepthPlanar, True, False),
+                airsim.ImageRequest('front', airsim.ImageType.Scene, False, False)] * 3
+    typed_responses, plain_responses = typed.simGetImages(requests), plain.simGetImages(requests)
+    for typed_response, plain_response in zip(typed_responses, plain_responses):
+        assert isinstance(typed_response.image_data_float, np.ndarray)
+        np.testing.assert_array_equal(typed_response.image_data_float,
+                                      np.asarray(plain_response.image_data_float, dtype=np.float32))
+        assert typed_response.image_data_uint8 == plain_response.image_data_uint8
+
+
+def test_pipelined_typed_and_plain_calls(clients):
+    typed, _ = clients
+    futures = [typed.client.call_async('getLidarData', 'int_after_floats', ''),
+               typed.client.call_async('getSettingsString'),
+               typed.client.call_async('getLidarData', 'floats', '')]
+    lidar, settings, floats = [future.get() for future in futures]
+    assert lidar['point_cloud'].tolist() == [0.5, 1.5, 7, 2.5, -3, 4]
+    assert settings == '{}'
+    assert floats['point_cloud'].dtype == np.float32
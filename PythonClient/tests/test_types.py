@@ -0,0 +1,36 @@
+import msgpack
+import pytest
+import cosysairsim as airsim
+from cosysairsim.standin import StandInServer
+
+
+@pytest.mark.parametrize('value', [airsim.Vector2r(1.0, 2.0), airsim.Vector3r(1.0, 2.0, 3.0),
+                                   airsim.Quaternionr(0.1, 0.2, 0.3, 0.9),
+                                   airsim.Pose(airsim.Vector3r(1.0, 2.0, 3.0), airsim.Quaternionr(0.0, 0.0, 1.0, 0.0)),
+                                   airsim.KinematicsState(airsim.Vector3r(1.0, 0.0, 0.0))])
+def test_slotted_roundtrip(value):
+    assert not hasattr(value, '__dict__')
+    encoded = msgpack.unpackb(msgpack.packb(value, default=lambda x: x.to_msgpack()), raw=False)
+    assert msgpack.packb(type(value).from_msgpack(encoded), default=lambda x: x.to_msgpack()) == \
+        msgpack.packb(value, default=lambda x: x.to_msgpack())
+
+
+def test_missing_fields_keep_defaults():
+    assert list(airsim.Vector3r.from_msgpack({'x_val': 1.0})) == [1.0, 0.0, 0.0]
+    orientation = airsim.Quaternionr.from_msgpack({'z_val': 1.0})
+    assert (orientation.x_val, orientation.y_val, orientation.z_val, orientation.w_val) == (0.0, 0.0, 1.0, 1.0)
+    pose = airsim.Pose.from_msgpack({'position': {'x_val': 2.0}})
+    assert list(pose.position) == [2.0, 0.0, 0.0] and pose.orientation.w_val == 1.0
+    kinematics = airsim.KinematicsState.from_msgpack({'linear_velocity': {'y_val': 3.0}})
+    assert kinematics.linear_velocity.y_val == 3.0 and kinematics.orientation.w_val == 1.0
+    assert airsim.Vector2r.from_msgpack({}).y_val == 0.0
+
+
+def test_nested_in_generic_types():
+    with StandInServer(port=42308):
+        client = airsim.MultirotorClient(port=42308)
+        state = client.getMultirotorState()
+        assert isinstance(state.kinematics_estimated, airsim.KinematicsState)
+        assert isinstance(state.kinematics_estimated.position, airsim.Vector3r)
+        assert isinstance(client.simGetVehiclePose(), airsim.Pose)
+        client.client.close()
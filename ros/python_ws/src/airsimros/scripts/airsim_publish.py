@@ -849,6 +849,8 @@ def airsim_publish(client, use_route, route_rosbag, merged_rosbag, generate_gt_m
                 elapsedTime = t.to_sec() - last_time
                 if elapsedTime + tolerance >= period:
                     client.simContinueForTime(period)
+                    # capture once the step has ended, so the pose and images are taken while paused
+                    airsim.wait_for_pause(client)
                     last_time = t.to_sec()
                     cur_position = airsim.Vector3r(msg.pose.position.x, -msg.pose.position.y, -msg.pose.position.z)
                     cur_orientation = airsim.Quaternionr(msg.pose.orientation.x, msg.pose.orientation.y,
@@ -1000,7 +1002,6 @@ def airsim_publish(client, use_route, route_rosbag, merged_rosbag, generate_gt_m
 
                     pose_index += 1
                     first_message = False
-                    time.sleep(1)
 
         output.write('/tf_static', saved_static_tf, first_timestamp)
         rospy.loginfo("Process completed. Writing all other messages to merged rosbag...")